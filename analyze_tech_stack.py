@@ -5,12 +5,16 @@
 从 CSV 文件读取职位描述，分析共性技术栈，输出学习建议
 """
 
-import csv
 import re
 from collections import Counter
 import json
+import hashlib
 import os
 from dotenv import load_dotenv
+from output_formats import iter_rows
+from job_store import JobStore
+import metrics
+import profiling
 
 # 加载 .env 文件
 load_dotenv()
@@ -20,10 +24,17 @@ load_dotenv()
 # 输入文件（爬虫生成的数据）
 INPUT_FILE = 'data.csv'
 
+# 职位数据库（见 job_store.py），非空时代替 INPUT_FILE，只分析上次之后新增或变化的职位
+JOB_STORE_FILE = ''
+
 # 输出文件
 OUTPUT_FILE = 'tech_stack_analysis.json'
 MARKDOWN_FILE = 'tech_stack_analysis.md'  # Markdown报告文件
 
+# 运行报告（见 metrics.py），设为空字符串则不写；PROMETHEUS_TEXTFILE 非空时同时写出 Prometheus 文本文件
+METRICS_REPORT_FILE = 'tech_stack_report.json'
+PROMETHEUS_TEXTFILE = ''
+
 # 大模型配置
 USE_LLM = True  # 是否使用大模型分析（需要 API Key）
 LLM_PROVIDER = 'qwen'  # 可选: 'qwen'(通义千问), 'openai', 'deepseek'
@@ -71,6 +82,7 @@ TECH_KEYWORDS = {
 
 # ==================== 大模型集成 ====================
 
+@profiling.section('call_llm_analysis')
 def call_llm_analysis(descriptions, tech_stats):
     """使用大模型进行深度分析"""
     if not USE_LLM:
@@ -229,26 +241,41 @@ def call_deepseek_api(prompt, api_key):
 
 # ==================== 核心功能 ====================
 
+@profiling.section('load_job_descriptions')
 def load_job_descriptions(csv_file):
     """从CSV文件加载职位描述"""
     descriptions = []
 
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            desc = row.get('职位描述', '').strip()
-            if desc and len(desc) > 10:
-                descriptions.append({
-                    '职位': row.get('职位', ''),
-                    '公司': row.get('公司', ''),
-                    '薪资': row.get('薪资', ''),
-                    '描述': desc
-                })
+    # 也支持 Parquet / JSON Lines 输入（见 output_formats.py），Parquet 只读取需要的列
+    columns = ['职位', '公司', '薪资', '职位描述']
+    for row in iter_rows(csv_file, columns=columns, encoding='utf-8'):
+        desc = (row.get('职位描述') or '').strip()
+        if desc and len(desc) > 10:
+            descriptions.append({
+                '职位': row.get('职位') or '',
+                '公司': row.get('公司') or '',
+                '薪资': row.get('薪资') or '',
+                '描述': desc
+            })
 
     print(f"✓ 加载了 {len(descriptions)} 个职位描述")
     return descriptions
 
 
+def job_techs(desc):
+    """一个职位描述中出现的技术 {类别: [技术, ...]}"""
+    techs = {}
+    # 遍历所有技术类别
+    for category, keywords in TECH_KEYWORDS.items():
+        for keyword in keywords:
+            # 不区分大小写匹配
+            pattern = re.compile(re.escape(keyword), re.IGNORECASE)
+            if pattern.search(desc):
+                techs.setdefault(category, []).append(keyword)
+    return techs
+
+
+@profiling.section('extract_tech_stack')
 def extract_tech_stack(descriptions):
     """从职位描述中提取技术栈关键词"""
     print("\n开始分析技术栈...")
@@ -257,15 +284,8 @@ def extract_tech_stack(descriptions):
     total_jobs = len(descriptions)
 
     for idx, job in enumerate(descriptions, 1):
-        desc = job['描述']
-
-        # 遍历所有技术类别
-        for category, keywords in TECH_KEYWORDS.items():
-            for keyword in keywords:
-                # 不区分大小写匹配
-                pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-                if pattern.search(desc):
-                    tech_stats[category][keyword] += 1
+        for category, techs in job_techs(job['描述']).items():
+            tech_stats[category].update(techs)
 
         if idx % 10 == 0:
             print(f"  已分析 {idx}/{total_jobs} 个职位...")
@@ -273,6 +293,62 @@ def extract_tech_stack(descriptions):
     return tech_stats
 
 
+@profiling.section('analyze_store')
+def analyze_store(store_file):
+    """
+    增量分析职位数据库：只对上次分析之后新增或变化的职位提取技术栈，
+    每个职位的结果保存在数据库中，统计时合并全部职位的结果
+
+    有清洗结果时读取清洗后的职位（clean_data.py --store），否则读取采集到的原始职位。
+    技术关键词库变化后结果保存在新的阶段名下，所有职位会重新分析一次。
+
+    Returns:
+        (descriptions, tech_stats)
+    """
+    fingerprint = hashlib.md5(
+        json.dumps(TECH_KEYWORDS, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    ).hexdigest()[:8]
+    stage = f'tech_{fingerprint}'
+
+    store = JobStore(store_file)
+    try:
+        source = 'clean' if store.has_results('clean') else 'jobs'
+        rows, version = store.changed(stage, source)
+        print(f"✓ 上次分析之后新增或变化 {len(rows)} 个职位（数据来源: {source}）")
+
+        results = []
+        for job_id, record in rows:
+            desc = (record.get('jd_text') or '').strip()
+            if desc and len(desc) > 10:
+                results.append((job_id, {
+                    '职位': record.get('job_title') or '',
+                    '公司': record.get('company_name_raw') or '',
+                    '薪资': record.get('salary_text_raw') or '',
+                    # 只保留大模型提示词用到的长度
+                    '描述': desc[:200],
+                    'techs': job_techs(desc),
+                }))
+            else:
+                # 描述被清空的职位也要覆盖旧结果
+                results.append((job_id, {}))
+        store.put_results(stage, results)
+        store.mark(stage, version, source)
+
+        descriptions = []
+        tech_stats = {category: Counter() for category in TECH_KEYWORDS}
+        for _, item in store.results(stage):
+            if not item:
+                continue
+            descriptions.append(item)
+            for category, techs in item['techs'].items():
+                tech_stats[category].update(techs)
+    finally:
+        store.close()
+
+    print(f"✓ 职位数据库中共 {len(descriptions)} 个有效职位描述")
+    return descriptions, tech_stats
+
+
 def generate_analysis_report(tech_stats, total_jobs):
     """生成分析报告"""
     report = {
@@ -476,8 +552,16 @@ def main():
     print("职位技术栈分析工具")
     print("="*70)
 
-    # 1. 加载职位描述
-    descriptions = load_job_descriptions(INPUT_FILE)
+    if JOB_STORE_FILE:
+        # 1-2. 从职位数据库增量提取技术栈
+        with metrics.timer('stage_seconds', stage='load_extract'):
+            descriptions, tech_stats = analyze_store(JOB_STORE_FILE)
+    else:
+        # 1. 加载职位描述
+        with metrics.timer('stage_seconds', stage='load'):
+            descriptions = load_job_descriptions(INPUT_FILE)
+        tech_stats = None
+    metrics.inc('descriptions_total', len(descriptions))
 
     if not descriptions:
         print("\n⚠ 没有找到有效的职位描述数据")
@@ -485,13 +569,18 @@ def main():
         return
 
     # 2. 提取技术栈
-    tech_stats = extract_tech_stack(descriptions)
+    if tech_stats is None:
+        with metrics.timer('stage_seconds', stage='extract'):
+            tech_stats = extract_tech_stack(descriptions)
 
     # 3. 使用大模型深度分析（可选）
-    llm_analysis = call_llm_analysis(descriptions, tech_stats)
+    with metrics.timer('stage_seconds', stage='llm'):
+        llm_analysis = call_llm_analysis(descriptions, tech_stats)
+    metrics.inc('llm_calls_total', result='ok' if llm_analysis else 'skipped_or_failed')
 
     # 4. 生成分析报告
-    report = generate_analysis_report(tech_stats, len(descriptions))
+    with metrics.timer('stage_seconds', stage='report'):
+        report = generate_analysis_report(tech_stats, len(descriptions))
 
     # 5. 合并大模型分析结果
     if llm_analysis:
@@ -506,8 +595,51 @@ def main():
     # 7. 打印摘要
     print_summary(report)
 
+    if METRICS_REPORT_FILE or PROMETHEUS_TEXTFILE:
+        elapsed = metrics.registry.elapsed()
+        metrics.write_report(
+            METRICS_REPORT_FILE, PROMETHEUS_TEXTFILE,
+            derived={'jobs_per_second': round(len(descriptions) / elapsed, 1) if elapsed else 0},
+            config={'input': JOB_STORE_FILE or INPUT_FILE, 'use_llm': USE_LLM,
+                    'llm_provider': LLM_PROVIDER},
+        )
+        print(f"\n✓ 运行报告: {METRICS_REPORT_FILE or PROMETHEUS_TEXTFILE}")
+
     print("\n✓ 分析完成！")
 
 
+def parse_args(argv=None):
+    """命令行参数覆盖上面的配置（不修改源文件）"""
+    import argparse
+    global INPUT_FILE, OUTPUT_FILE, MARKDOWN_FILE, USE_LLM, LLM_PROVIDER, JOB_STORE_FILE
+    global METRICS_REPORT_FILE, PROMETHEUS_TEXTFILE
+
+    parser = argparse.ArgumentParser(description='职位技术栈分析')
+    parser.add_argument('--input', default=INPUT_FILE, help='输入文件（中文字段，CSV / Parquet / JSON Lines）')
+    parser.add_argument('--store', default=JOB_STORE_FILE,
+                        help='职位数据库，指定时代替 --input，只分析新增或变化的职位')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='JSON 报告文件')
+    parser.add_argument('--markdown', default=MARKDOWN_FILE, help='Markdown 报告文件')
+    parser.add_argument('--no-llm', action='store_true', help='不使用大模型分析')
+    parser.add_argument('--llm-provider', default=LLM_PROVIDER, choices=sorted(API_KEYS))
+    parser.add_argument('--metrics-report', default=METRICS_REPORT_FILE,
+                        help='运行报告（JSON），空字符串表示不写')
+    parser.add_argument('--prometheus-textfile', default=PROMETHEUS_TEXTFILE,
+                        help='同时写出的 Prometheus 文本文件')
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    METRICS_REPORT_FILE = args.metrics_report
+    PROMETHEUS_TEXTFILE = args.prometheus_textfile
+
+    INPUT_FILE = args.input
+    OUTPUT_FILE = args.output
+    MARKDOWN_FILE = args.markdown
+    USE_LLM = USE_LLM and not args.no_llm
+    LLM_PROVIDER = args.llm_provider
+    JOB_STORE_FILE = args.store
+    return args
+
+
 if __name__ == '__main__':
-    main()
+    profiling.run(main, parse_args())
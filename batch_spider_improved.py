@@ -5,11 +5,14 @@ BOSS直聘批量数据采集脚本（改进版）
 改进点：
 1. 边采集边保存，Ctrl+C不会丢失数据
 2. 使用API获取详情，避免跳转页面
-3. 增加更长的延迟时间
+3. 自适应请求间隔：根据响应延迟和错误自动放大或缩小
 4. 实时保存进度，支持断点续传
+5. 滚动收集与获取详情流水线并行，共用同一个请求速率预算
+6. 整个运行只启动一次浏览器、只登录一次，各组合在新标签页中采集
+
+本模块也是 collector.py（命令行/配置文件入口）和 boss_spider.py 共用的采集实现
 """
 
-from DrissionPage import ChromiumPage
 from DrissionPage.common import Settings
 import csv
 import time
@@ -20,6 +23,23 @@ from datetime import datetime
 from collections import defaultdict
 import signal
 import sys
+import json
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlencode
+from replay import record_packet, detail_job_id, JOBLIST_TARGET, DETAIL_TARGET
+from packet_feed import open_feed
+from browser_session import BrowserSession, SessionBlocked
+from throttle import RateBudget, PacingController
+from detail_cache import DetailCache
+from job_store import JobStore
+from job_record import JobRecord, as_record
+from salary import parse_salary
+from raw_archive import RawArchive
+from job_sink import JournalSink
+import metrics
+import profiling
 
 # 设置允许多对象共用标签页
 Settings.set_singleton_tab_obj(False)
@@ -35,28 +55,193 @@ SEARCH_CONFIGS = {
 
 MAX_SCROLLS = 5
 
+# 列表获取方式：
+# 'fetch'：在已登录的标签页内逐页请求列表接口，直到 hasMore 为 false
+# 'scroll'：模拟滚动页面，由页面自己触发列表接口（最多 MAX_SCROLLS 次）
+LIST_MODE = 'fetch'
+LIST_PAGE_SIZE = 30  # 每页职位数
+MAX_PAGES = 50  # 逐页请求时的页数上限（防止 hasMore 异常时无限翻页）
+LIST_FETCH_RETRIES = 3  # 单页请求失败时的重试次数
+
 # 输出文件
 OUTPUT_FILE = 'boss_jobs_progress.csv'
 PROGRESS_FILE = 'progress_state.txt'
 
-# 反检测配置
-MIN_DELAY = 5
-MAX_DELAY = 10
-DETAIL_PAGE_DELAY = 8  # 详情页延迟更长（秒）
+# 输出日志（见 job_sink.py）：新记录先追加到 OUTPUT_FILE.journal，
+# 满 SINK_FLUSH_EVERY 条或 SINK_FLUSH_INTERVAL 秒刷盘，检查点时生成 CSV
+SINK_FLUSH_EVERY = 50
+SINK_FLUSH_INTERVAL = 5
+CHECKPOINT_INTERVAL = 300  # 自动生成 CSV 的间隔（秒）
+
+FIELDNAMES = [
+    'keyword_group', 'search_keyword', 'city', 'job_title',
+    'company_name_raw', 'company_name_std', 'company_type',
+    'salary_text_raw', 'salary_months', 'salary_min_year_rmb',
+    'salary_max_year_rmb', 'salary_avg_year_rmb',
+    'exp_req', 'edu_req', 'jd_text', 'post_date', 'source_url',
+    'collected_at', 'notes'
+]
+
+# 生成 CSV 时同时导出的文件（见 output_formats.py），如
+# ['boss_jobs_progress.parquet', 'boss_jobs_progress.jsonl.gz']，Parquet 需要安装 pandas 和 pyarrow
+EXPORT_FILES = []
+
+# 输出格式：
+# 'full'：FIELDNAMES 中的完整字段（clean_data.py 的输入）
+# 'simple'：中文字段（原 boss_spider.py 的格式，analyze_tech_stack.py 的输入）
+OUTPUT_FORMAT = 'full'
+
+# 'simple' 格式的列名 -> 职位记录字段
+SIMPLE_FIELDS = {
+    '职位': 'job_title',
+    '城市': 'city',
+    '区域': '_raw_district',
+    '商圈': '_raw_business',
+    '公司': 'company_name_raw',
+    '薪资': 'salary_text_raw',
+    '经验': 'exp_req',
+    '学历': 'edu_req',
+    '领域': '_raw_industry',
+    '性质': '_raw_nature',
+    '规模': '_raw_scale',
+    '技能标签': '_raw_skills',
+    '福利标签': '_raw_welfare',
+    '职位描述': 'jd_text',
+}
+
+# 反检测配置：自适应请求间隔（见 throttle.py 的 PacingController），
+# 出错、空响应、超时时放大间隔，响应正常时逐步缩小到下限
+PACING_FLOOR = 3  # 列表翻页间隔下限（秒）
+PACING_INITIAL = 7.5  # 列表翻页初始间隔（秒）
+PACING_CEILING = 60  # 间隔上限（秒）
+DETAIL_PACING_FLOOR = 2  # 详情请求间隔下限（秒）
+DETAIL_PACING_INITIAL = 8  # 详情请求初始间隔（秒）
+PACING_LATENCY_TARGET = 3.0  # 响应超过该秒数视为服务端变慢
+PACING_METRICS_FILE = 'pacing_metrics.json'  # 运行结束时写入节奏状态，设为空字符串则不写
+
+# 批量获取详情（一次 run_js 请求一组详情接口）
+DETAIL_BATCH_SIZE = 10  # 每批职位数，设为 1 则逐个获取
+DETAIL_CONCURRENCY = 3  # 同时在途的详情请求数
+DETAIL_RATE = 0.5  # 详情请求速率上限（次/秒）
+
+# 流水线模式：滚动收集的同时由后台线程获取详情
+PIPELINE_DETAILS = True
+DETAIL_QUEUE_SIZE = 50  # 待获取详情的队列上限，队列满时滚动暂停
+
+# 列表和详情共用的全局请求速率上限（次/秒），并行时由所有标签页共享
+REQUEST_RATE = 0.5
+REQUEST_BURST = 1  # 允许的突发请求数
+
+# 并行采集的标签页数（同一浏览器中同时采集的组合数），1 表示逐个采集
+PARALLEL_TABS = 1
+
+# 职位详情本地缓存（见 detail_cache.py），设为空字符串则不使用缓存
+DETAIL_CACHE_FILE = 'job_detail_cache.db'
+DETAIL_CACHE_TTL_DAYS = 7  # 缓存有效期（天）
+DETAIL_CACHE_MAX_ENTRIES = 100000  # 最多缓存的职位数
+
+# 职位数据库（见 job_store.py），以 encryptJobId 为主键保存全部职位，
+# clean_data.py / analyze_tech_stack.py 使用 --store 读取，设为空字符串则不写入
+JOB_STORE_FILE = 'boss_jobs.db'
+
+# 原始响应归档（见 raw_archive.py），保存列表和详情接口的全部原始响应，
+# 需要新字段时用 reprocess.py 从归档重新生成输出，设为空字符串则不保存
+RAW_ARCHIVE_DIR = 'raw_archive'
+RAW_ARCHIVE_CODEC = 'gzip'  # 'gzip' 或 'zstd'（需要安装 zstandard）
+
+# 录制/回放（见 replay.py）
+RECORD_FILE = ''  # 非空时把监听到的接口数据写入该归档文件
+REPLAY_FILE = ''  # 非空时不启动浏览器，直接回放该归档文件
+
+# 浏览器实例（同时运行多个采集实例时，每个实例使用不同的端口和用户数据目录）
+BROWSER_PORT = 0  # 调试端口，0 表示 DrissionPage 默认端口
+BROWSER_PROFILE = ''  # 用户数据目录，空字符串表示默认目录
+
+CONFIRM_START = True  # 开始采集前等待按 Enter 确认
+
+# 运行报告（见 metrics.py）：吞吐量、详情命中率、接口延迟、等待与工作时间、保存耗时等
+METRICS_REPORT_FILE = 'run_report.json'  # 设为空字符串则不写
+PROMETHEUS_TEXTFILE = ''  # 非空时同时写出 Prometheus 文本文件（node_exporter textfile collector）
+
+# 性能分析（见 profiling.py），直接运行本脚本时使用；collector.py 使用 --cprofile / --flamegraph
+PROFILE_FILE = ''  # 非空时启用 cProfile 并写入该文件
+FLAMEGRAPH_FILE = ''  # 非空时采样所有线程的调用栈，写出 folded 格式的火焰图数据
 
 # ==================== 全局变量（用于断点续传）====================
 
 all_jobs_data = []
 processed_count = 0
 
+# 列表翻页和详情请求共用同一个速率预算
+request_budget = RateBudget(REQUEST_RATE, REQUEST_BURST)
+
+# 列表翻页和详情请求各自的自适应间隔
+list_pacing = PacingController(PACING_FLOOR, PACING_CEILING, PACING_INITIAL,
+                               latency_target=PACING_LATENCY_TARGET)
+detail_pacing = PacingController(DETAIL_PACING_FLOOR, PACING_CEILING, DETAIL_PACING_INITIAL,
+                                 latency_target=PACING_LATENCY_TARGET)
+
+# 流水线/并行模式下多个线程都会保存数据
+_save_lock = threading.RLock()
+
+# 账号被封禁时通知其他标签页停止
+_stop_event = threading.Event()
+
+# 职位详情缓存，首次使用时打开
+_detail_cache = None
+
+# 输出日志，首次保存时打开
+_sink = None
+
+# 职位数据库，首次保存时打开
+_job_store = None
+
+# 原始响应归档，首次使用时打开
+_raw_archive = None
+
+# 去重索引（公司+职位+城市）和待保存的职位，整个运行期间保留
+_seen_keys = set()
+_dirty_jobs = {}
+
+# 断点续传状态（保存在 PROGRESS_FILE）：
+# done: 已完成的 关键词|城市；scrolls: 各组合已滚动到第几页；
+# pending: 已收集但还没有获取详情的职位（按去重键）
+_progress = {'done': [], 'scrolls': {}, 'pending': {}}
+_last_progress_save = 0.0
+PROGRESS_SAVE_INTERVAL = 10  # 进度文件最短保存间隔（秒）
+
+def configure(**settings):
+    """
+    覆盖模块配置（供 collector.py 使用，不修改源文件）
+
+    参数名为本模块的配置常量名，如 configure(OUTPUT_FILE='a.csv', MAX_PAGES=10)
+    """
+    global request_budget, list_pacing, detail_pacing
+    g = globals()
+    for name, value in settings.items():
+        if not name.isupper() or name not in g:
+            raise ValueError(f"未知配置项: {name}")
+        g[name] = value
+
+    # 速率和间隔配置在导入时已用于创建控制器，重新创建
+    request_budget = RateBudget(REQUEST_RATE, REQUEST_BURST)
+    list_pacing = PacingController(PACING_FLOOR, PACING_CEILING, PACING_INITIAL,
+                                   latency_target=PACING_LATENCY_TARGET)
+    detail_pacing = PacingController(DETAIL_PACING_FLOOR, PACING_CEILING, DETAIL_PACING_INITIAL,
+                                     latency_target=PACING_LATENCY_TARGET)
+
 def signal_handler(sig, frame):
-    """处理Ctrl+C，保存已采集的数据"""
+    """处理Ctrl+C，保存已采集的数据和断点"""
     print(f"\n\n检测到用户中断...")
     print(f"正在保存已采集的 {len(all_jobs_data)} 条数据...")
 
-    save_data_immediately(all_jobs_data)
+    save_data_immediately()
+    # 生成 CSV 但保留输出日志，下次运行从断点继续
+    get_sink().checkpoint()
+    save_progress()
     print(f"✓ 数据已保存到: {OUTPUT_FILE}")
     print(f"✓ 共保存 {len(all_jobs_data)} 条职位数据")
+    print(f"✓ 断点已保存到: {PROGRESS_FILE}，重新运行即可继续")
 
     sys.exit(0)
 
@@ -65,10 +250,35 @@ signal.signal(signal.SIGINT, signal_handler)
 
 # ==================== 工具函数 ====================
 
-def random_delay():
-    """随机延迟"""
-    delay = random.uniform(MIN_DELAY, MAX_DELAY)
-    time.sleep(delay)
+def pace_delay(dp, pacer=None):
+    """按自适应间隔等待（默认使用列表翻页的间隔）"""
+    started = time.perf_counter()
+    delay = (pacer or list_pacing).wait(dp.wait)
+    metrics.observe('sleep_seconds', time.perf_counter() - started, reason='pacing')
+    return delay
+
+def acquire_budget(dp, n=1):
+    """从全局速率预算中预约 n 次请求并等待，实际等待时间计入运行指标"""
+    started = time.perf_counter()
+    delay = request_budget.acquire(n, dp.wait)
+    metrics.observe('sleep_seconds', time.perf_counter() - started, reason='rate_budget')
+    return delay
+
+def pacing_metrics():
+    """列表和详情请求间隔控制器的当前状态"""
+    return {'list': list_pacing.metrics(), 'detail': detail_pacing.metrics()}
+
+def save_pacing_metrics():
+    """打印并保存请求间隔状态，用于根据实际数据调整下限"""
+    metrics = pacing_metrics()
+    for name, m in metrics.items():
+        latency = f"{m['latency_avg']}s" if m['latency_avg'] is not None else '-'
+        print(f"  {name}: 当前间隔 {m['delay']}s（下限 {m['floor']}s），请求 {m['requests']} 次，"
+              f"出错 {m['error']} / 空 {m['empty']} / 超时 {m['timeout']}，"
+              f"平均延迟 {latency}，停在下限 {m['at_floor_pct']}%")
+    if PACING_METRICS_FILE:
+        with open(PACING_METRICS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
 
 def normalize_company_name(company_name):
     """公司名称归一化"""
@@ -126,118 +336,328 @@ def classify_company_type(company_name_raw, nature, scale):
 
     return '其他/不确定'
 
-def parse_salary(salary_text):
-    """解析薪资"""
-    if not salary_text or salary_text == '面议':
-        return (None, None, None, None, '面议')
-
-    notes = ''
-    salary_months_match = re.search(r'(\d+)薪', salary_text)
-    if salary_months_match:
-        salary_months = int(salary_months_match.group(1))
-    else:
-        salary_months = 12
-        notes = '默认12薪'
-
-    salary_pattern = r'(\d+\.?\d*)[kK万]-?(\d+\.?\d*)[kK万]?'
-    salary_match = re.search(salary_pattern, salary_text)
-
-    if not salary_match:
-        return (salary_months, None, None, None, f'无法解析: {salary_text}')
-
-    min_salary = float(salary_match.group(1))
-    max_salary = float(salary_match.group(2))
-
-    if '万' in salary_text[:salary_match.end()]:
-        min_salary *= 10
-        max_salary *= 10
-
-    min_year = int(min_salary * 1000 * salary_months)
-    max_year = int(max_salary * 1000 * salary_months)
-    avg_year = (min_year + max_year) // 2
-
-    return (salary_months, min_year, max_year, avg_year, notes)
+def output_row(job):
+    """按 OUTPUT_FORMAT 生成输出行"""
+    if OUTPUT_FORMAT == 'simple':
+        return {column: job.get(field, '') for column, field in SIMPLE_FIELDS.items()}
+    return job
+
+def get_sink():
+    """获取输出日志（崩溃后重新运行会接着上次的日志继续写）"""
+    global _sink
+    if _sink is None:
+        if OUTPUT_FORMAT == 'simple':
+            fieldnames, encoding = list(SIMPLE_FIELDS), 'utf-8'
+        else:
+            fieldnames, encoding = FIELDNAMES, 'utf-8-sig'
+        _sink = JournalSink(
+            OUTPUT_FILE, fieldnames, encoding=encoding,
+            flush_every=SINK_FLUSH_EVERY,
+            flush_interval=SINK_FLUSH_INTERVAL,
+            checkpoint_interval=CHECKPOINT_INTERVAL,
+            exports=EXPORT_FILES,
+        )
+    return _sink
+
+# 职位数据库中除 FIELDNAMES 外额外保存的列表接口字段
+STORE_EXTRA_FIELDS = {
+    'district': '_raw_district',
+    'business_district': '_raw_business',
+    'industry': '_raw_industry',
+    'company_stage': '_raw_nature',
+    'company_scale': '_raw_scale',
+    'skills': '_raw_skills',
+    'welfare': '_raw_welfare',
+}
 
-def save_data_immediately(jobs_data):
-    """立即保存数据（边采集边保存）"""
-    if not jobs_data:
+def store_record(job):
+    """职位数据库中保存的记录"""
+    record = {k: job.get(k, '') for k in FIELDNAMES}
+    for name, field in STORE_EXTRA_FIELDS.items():
+        record[name] = job.get(field, '')
+    return record
+
+def get_job_store():
+    """获取职位数据库（未配置时返回 None）"""
+    global _job_store
+    if _job_store is None and JOB_STORE_FILE:
+        _job_store = JobStore(JOB_STORE_FILE)
+    return _job_store
+
+def get_raw_archive():
+    """获取原始响应归档（未配置时返回 None）"""
+    global _raw_archive
+    with _save_lock:
+        if _raw_archive is None and RAW_ARCHIVE_DIR:
+            _raw_archive = RawArchive(RAW_ARCHIVE_DIR, RAW_ARCHIVE_CODEC)
+    return _raw_archive
+
+@profiling.section('archive_response')
+def archive_response(kind, url, body, **context):
+    """把原始响应写入归档，归档出错时只打印警告，不影响采集"""
+    archive = get_raw_archive()
+    if archive is None:
         return
+    try:
+        archive.add(kind, url, body, **context)
+    except Exception as e:
+        print(f"    ⚠ 保存原始响应失败: {e}")
+
+def close_sink():
+    """生成最终 CSV 并关闭输出日志"""
+    global _sink
+    with _save_lock:
+        if _sink is not None:
+            _sink.close()
+            _sink = None
+
+def enrich_job(job):
+    """补充公司归一化、公司性质和年薪字段（每条记录只在登记时计算一次）"""
+    company_std = normalize_company_name(job['company_name_raw'])
+    job['company_name_std'] = company_std
+    job['company_type'] = classify_company_type(
+        job['company_name_raw'],
+        job.get('_raw_nature', ''),
+        job.get('_raw_scale', '')
+    )
+
+    salary_months, min_year, max_year, avg_year, notes = parse_salary(job['salary_text_raw'])
+    job['salary_months'] = salary_months
+    job['salary_min_year_rmb'] = min_year
+    job['salary_max_year_rmb'] = max_year
+    job['salary_avg_year_rmb'] = avg_year
+    job['_salary_notes'] = notes
+
+    job['keyword_group'] = job['keyword']
+    job['_dedup_key'] = f"{company_std}_{job['job_title']}_{job['city']}"
+    return job
+
+def job_notes(job):
+    """生成备注（依赖职位描述，保存时计算）"""
+    notes = []
+    if job.get('_salary_notes'):
+        notes.append(job['_salary_notes'])
+    if not job.get('jd_text'):
+        notes.append('无职位描述')
+    if job['company_type'] == '其他/不确定':
+        notes.append('公司性质不确定')
+    return '; '.join(notes) if notes else ''
+
+# ==================== 断点续传 ====================
+
+def pair_key(keyword, city_name):
+    """关键词 × 城市 组合的键"""
+    return f"{keyword}|{city_name}"
+
+def load_progress():
+    """读取断点文件，返回是否存在未完成的进度"""
+    global _progress
+    if not os.path.exists(PROGRESS_FILE):
+        return False
+    try:
+        with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except ValueError:
+        print(f"⚠ 断点文件损坏，忽略: {PROGRESS_FILE}")
+        return False
+    _progress = {
+        'done': state.get('done', []),
+        'scrolls': state.get('scrolls', {}),
+        'pending': {k: as_record(v) for k, v in state.get('pending', {}).items()},
+    }
+    return True
 
-    # 处理数据
-    seen = set()
-    unique_jobs = []
+def save_progress(force=True):
+    """
+    保存断点（临时文件 + 原子替换）
 
-    for job in jobs_data:
-        company_std = normalize_company_name(job['company_name_raw'])
-        dedup_key = f"{company_std}_{job['job_title']}_{job['city']}"
+    先把输出日志落盘，保证断点中记录为已完成的详情一定已经写入日志
+    """
+    global _last_progress_save
+    with _save_lock:
+        now = time.monotonic()
+        if not force and now - _last_progress_save < PROGRESS_SAVE_INTERVAL:
+            return
+        if _sink is not None:
+            _sink.flush()
+        temp_file = PROGRESS_FILE + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(_progress, f, ensure_ascii=False, default=JobRecord.to_dict)
+        os.replace(temp_file, PROGRESS_FILE)
+        _last_progress_save = now
+
+def update_scroll_progress(keyword, city_name, scroll_count):
+    """记录组合已滚动到的页数"""
+    with _save_lock:
+        key = pair_key(keyword, city_name)
+        _progress['scrolls'][key] = max(scroll_count, _progress['scrolls'].get(key, 0))
+
+def mark_pair_done(keyword, city_name):
+    """记录组合已完成"""
+    with _save_lock:
+        key = pair_key(keyword, city_name)
+        if key not in _progress['done']:
+            _progress['done'].append(key)
+        save_progress()
+
+def take_pending_jobs():
+    """取出上次中断时尚未获取详情的职位"""
+    with _save_lock:
+        jobs = list(_progress['pending'].values())
+        for job in jobs:
+            _seen_keys.add(job['_dedup_key'])
+            all_jobs_data.append(job)
+        return jobs
+
+@profiling.section('add_jobs')
+def add_jobs(jobs):
+    """
+    登记新采集的职位：补充字段、按 公司+职位+城市 去重后加入 all_jobs_data
 
-        if dedup_key not in seen:
-            seen.add(dedup_key)
+    去重索引在整个运行期间保留，重复的职位不再获取详情
 
-            job['company_name_std'] = company_std
-            job['company_type'] = classify_company_type(
-                job['company_name_raw'],
-                job.get('_raw_nature', ''),
-                job.get('_raw_scale', '')
+    Returns:
+        本次实际新增的职位列表
+    """
+    added = []
+    with _save_lock:
+        for job in jobs:
+            job = enrich_job(as_record(job))
+            if job['_dedup_key'] in _seen_keys:
+                continue
+            _seen_keys.add(job['_dedup_key'])
+            all_jobs_data.append(job)
+            _dirty_jobs[job['_dedup_key']] = job
+            _progress['pending'][job['_dedup_key']] = job
+            added.append(job)
+    metrics.inc('jobs_collected_total', len(added))
+    metrics.inc('jobs_duplicate_total', len(jobs) - len(added))
+    return added
+
+def set_job_detail(job, jd_text):
+    """写入职位描述，下次保存时写出，并从待获取详情的断点队列中移除"""
+    with _save_lock:
+        job['jd_text'] = jd_text if jd_text else ''
+        metrics.inc('jobs_detail_total', result='with_jd' if jd_text else 'without_jd')
+        if '_dedup_key' in job:
+            _dirty_jobs[job['_dedup_key']] = job
+            _progress['pending'].pop(job['_dedup_key'], None)
+
+@profiling.section('save_data_immediately')
+def save_data_immediately():
+    """立即保存数据（边采集边保存），只写出上次保存后新增或更新的职位"""
+    with _save_lock:
+        if not _dirty_jobs:
+            return
+
+        started = time.perf_counter()
+        sink = get_sink()
+        for dedup_key, job in _dirty_jobs.items():
+            job['notes'] = job_notes(job)
+            sink.write(output_row(job), key=dedup_key)
+
+        # 同一批记录在一个事务中写入职位数据库（等详情获取完再写入，
+        # 避免同一职位每次采集都先后产生两个版本）
+        store = get_job_store()
+        if store is not None:
+            store.upsert_many(
+                (job.get('_job_id') or dedup_key, store_record(job))
+                for dedup_key, job in _dirty_jobs.items()
+                if dedup_key not in _progress['pending']
             )
 
-            salary_months, min_year, max_year, avg_year, notes = parse_salary(job['salary_text_raw'])
-            job['salary_months'] = salary_months
-            job['salary_min_year_rmb'] = min_year
-            job['salary_max_year_rmb'] = max_year
-            job['salary_avg_year_rmb'] = avg_year
-
-            job_notes = []
-            if notes:
-                job_notes.append(notes)
-            if not job.get('jd_text'):
-                job_notes.append('无职位描述')
-            if job['company_type'] == '其他/不确定':
-                job_notes.append('公司性质不确定')
-
-            job['notes'] = '; '.join(job_notes) if job_notes else ''
-            job['keyword_group'] = job['keyword']
-
-            unique_jobs.append(job)
-
-    # 保存到CSV
-    fieldnames = [
-        'keyword_group', 'search_keyword', 'city', 'job_title',
-        'company_name_raw', 'company_name_std', 'company_type',
-        'salary_text_raw', 'salary_months', 'salary_min_year_rmb',
-        'salary_max_year_rmb', 'salary_avg_year_rmb',
-        'exp_req', 'edu_req', 'jd_text', 'post_date', 'source_url',
-        'collected_at', 'notes'
-    ]
-
-    # 写入临时文件
-    temp_file = OUTPUT_FILE + '.tmp'
-    with open(temp_file, 'w', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for job in unique_jobs:
-            writer.writerow({k: job.get(k, '') for k in fieldnames})
-
-    # 重命名为正式文件
-    if os.path.exists(temp_file):
-        if os.path.exists(OUTPUT_FILE):
-            os.remove(OUTPUT_FILE)
-        os.rename(temp_file, OUTPUT_FILE)
+        # 详情已获取的职位已经写入输出日志和数据库，释放内存中的职位描述等大字段
+        for dedup_key, job in _dirty_jobs.items():
+            if dedup_key not in _progress['pending'] and isinstance(job, JobRecord):
+                job.release_payload()
+        metrics.inc('jobs_saved_total', len(_dirty_jobs))
+        _dirty_jobs.clear()
+
+        save_progress(force=False)
+        metrics.observe('save_seconds', time.perf_counter() - started)
 
 # ==================== 使用API获取详情（不跳转页面）====================
 
 import json
 
-def get_job_detail_api(dp, job_id, security_id, lid):
+def joblist_api_url(keyword, city_code, page):
+    """列表接口地址"""
+    return (
+        "https://www.zhipin.com/wapi/zpgeek/search/joblist.json?"
+        + urlencode({'scene': 1, 'query': keyword, 'city': city_code,
+                     'page': page, 'pageSize': LIST_PAGE_SIZE})
+    )
+
+def detail_api_url(job_id, security_id, lid):
+    """详情接口地址"""
+    return (
+        "https://www.zhipin.com/wapi/zpgeek/job/detail/info.json"
+        f"?jobId={job_id}&securityId={security_id}&lid={lid}"
+    )
+
+def get_detail_cache():
+    """获取详情缓存（未配置或回放模式下返回 None）"""
+    global _detail_cache
+    if _detail_cache is None and DETAIL_CACHE_FILE and not REPLAY_FILE:
+        _detail_cache = DetailCache(
+            DETAIL_CACHE_FILE,
+            ttl_days=DETAIL_CACHE_TTL_DAYS,
+            max_entries=DETAIL_CACHE_MAX_ENTRIES,
+        )
+    return _detail_cache
+
+def parse_detail_job_info(body):
+    """从详情接口响应中取出 jobInfo，响应异常时返回 None"""
+    # 关键：把 body 统一解析为 dict
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode('utf-8', errors='ignore')
+    if isinstance(body, str):
+        body = json.loads(body)
+
+    if isinstance(body, dict) and body.get('code') == 0 and 'zpData' in body:
+        job_detail = body['zpData']
+        return (job_detail or {}).get('jobInfo', {}) or {}
+
+    return None
+
+def job_info_text(job_info):
+    """从 jobInfo 中提取职位描述"""
+    jd_text = (
+        job_info.get('jobDescription', '') or
+        job_info.get('positionRemark', '') or
+        (job_info.get('responsibility', '') + job_info.get('requirement', ''))
+    )
+    return jd_text.strip()
+
+def parse_detail_body(body):
+    """从详情接口响应中提取职位描述"""
+    job_info = parse_detail_job_info(body)
+    return job_info_text(job_info) if job_info is not None else ''
+
+def observe_detail(outcome, latency=None):
+    """把详情请求的结果反馈给节奏控制器并计入运行指标"""
+    detail_pacing.observe(outcome, latency)
+    metrics.inc('detail_responses_total', outcome=outcome)
+    metrics.observe('detail_latency_seconds', latency)
+
+@profiling.section('get_job_detail_api')
+def get_job_detail_api(dp, job_id, security_id, lid, last_update=''):
+    # 先查本地缓存，未过期且职位未更新时不请求网络
+    cache = get_detail_cache()
+    if cache:
+        job_info = cache.get(job_id, last_update)
+        metrics.inc('detail_cache_total', result='miss' if job_info is None else 'hit')
+        if job_info is not None:
+            return job_info_text(job_info)
+
     try:
-        dp.listen.start('zpgeek/job/detail/info.json')
+        feed = open_feed(dp, [DETAIL_TARGET])
 
-        detail_url = (
-            "https://www.zhipin.com/wapi/zpgeek/job/detail/info.json"
-            f"?jobId={job_id}&securityId={security_id}&lid={lid}"
-        )
+        detail_url = detail_api_url(job_id, security_id, lid)
 
+        acquire_budget(dp)
+        metrics.inc('detail_requests_total')
+        sent_at = time.monotonic()
         dp.run_js(f'''
         fetch("{detail_url}", {{
             method: "GET",
@@ -249,34 +669,153 @@ def get_job_detail_api(dp, job_id, security_id, lid):
         }});
         ''')
 
-        r = dp.listen.wait(timeout=10)
+        # 跳过队列中其他职位的详情数据包
+        r = feed.get('detail', timeout=10)
+        while r and detail_job_id(r.url) not in ('', job_id):
+            r = feed.get('detail', timeout=max(0.0, 10 - (time.monotonic() - sent_at)))
+        latency = time.monotonic() - sent_at
+        metrics.observe('packet_wait_seconds', latency, kind='detail')
         if not r or not r.response:
+            observe_detail('timeout')
             return ''
 
-        body = r.response.body
+        if not r.response.body:
+            observe_detail('empty', latency)
+            return ''
+        archive_response('detail', r.url, r.response.body, job_id=job_id)
+        job_info = parse_detail_job_info(r.response.body)
+        if job_info is None:
+            observe_detail('error', latency)
+            return ''
+        observe_detail('ok', latency)
 
-        # 关键：把 body 统一解析为 dict
-        if isinstance(body, (bytes, bytearray)):
-            body = body.decode('utf-8', errors='ignore')
-        if isinstance(body, str):
-            body = json.loads(body)
+        if cache:
+            cache.put(job_id, job_info, last_update)
+        return job_info_text(job_info)
 
-        if isinstance(body, dict) and body.get('code') == 0 and 'zpData' in body:
-            job_detail = body['zpData']
-            job_info = (job_detail or {}).get('jobInfo', {}) or {}
+    except Exception as e:
+        print(f"    ⚠ API获取详情失败: {e}")
+        return ''
 
-            jd_text = (
-                job_info.get('jobDescription', '') or
-                job_info.get('positionRemark', '') or
-                (job_info.get('responsibility', '') + job_info.get('requirement', ''))
-            )
-            return jd_text.strip()
 
-        return ''
+# 在页面内批量请求详情接口：
+# arguments[0] 为 URL 列表，arguments[1] 为同时在途的请求数上限，
+# arguments[2] 为相邻两次请求的最小间隔（毫秒），返回与 URL 一一对应的响应文本
+BATCH_DETAIL_JS = '''
+const urls = arguments[0];
+const limit = Math.max(1, arguments[1]);
+const interval = arguments[2];
+const results = new Array(urls.length).fill(null);
+let next = 0;
+let nextSlot = Date.now();
+
+async function worker() {
+    while (next < urls.length) {
+        const i = next++;
+        const now = Date.now();
+        const delay = Math.max(0, nextSlot - now);
+        nextSlot = Math.max(now, nextSlot) + interval;
+        if (delay > 0) {
+            await new Promise(resolve => setTimeout(resolve, delay));
+        }
+        try {
+            const resp = await fetch(urls[i], {
+                method: "GET",
+                credentials: "include",
+                headers: {
+                    "accept": "application/json",
+                    "x-requested-with": "XMLHttpRequest"
+                }
+            });
+            results[i] = await resp.text();
+        } catch (e) {
+            results[i] = null;
+        }
+    }
+}
+
+const workers = [];
+for (let k = 0; k < Math.min(limit, urls.length); k++) {
+    workers.push(worker());
+}
+return Promise.all(workers).then(() => JSON.stringify(results));
+'''
 
+@profiling.section('get_job_details_batch')
+def get_job_details_batch(dp, jobs):
+    """
+    批量获取职位详情：一次 run_js 在页面内并发请求一组详情接口
+
+    并发数由 DETAIL_CONCURRENCY 限制，批内请求间隔不小于 1/DETAIL_RATE 秒，
+    上一批出错较多时按 detail_pacing 放大间隔，
+    整批请求数计入全局速率预算，省去逐个职位的监听器启动和往返等待
+
+    Returns:
+        {job_id: jd_text}，获取失败的职位不在结果中
+    """
+    jobs = [j for j in jobs if j.get('_job_id') and j.get('_security_id')]
+    jd_texts = {}
+
+    # 先查本地缓存，只请求未命中的职位
+    cache = get_detail_cache()
+    if cache:
+        pending = []
+        for job in jobs:
+            job_info = cache.get(job['_job_id'], job.get('post_date', ''))
+            metrics.inc('detail_cache_total', result='miss' if job_info is None else 'hit')
+            if job_info is not None:
+                jd_texts[job['_job_id']] = job_info_text(job_info)
+            else:
+                pending.append(job)
+        jobs = pending
+
+    if not jobs:
+        return jd_texts
+
+    interval = max(1.0 / DETAIL_RATE, detail_pacing.delay)
+    urls = [detail_api_url(j['_job_id'], j['_security_id'], j.get('_lid', '')) for j in jobs]
+
+    # 从全局预算中预约本批请求
+    acquire_budget(dp, len(urls))
+
+    sent_at = time.monotonic()
+    try:
+        raw = dp.run_js(
+            BATCH_DETAIL_JS, urls, DETAIL_CONCURRENCY, interval * 1000,
+            timeout=len(urls) * interval + 30,
+        )
+        bodies = json.loads(raw) if isinstance(raw, str) else (raw or [])
     except Exception as e:
-        print(f"    ⚠ API获取详情失败: {e}")
-        return ''
+        print(f"    ⚠ 批量获取详情失败: {e}")
+        bodies = []
+    metrics.observe('detail_batch_seconds', time.monotonic() - sent_at)
+    metrics.inc('detail_requests_total', len(urls))
+
+    if not bodies:
+        observe_detail('timeout')
+
+    for job, url, body in zip(jobs, urls, bodies):
+        # null 为请求失败，空字符串为空响应
+        if not body:
+            observe_detail('timeout' if body is None else 'empty')
+            continue
+        record_packet(dp, url, body)
+        archive_response('detail', url, body, job_id=job['_job_id'])
+        try:
+            job_info = parse_detail_job_info(body)
+        except ValueError:
+            job_info = None
+        if job_info is None:
+            observe_detail('error')
+            continue
+        observe_detail('ok')
+        if cache:
+            cache.put(job['_job_id'], job_info, job.get('post_date', ''))
+        jd_text = job_info_text(job_info)
+        if jd_text:
+            jd_texts[job['_job_id']] = jd_text
+
+    return jd_texts
 
 
 def get_job_detail_click(dp, job_id, security_id, lid):
@@ -291,7 +830,8 @@ def get_job_detail_click(dp, job_id, security_id, lid):
         if job_card:
             # 点击职位
             dp.actions.click(job_card)
-            time.sleep(3)
+            dp.wait.eles_loaded(['css:.job-detail-container', 'css:.job-detail-box'],
+                                timeout=3, any_one=True)
 
             # 从右侧弹窗获取详情
             detail_panel = dp.ele('css:.job-detail-container') or dp.ele('css:.job-detail-box')
@@ -304,78 +844,321 @@ def get_job_detail_click(dp, job_id, security_id, lid):
         print(f"    ⚠ 点击获取详情失败: {e}")
         return ''
 
+def get_job_detail(dp, job, batch_texts=None, allow_click=True):
+    """获取单个职位的描述：批量结果（如有）→ API → 点击"""
+    job_id = job.get('_job_id', '')
+    security_id = job.get('_security_id', '')
+    lid = job.get('_lid', '')
+
+    # 先尝试API方式
+    if batch_texts is not None:
+        jd_text = batch_texts.get(job_id, '')
+    else:
+        jd_text = get_job_detail_api(dp, job_id, security_id, lid, job.get('post_date', ''))
+
+    # 如果API失败，尝试点击方式
+    if not jd_text and allow_click:
+        jd_text = get_job_detail_click(dp, job_id, security_id, lid)
+
+    return jd_text
+
+def detail_worker(tab, detail_queue, done_jobs):
+    """
+    流水线模式的详情消费者
+
+    在独立标签页中运行，从队列取出新职位获取详情，直到取到 None。
+    采集标签页正在滚动，因此不使用点击方式兜底。
+    """
+    batch_size = max(1, DETAIL_BATCH_SIZE)
+    finished = False
+
+    while not finished:
+        # 阻塞等待第一个职位，再尽量凑满一批
+        batch = [detail_queue.get()]
+        while len(batch) < batch_size and batch[-1] is not None:
+            try:
+                batch.append(detail_queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch[-1] is None:
+            finished = True
+            batch.pop()
+        if not batch:
+            continue
+
+        batch_texts = get_job_details_batch(tab, batch) if batch_size > 1 else None
+
+        for job in batch:
+            try:
+                jd_text = get_job_detail(tab, job, batch_texts, allow_click=False)
+            except Exception as e:
+                print(f"  ✗ 获取详情出错: {e}")
+                jd_text = ''
+
+            set_job_detail(job, jd_text)
+            done_jobs.append(job)
+
+            status = '✓ 有描述' if jd_text else '✗ 无描述'
+            print(f"  [详情 {len(done_jobs)}] {job['job_title'][:25]} | {status}")
+
+            # 每获取5个详情就保存一次
+            if len(done_jobs) % 5 == 0:
+                save_data_immediately()
+
+            if batch_size == 1:
+                pace_delay(tab, detail_pacing)
+
 # ==================== 主采集函数 ====================
 
-def collect_jobs_improved(keyword, city_name, city_code):
-    """改进的采集函数"""
-    global all_jobs_data
+def resume_pending_details(session):
+    """获取上次中断时已收集但尚未获取详情的职位"""
+    jobs = take_pending_jobs()
+    if not jobs:
+        return
 
     print(f"\n{'='*70}")
-    print(f"正在采集: {city_name} - {keyword}")
+    print(f"继续获取上次未完成的职位详情（共 {len(jobs)} 个）")
     print(f"{'='*70}")
 
-    dp = ChromiumPage()
+    dp = session.new_tab('https://www.zhipin.com/')
+
+    batch_size = max(1, DETAIL_BATCH_SIZE)
+    for start in range(0, len(jobs), batch_size):
+        batch = jobs[start:start + batch_size]
+        batch_texts = get_job_details_batch(dp, batch) if batch_size > 1 else None
+        for idx, job in enumerate(batch, start):
+            jd_text = get_job_detail(dp, job, batch_texts, allow_click=False)
+            set_job_detail(job, jd_text)
+            status = '✓ 有描述' if jd_text else '✗ 无描述'
+            print(f"  [{idx+1}/{len(jobs)}] {job['job_title'][:25]} | {status}")
+            if batch_size == 1:
+                pace_delay(dp, detail_pacing)
+        save_data_immediately()
+
+    save_progress()
+    session.close_tab(dp)
+
+# 在页面内请求一页列表接口：arguments[0] 为 URL，返回响应文本，请求失败时返回 null
+FETCH_JOBLIST_JS = '''
+return fetch(arguments[0], {
+    method: "GET",
+    credentials: "include",
+    headers: {
+        "accept": "application/json",
+        "x-requested-with": "XMLHttpRequest"
+    }
+}).then(resp => resp.text()).catch(() => null);
+'''
+
+def observe_list(outcome, latency=None):
+    """把列表请求的结果反馈给节奏控制器并计入运行指标"""
+    list_pacing.observe(outcome, latency)
+    metrics.inc('list_responses_total', outcome=outcome)
+    metrics.observe('list_latency_seconds', latency)
+
+def check_job_list(json_data, latency):
+    """检查列表接口响应并反馈给节奏控制器，响应正常时返回响应数据，否则返回 None"""
+    if not json_data:
+        print("  ⚠ API响应为空")
+        observe_list('empty', latency)
+        return None
+    if ('zpData' not in json_data or 'jobList' not in json_data['zpData']
+            or json_data.get('code', 0) != 0):
+        print(f"  ⚠ API响应格式异常（code={json_data.get('code')}）")
+        observe_list('error', latency)
+        return None
+    observe_list('ok', latency)
+    return json_data
+
+@profiling.section('scroll_job_list')
+def scroll_job_list(dp, catching_up=False):
+    """
+    模拟滚动触发一次列表接口，返回响应数据，未捕获到或响应异常时返回 None
+
+    数据包来自标签页的持续监听队列：队列中已有未处理的数据包
+    （页面加载时或上次滚动多触发的）时直接取出，不再滚动
+    """
+    feed = open_feed(dp, [JOBLIST_TARGET])
+    if feed.pending('joblist'):
+        r = feed.get('joblist', timeout=0)
+        print("  使用队列中已到达的数据包")
+        return check_job_list(r.response.body, None)
+
+    # 滚动
+    scroll_times = random.randint(2, 4)
+    for i in range(scroll_times):
+        scroll_distance = random.randint(300, 600)
+        dp.scroll.down(scroll_distance)
+        dp.wait(0.3, 0.8)
+
+    if not catching_up:
+        pace_delay(dp)
+    acquire_budget(dp)
+    metrics.inc('list_requests_total')
+    sent_at = time.monotonic()
+    dp.scroll.to_bottom()
+
+    # 等待API（数据包到达后立即返回）
+    r = feed.get('joblist', timeout=15)
+    metrics.observe('packet_wait_seconds', time.monotonic() - sent_at, kind='joblist')
+    if not r:
+        print("  ⚠ 未捕获到API响应")
+        observe_list('timeout')
+        return None
+
+    return check_job_list(r.response.body, time.monotonic() - sent_at)
+
+@profiling.section('fetch_job_list')
+def fetch_job_list(dp, keyword, city_code, page):
+    """
+    在已登录的标签页内直接请求一页列表接口
 
-    # 先访问首页
-    print("访问BOSS直聘首页...")
-    dp.get('https://www.zhipin.com/')
-    time.sleep(3)
+    失败时按自适应间隔等待后重试，重试 LIST_FETCH_RETRIES 次仍失败时返回 None
+    """
+    url = joblist_api_url(keyword, city_code, page)
 
-    # 访问搜索页面
-    search_url = f'https://www.zhipin.com/web/geek/job?query={keyword}&city={city_code}'
-    print(f"访问搜索页面: {search_url}")
-    dp.get(search_url)
+    for attempt in range(1, LIST_FETCH_RETRIES + 1):
+        if attempt > 1:
+            print(f"  重试第 {attempt - 1} 次...")
+            pace_delay(dp)
+
+        acquire_budget(dp)
+        sent_at = time.monotonic()
+        try:
+            metrics.inc('list_requests_total')
+            raw = dp.run_js(FETCH_JOBLIST_JS, url, timeout=15)
+        except Exception as e:
+            print(f"  ⚠ 列表请求出错: {e}")
+            raw = None
+        latency = time.monotonic() - sent_at
+
+        if raw is None:
+            print("  ⚠ 列表请求失败")
+            observe_list('timeout')
+            continue
+
+        record_packet(dp, url, raw)
+        try:
+            json_data = json.loads(raw) if isinstance(raw, str) else raw
+        except ValueError:
+            json_data = {'code': None}
+        json_data = check_job_list(json_data, latency)
+        if json_data is not None:
+            return json_data
+
+    return None
+
+@profiling.section('build_job')
+def build_job(job, keyword, city_name, lid='', collected_at=None):
+    """
+    把列表接口中的一个 job 转换为职位记录（采集和 reprocess.py 共用）
 
-    print("\n⏳ 等待页面加载（30秒）...")
-    print("提示：请手动完成人机验证和登录")
+    Args:
+        job: 列表接口 zpData.jobList 中的一项
+        lid: 列表接口 zpData.lid，请求详情时使用
+        collected_at: 采集时间，默认为当前时间
+    """
+    job_id = job.get('encryptJobId', '')
+    return JobRecord({
+        'keyword': keyword,
+        'search_keyword': keyword,
+        'city': city_name,
+        'job_title': job.get('jobName', ''),
+        'company_name_raw': job.get('brandName', ''),
+        'salary_text_raw': job.get('salaryDesc', ''),
+        'exp_req': job.get('jobExperience', ''),
+        'edu_req': job.get('jobDegree', ''),
+        'post_date': job.get('lastUpdateDate', ''),
+        'source_url': f"https://www.zhipin.com/job_detail/{job_id}.html",
+        'collected_at': collected_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        '_raw_nature': job.get('brandStageName', ''),
+        '_raw_scale': job.get('brandScaleName', ''),
+        '_raw_district': job.get('areaDistrict', ''),
+        '_raw_business': job.get('businessDistrict', ''),
+        '_raw_industry': job.get('brandIndustry', ''),
+        '_raw_skills': ' '.join(job.get('skills', [])),
+        '_raw_welfare': ' '.join(job.get('welfareList', [])),
+        '_security_id': job.get('securityId', ''),
+        '_lid': lid,
+        '_job_id': job_id
+    })
+
+def collect_jobs_improved(keyword, city_name, city_code, session):
+    """
+    改进的采集函数
+
+    在已登录的浏览器会话中打开新标签页采集，完成后关闭标签页。
+    账号异常时抛出 SessionBlocked。
+    """
+    global all_jobs_data
 
-    for i in range(30, 0, -5):
-        print(f"  倒计时: {i} 秒", end='\r')
-        time.sleep(5)
-    print("\n")
+    print(f"\n{'='*70}")
+    print(f"正在采集: {city_name} - {keyword}")
+    print(f"{'='*70}")
 
-    # 检查是否被封
-    page_text = dp.html.lower()
-    if '异常' in page_text or '禁止' in page_text or '账号存在异常' in page_text:
-        print("❌ 检测到账号异常或被封禁")
-        dp.quit()
-        return []
+    # 访问搜索页面
+    search_url = f'https://www.zhipin.com/web/geek/job?query={keyword}&city={city_code}'
+    print(f"访问搜索页面: {search_url}")
+    # 滚动模式下在页面加载之前启动持续监听，首屏数据也会进入队列
+    dp = session.new_tab(search_url, listen=[JOBLIST_TARGET] if LIST_MODE == 'scroll' else None)
 
     jobs_data = []
     processed_job_ids = set()
+    # 本组合新登记的职位（非流水线模式在阶段2获取详情）
+    pair_jobs = []
+
+    # 断点续传：上次已滚动到的页数。页面重新加载后要重新滚动到该位置，
+    # 这些追赶页不做随机等待，也不因为没有新数据而提前停止
+    resume_scrolls = _progress['scrolls'].get(pair_key(keyword, city_name), 0)
+    if resume_scrolls:
+        print(f"断点续传：上次已滚动到第 {resume_scrolls} 页")
+
+    # 流水线模式：详情线程在独立标签页中边滚动边获取详情
+    if PIPELINE_DETAILS:
+        detail_queue = queue.Queue(maxsize=DETAIL_QUEUE_SIZE)
+        pipeline_jobs = []
+        detail_tab = session.new_tab('https://www.zhipin.com/')
+        worker = threading.Thread(
+            target=detail_worker,
+            args=(detail_tab, detail_queue, pipeline_jobs),
+            daemon=True,
+        )
+        worker.start()
+
+    # 阶段1：收集职位列表
+    # 逐页请求时直接从上次的下一页开始，不需要重新滚动追赶；
+    # 单页重试后仍失败时停止翻页，组合不标记完成，下次运行从该页继续
+    direct = LIST_MODE == 'fetch'
+    incomplete = False
+    if direct:
+        first_page, last_page = resume_scrolls + 1, MAX_PAGES
+        print(f"\n开始逐页请求列表（直到没有更多数据，最多 {MAX_PAGES} 页）...")
+    else:
+        first_page, last_page = 1, MAX_SCROLLS
+        print(f"\n开始滚动收集（最多 {MAX_SCROLLS} 次）...")
 
-    # 阶段1：滚动收集职位列表
-    print(f"\n开始滚动收集（最多 {MAX_SCROLLS} 次）...")
-
-    for scroll_count in range(1, MAX_SCROLLS + 1):
-        print(f'\n第 {scroll_count} 次滚动')
+    for scroll_count in range(first_page, last_page + 1):
+        print(f'\n第 {scroll_count} 页' if direct else f'\n第 {scroll_count} 次滚动')
+        catching_up = not direct and scroll_count <= resume_scrolls
 
         try:
-            dp.listen.start('zpgeek/search/joblist.json')
-
-            # 滚动
-            scroll_times = random.randint(2, 4)
-            for i in range(scroll_times):
-                scroll_distance = random.randint(300, 600)
-                dp.scroll.down(scroll_distance)
-                time.sleep(random.uniform(0.3, 0.8))
-
-            random_delay()
-            dp.scroll.to_bottom()
-            time.sleep(random.uniform(2, 4))
-
-            # 等待API
-            r = dp.listen.wait(timeout=15)
-            if not r:
-                print("  ⚠ 未捕获到API响应")
-                random_delay()
-                continue
+            if direct:
+                json_data = fetch_job_list(dp, keyword, city_code, scroll_count)
+                if json_data is None:
+                    print(f"  ✗ 第 {scroll_count} 页获取失败，停止翻页")
+                    incomplete = True
+                    break
+            else:
+                json_data = scroll_job_list(dp, catching_up)
+                if json_data is None:
+                    pace_delay(dp)
+                    continue
 
-            json_data = r.response.body
-            if 'zpData' not in json_data or 'jobList' not in json_data['zpData']:
-                print("  ⚠ API响应格式异常")
-                random_delay()
-                continue
+            # 原始响应写入归档（滚动模式下没有列表接口地址，记录搜索页地址）
+            archive_response(
+                'joblist', joblist_api_url(keyword, city_code, scroll_count) if direct else search_url,
+                json_data, keyword=keyword, city=city_name, page=scroll_count,
+            )
 
             jobList = json_data['zpData']['jobList']
             new_jobs = 0
@@ -389,29 +1172,7 @@ def collect_jobs_improved(keyword, city_name, city_code):
                 processed_job_ids.add(job_id)
                 new_jobs += 1
 
-                job_info = {
-                    'keyword': keyword,
-                    'search_keyword': keyword,
-                    'city': city_name,
-                    'job_title': job.get('jobName', ''),
-                    'company_name_raw': job.get('brandName', ''),
-                    'salary_text_raw': job.get('salaryDesc', ''),
-                    'exp_req': job.get('jobExperience', ''),
-                    'edu_req': job.get('jobDegree', ''),
-                    'post_date': job.get('lastUpdateDate', ''),
-                    'source_url': f"https://www.zhipin.com/job_detail/{job_id}.html",
-                    'collected_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    '_raw_nature': job.get('brandStageName', ''),
-                    '_raw_scale': job.get('brandScaleName', ''),
-                    '_raw_district': job.get('areaDistrict', ''),
-                    '_raw_business': job.get('businessDistrict', ''),
-                    '_raw_industry': job.get('brandIndustry', ''),
-                    '_raw_skills': ' '.join(job.get('skills', [])),
-                    '_raw_welfare': ' '.join(job.get('welfareList', [])),
-                    '_security_id': job.get('securityId', ''),
-                    '_lid': json_data.get('zpData', {}).get('lid', ''),
-                    '_job_id': job_id
-                }
+                job_info = build_job(job, keyword, city_name, json_data['zpData'].get('lid', ''))
 
                 jobs_data.append(job_info)
                 print(f"  ✓ [{len(jobs_data)}] {job_info['job_title'][:25]} | {job_info['company_name_raw'][:20]}")
@@ -420,68 +1181,202 @@ def collect_jobs_improved(keyword, city_name, city_code):
 
             # 每次滚动后立即保存
             if jobs_data:
-                all_jobs_data.extend(jobs_data)
-                save_data_immediately(all_jobs_data)
+                added = add_jobs(jobs_data)
+                save_data_immediately()
+                if PIPELINE_DETAILS:
+                    for job_info in added:
+                        detail_queue.put(job_info)
+                else:
+                    pair_jobs.extend(added)
                 jobs_data = []  # 清空临时列表
 
-            if new_jobs == 0 and scroll_count >= 2:
+            update_scroll_progress(keyword, city_name, scroll_count)
+
+            if direct:
+                if not json_data['zpData'].get('hasMore'):
+                    print("  没有更多数据，停止翻页")
+                    break
+            elif catching_up:
+                continue
+            elif new_jobs == 0 and scroll_count >= 2:
                 print("  没有更多数据，停止滚动")
                 break
 
-            random_delay()
+            pace_delay(dp)
 
         except Exception as e:
             print(f"  ✗ 出错: {e}")
-            random_delay()
+            pace_delay(dp)
             continue
 
+    if PIPELINE_DETAILS:
+        # 等待详情线程处理完队列中剩余的职位
+        print(f"\n滚动结束，等待剩余 {detail_queue.qsize()} 个职位的详情...")
+        detail_queue.put(None)
+        worker.join()
+        session.close_tab(detail_tab)
+        save_data_immediately()
+
+        session.close_tab(dp)
+        if incomplete:
+            raise RuntimeError(f"第 {scroll_count} 页列表获取失败，下次运行继续")
+        print(f"\n✓ 采集完成，共获取 {len(pipeline_jobs)} 条职位数据")
+        return pipeline_jobs
+
     # 阶段2：获取职位详情（使用API，不跳转）
     print(f"\n开始获取职位详情（使用API，避免跳转）...")
 
     all_jobs_with_details = []
+    batch_size = max(1, DETAIL_BATCH_SIZE)
 
-    for idx, job in enumerate(all_jobs_data):
-        try:
-            job_id = job.get('_job_id', '')
-            security_id = job.get('_security_id', '')
-            lid = job.get('_lid', '')
+    for start in range(0, len(pair_jobs), batch_size):
+        batch = pair_jobs[start:start + batch_size]
 
-            # 先尝试API方式
-            jd_text = get_job_detail_api(dp, job_id, security_id, lid)
+        # 批量模式：一次请求整批详情
+        batch_texts = get_job_details_batch(dp, batch) if batch_size > 1 else None
 
-            # 如果API失败，尝试点击方式
-            if not jd_text:
-                jd_text = get_job_detail_click(dp, job_id, security_id, lid)
+        for idx, job in enumerate(batch, start):
+            try:
+                jd_text = get_job_detail(dp, job, batch_texts)
 
-            job['jd_text'] = jd_text if jd_text else ''
+                set_job_detail(job, jd_text)
 
-            all_jobs_with_details.append(job)
+                all_jobs_with_details.append(job)
 
-            status = '✓ 有描述' if jd_text else '✗ 无描述'
-            print(f"  [{idx+1}/{len(all_jobs_data)}] {job['job_title'][:25]} | {status}")
+                status = '✓ 有描述' if jd_text else '✗ 无描述'
+                print(f"  [{idx+1}/{len(pair_jobs)}] {job['job_title'][:25]} | {status}")
 
-            # 每获取5个详情就保存一次
-            if (idx + 1) % 5 == 0:
-                save_data_immediately(all_jobs_with_details)
-                print(f"    💾 已保存 {len(all_jobs_with_details)} 条数据")
+                # 每获取5个详情就保存一次
+                if (idx + 1) % 5 == 0:
+                    save_data_immediately()
+                    print(f"    💾 已保存 {len(all_jobs_with_details)} 条数据")
 
-            # 更长的延迟，避免触发检测
-            delay = random.uniform(DETAIL_PAGE_DELAY - 2, DETAIL_PAGE_DELAY + 2)
-            print(f"    等待 {delay:.1f} 秒...")
-            time.sleep(delay)
+                # 逐个获取时按自适应间隔等待（批量模式由速率上限控制）
+                if batch_size == 1:
+                    delay = detail_pacing.next_delay()
+                    print(f"    等待 {delay:.1f} 秒...")
+                    started = time.perf_counter()
+                    dp.wait(delay)
+                    metrics.observe('sleep_seconds', time.perf_counter() - started, reason='pacing')
 
-        except Exception as e:
-            print(f"  ✗ 处理职位 {idx+1} 出错: {e}")
-            all_jobs_with_details.append(job)  # 即使出错也保留
-            continue
+            except Exception as e:
+                print(f"  ✗ 处理职位 {idx+1} 出错: {e}")
+                all_jobs_with_details.append(job)  # 即使出错也保留
+                continue
 
-    dp.quit()
+    session.close_tab(dp)
+    if incomplete:
+        raise RuntimeError(f"第 {scroll_count} 页列表获取失败，下次运行继续")
     print(f"\n✓ 采集完成，共获取 {len(all_jobs_with_details)} 条职位数据")
 
     return all_jobs_with_details
 
 # ==================== 主函数 ====================
 
+def collect_pair(session, keyword, city_name, city_code):
+    """采集一个 关键词 × 城市 组合，成功后记录到断点"""
+    if _stop_event.is_set():
+        return
+
+    started = time.perf_counter()
+    try:
+        jobs = collect_jobs_improved(keyword, city_name, city_code, session)
+
+        # 保存最终数据（检查点：生成 CSV）
+        if jobs:
+            with metrics.timer('checkpoint_seconds'), profiling.section('checkpoint'):
+                save_data_immediately()
+                get_sink().checkpoint()
+            print(f"\n✓ {city_name}-{keyword} 数据已保存")
+        mark_pair_done(keyword, city_name)
+        metrics.inc('pairs_total', result='done')
+
+    except SessionBlocked:
+        _stop_event.set()
+        metrics.inc('pairs_total', result='blocked')
+        raise
+    except Exception as e:
+        print(f"✗ 采集失败: {city_name} - {keyword}, 错误: {e}")
+        metrics.inc('pairs_total', result='failed')
+    finally:
+        metrics.observe('pair_seconds', time.perf_counter() - started)
+
+def collect_all(session):
+    """
+    采集所有未完成的 关键词 × 城市 组合
+
+    PARALLEL_TABS > 1 时在同一浏览器的多个标签页中并行采集，
+    所有标签页共用 request_budget，总请求速率不变
+    """
+    resume_pending_details(session)
+
+    pairs = []
+    for keyword in SEARCH_CONFIGS['keywords']:
+        for city_name, city_code in SEARCH_CONFIGS['cities'].items():
+            if pair_key(keyword, city_name) in _progress['done']:
+                print(f"\n✓ 跳过已完成: {city_name} - {keyword}")
+                continue
+            pairs.append((keyword, city_name, city_code))
+
+    if PARALLEL_TABS <= 1:
+        for pair in pairs:
+            collect_pair(session, *pair)
+        return
+
+    print(f"\n并行采集：{len(pairs)} 个组合，{PARALLEL_TABS} 个标签页")
+    with ThreadPoolExecutor(max_workers=PARALLEL_TABS) as pool:
+        futures = [pool.submit(collect_pair, session, *pair) for pair in pairs]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except SessionBlocked:
+            for future in futures:
+                future.cancel()
+            raise
+
+def write_run_report(cache=None):
+    """
+    写出运行报告（见 metrics.py），返回报告内容
+
+    除各项计数器和直方图外，报告中附带派生指标：每分钟采集职位数、详情获取率、
+    详情缓存命中率、等待（限速和自适应间隔）与工作时间，以及请求间隔控制器的状态。
+    多个线程同时采集时等待时间为各线程之和
+    """
+    elapsed = metrics.registry.elapsed()
+    collected = metrics.counter('jobs_collected_total')
+    with_jd = metrics.counter('jobs_detail_total', result='with_jd')
+    details = with_jd + metrics.counter('jobs_detail_total', result='without_jd')
+    cache_hits = metrics.counter('detail_cache_total', result='hit')
+    cache_lookups = cache_hits + metrics.counter('detail_cache_total', result='miss')
+    sleep = metrics.total('sleep_seconds')
+
+    if cache is not None:
+        metrics.gauge('detail_cache_hits', cache.hits)
+        metrics.gauge('detail_cache_misses', cache.misses)
+    metrics.gauge('jobs_in_memory', len(all_jobs_data))
+
+    return metrics.write_report(
+        METRICS_REPORT_FILE, PROMETHEUS_TEXTFILE,
+        derived={
+            'jobs_per_minute': round(collected / elapsed * 60, 1) if elapsed else 0,
+            'detail_success_pct': round(with_jd / details * 100, 1) if details else 0,
+            'detail_cache_hit_pct': round(cache_hits / cache_lookups * 100, 1) if cache_lookups else 0,
+            'sleep_seconds': round(sleep, 1),
+            'work_seconds': round(max(0.0, elapsed - sleep), 1),
+            'sleep_pct': round(sleep / elapsed * 100, 1) if elapsed else 0,
+        },
+        pacing=pacing_metrics(),
+        config={
+            'keywords': SEARCH_CONFIGS['keywords'],
+            'cities': list(SEARCH_CONFIGS['cities']),
+            'list_mode': LIST_MODE,
+            'parallel_tabs': PARALLEL_TABS,
+            'pipeline_details': PIPELINE_DETAILS,
+            'request_rate': REQUEST_RATE,
+            'output_file': OUTPUT_FILE,
+        },
+    )
+
 def main():
     """主函数"""
     print("="*70)
@@ -490,31 +1385,54 @@ def main():
     print(f"\n改进点：")
     print(f"  1. 边采集边保存，Ctrl+C不会丢失数据")
     print(f"  2. 使用API获取详情，避免跳转页面")
-    print(f"  3. 更长的延迟时间（5-10秒）")
+    print(f"  3. 自适应请求间隔（出错时放大，正常时缩小到下限）")
     print(f"  4. 实时保存进度")
 
     print(f"\n当前配置:")
     print(f"- 关键词: {', '.join(SEARCH_CONFIGS['keywords'])}")
     print(f"- 城市: {', '.join(SEARCH_CONFIGS['cities'].keys())}")
-    print(f"- 滚动次数: {MAX_SCROLLS}")
-
-    input("\n按Enter键开始采集...")
-
-    for keyword in SEARCH_CONFIGS['keywords']:
-        for city_name, city_code in SEARCH_CONFIGS['cities'].items():
-            try:
-                jobs = collect_jobs_improved(keyword, city_name, city_code)
-
-                # 保存最终数据
-                if jobs:
-                    save_data_immediately(jobs)
-                    print(f"\n✓ {city_name}-{keyword} 数据已保存")
-
-                time.sleep(10)
-
-            except Exception as e:
-                print(f"✗ 采集失败: {city_name} - {keyword}, 错误: {e}")
-                continue
+    if LIST_MODE == 'fetch':
+        print(f"- 列表获取: 逐页请求（最多 {MAX_PAGES} 页）")
+    else:
+        print(f"- 滚动次数: {MAX_SCROLLS}")
+
+    # 断点续传：跳过已完成的组合，已写入的职位不再重复采集
+    if load_progress():
+        _seen_keys.update(get_sink().keys())
+        print(f"\n发现断点: 已完成 {len(_progress['done'])} 个组合，"
+              f"已保存 {len(_seen_keys)} 个职位，待获取详情 {len(_progress['pending'])} 个")
+
+    print(f"- 输出文件: {OUTPUT_FILE}（{OUTPUT_FORMAT}）")
+    if REPLAY_FILE:
+        print(f"- 回放模式: {REPLAY_FILE}")
+    elif CONFIRM_START:
+        input("\n按Enter键开始采集...")
+
+    # 整个运行只登录一次，各组合在同一浏览器的新标签页中采集
+    session = BrowserSession(RECORD_FILE, REPLAY_FILE,
+                             port=BROWSER_PORT, user_data_dir=BROWSER_PROFILE)
+    try:
+        collect_all(session)
+    except SessionBlocked as e:
+        print(f"❌ {e}，停止采集")
+    finally:
+        session.quit()
+
+    all_done = all(
+        pair_key(keyword, city_name) in _progress['done']
+        for keyword in SEARCH_CONFIGS['keywords']
+        for city_name in SEARCH_CONFIGS['cities']
+    )
+    if all_done and not _progress['pending']:
+        # 全部完成：生成最终 CSV，清除日志和断点，下次运行重新开始
+        close_sink()
+        if os.path.exists(PROGRESS_FILE):
+            os.remove(PROGRESS_FILE)
+    else:
+        save_data_immediately()
+        get_sink().checkpoint()
+        save_progress()
+        print(f"\n⚠ 仍有未完成的组合或详情，断点已保存到 {PROGRESS_FILE}，重新运行即可继续")
 
     print(f"\n{'='*70}")
     print("全部完成！")
@@ -522,9 +1440,37 @@ def main():
     print(f"\n✓ 最终文件: {OUTPUT_FILE}")
     print(f"✓ 共保存: {len(all_jobs_data)} 条职位数据")
 
+    cache = get_detail_cache()
+    if cache:
+        print(f"✓ 详情缓存: 命中 {cache.hits} 次，未命中 {cache.misses} 次")
+        cache.close()
+
+    store = get_job_store()
+    if store is not None:
+        print(f"✓ 职位数据库: {JOB_STORE_FILE}（共 {len(store)} 个职位）")
+        store.close()
+
+    archive = get_raw_archive()
+    if archive is not None:
+        stats = archive.stats()
+        print(f"✓ 原始响应归档: {RAW_ARCHIVE_DIR}（本次 {archive.added} 个响应，"
+              f"其中 {archive.deduplicated} 个内容重复；共 {stats['blobs']} 个，"
+              f"{stats['size'] / 1024:.0f} KB 压缩为 {stats['stored'] / 1024:.0f} KB）")
+        archive.close()
+
+    print("✓ 请求间隔:")
+    save_pacing_metrics()
+
+    if METRICS_REPORT_FILE or PROMETHEUS_TEXTFILE:
+        report = write_run_report(cache)
+        print(f"✓ 运行报告: {METRICS_REPORT_FILE or PROMETHEUS_TEXTFILE}"
+              f"（{report['derived']['jobs_per_minute']} 职位/分钟，"
+              f"详情获取率 {report['derived']['detail_success_pct']}%，"
+              f"等待时间占比 {report['derived']['sleep_pct']}%）")
+
 if __name__ == '__main__':
     try:
-        main()
+        profiling.run(main, profile_file=PROFILE_FILE, flamegraph=FLAMEGRAPH_FILE)
     except KeyboardInterrupt:
         signal_handler(None, None)
     except Exception as e:
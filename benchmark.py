@@ -0,0 +1,436 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+性能基准测试脚本
+
+用法：
+    python benchmark.py save [总条数]     # 增量保存：数据量增长时单次保存的耗时
+    python benchmark.py memory [总条数]   # 采集中职位记录的内存占用：字典 / JobRecord
+    python benchmark.py jd [总条数]       # JD噪音清洗：逐条 re.sub / 单次扫描，并核对两者结果一致
+    python benchmark.py salary [总条数]   # 薪资解析：不缓存 / 按文本缓存 / pandas 列
+    python benchmark.py clean [总条数]    # 清洗：输入增长时的耗时和内存峰值（内存去重 / --stream / 多进程）
+    python benchmark.py neardup [总条数]  # JD 近似重复检测：输入增长时的耗时，与精确相似度对照的召回率
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+
+# ==================== 测试数据 ====================
+
+CITIES = ['北京', '上海', '深圳', '杭州', '广州', '成都']
+DEGREES = ['本科', '硕士', '大专', '学历不限']
+EXPERIENCES = ['1-3年', '3-5年', '5-10年', '经验不限']
+SALARIES = ['15-25K·13薪', '20-40K', '10-15K', '30-50K·16薪', '200-300元/天', '面议']
+STAGES = ['A轮', 'B轮', '已上市', '不需要融资', '']
+SCALES = ['20-99人', '100-499人', '1000-9999人', '10000人以上']
+
+
+def make_job(i, keyword='python'):
+    """生成一条与列表接口解析结果结构相同的模拟职位记录"""
+    rnd = random.Random(i)
+    job_id = f'bench{i:08d}'
+    return {
+        'keyword': keyword,
+        'search_keyword': keyword,
+        'city': rnd.choice(CITIES),
+        'job_title': f'Python开发工程师{i}',
+        'company_name_raw': f'某某{i % 5000}科技有限公司',
+        'salary_text_raw': rnd.choice(SALARIES),
+        'exp_req': rnd.choice(EXPERIENCES),
+        'edu_req': rnd.choice(DEGREES),
+        'post_date': '2026-10-01',
+        'source_url': f'https://www.zhipin.com/job_detail/{job_id}.html',
+        'collected_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        '_raw_nature': rnd.choice(STAGES),
+        '_raw_scale': rnd.choice(SCALES),
+        '_raw_district': '海淀区',
+        '_raw_business': '中关村',
+        '_raw_industry': '互联网',
+        '_raw_skills': 'Python Django MySQL',
+        '_raw_welfare': '五险一金 带薪年假',
+        '_security_id': f'sec{i}',
+        '_lid': 'bench',
+        '_job_id': job_id,
+    }
+
+
+# ==================== 基准测试 ====================
+
+def bench_save(total=100000, per_scroll=15):
+    """
+    模拟采集过程：每次滚动新增 per_scroll 条记录并调用一次 save_data_immediately，
+    统计数据量达到不同规模时单次保存的平均耗时
+    """
+    import batch_spider_improved as spider
+
+    workdir = tempfile.mkdtemp(prefix='bench_save_')
+    spider.OUTPUT_FILE = os.path.join(workdir, 'boss_jobs_progress.csv')
+    spider.JOB_STORE_FILE = os.path.join(workdir, 'boss_jobs.db')
+    spider.CHECKPOINT_INTERVAL = 0
+
+    print(f"增量保存基准测试：共 {total} 条，每次滚动新增 {per_scroll} 条")
+    print(f"{'累计记录数':>10} | {'单次保存平均耗时(ms)':>20}")
+    print('-' * 36)
+
+    marks = {1000, 10000, 50000, total}
+    window = []
+    for start in range(0, total, per_scroll):
+        jobs = [make_job(i) for i in range(start, min(start + per_scroll, total))]
+
+        t0 = time.perf_counter()
+        spider.add_jobs(jobs)
+        spider.save_data_immediately()
+        window.append(time.perf_counter() - t0)
+
+        count = min(start + per_scroll, total)
+        for mark in sorted(marks):
+            if start < mark <= count:
+                avg = sum(window[-100:]) / len(window[-100:])
+                print(f"{count:>10} | {avg * 1000:>20.3f}")
+
+    t0 = time.perf_counter()
+    spider.close_sink()
+    print(f"\n生成最终 CSV 耗时: {time.perf_counter() - t0:.2f} 秒")
+    print(f"输出目录: {workdir}")
+
+
+def make_jd(i):
+    """生成一段长度与真实职位描述相近的模拟职位描述"""
+    return f'岗位职责{i}：负责后端服务开发，熟悉Python、Django、MySQL、Redis。' * 12
+
+
+def bench_memory(total=100000):
+    """
+    采集 total 个职位后内存中职位记录的占用：
+    原来的字典、JobRecord（字段 + 字符串驻留）、JobRecord 保存后释放职位描述
+    """
+    import batch_spider_improved as spider
+    from job_record import JobRecord
+
+    def measure(build):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        jobs = build()
+        elapsed = time.perf_counter() - t0
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del jobs
+        return current, elapsed
+
+    # 经过 JSON 解析，与接口返回的数据一样每条记录都是独立的字符串对象
+    def parsed_job(i):
+        return json.loads(json.dumps(make_job(i), ensure_ascii=False))
+
+    def build_dicts():
+        jobs = []
+        for i in range(total):
+            job = spider.enrich_job(parsed_job(i))
+            job['jd_text'] = make_jd(i)
+            jobs.append(job)
+        return jobs
+
+    def build_records(release=False):
+        jobs = []
+        for i in range(total):
+            job = spider.enrich_job(JobRecord(parsed_job(i)))
+            job['jd_text'] = make_jd(i)
+            if release:
+                job.release_payload()
+            jobs.append(job)
+        return jobs
+
+    print(f"职位记录内存占用基准测试：共 {total} 条")
+    print(f"{'记录类型':<28} | {'内存(MB)':>10} | {'每条(字节)':>10} | {'构建耗时(s)':>10}")
+    print('-' * 70)
+    cases = [
+        ('dict', build_dicts),
+        ('JobRecord', build_records),
+        ('JobRecord + 保存后释放大字段', lambda: build_records(release=True)),
+    ]
+    for name, build in cases:
+        current, elapsed = measure(build)
+        print(f"{name:<28} | {current / 1024 / 1024:>10.1f} | {current / total:>10.0f} | {elapsed:>10.2f}")
+
+
+# 原 clean_data.clean_jd_text（逐条执行 re.sub），作为 jd 基准测试的对照和标准结果
+LEGACY_JD_NOISE_PATTERNS = [
+    r'微信扫码.*', r'来自.*?直聘', r'BOSS直聘', r'boss报', r'boss分享', r'kanzhun.*',
+    r'举报', r'分享', r'直聘', r'享举', r'\s+boss\s+', r'\s+直聘\s+', r'^\s+', r'\s+$',
+]
+
+
+def legacy_clean_jd_text(jd_text):
+    if not jd_text:
+        return ''
+    cleaned = jd_text
+    for pattern in LEGACY_JD_NOISE_PATTERNS:
+        cleaned = re.sub(pattern, ' ', cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r'\s+', ' ', cleaned)
+    return cleaned.strip()
+
+
+# 随机拼接的片段：噪音标记、噪音标记的一部分、大小写变体、空白
+JD_FRAGMENTS = [
+    '岗位职责：', '负责后端服务开发', '熟悉Python', '任职要求', '，', '。', '1.', '2.',
+    '微信扫码', '来自', 'BOSS直聘', 'Boss直聘', 'boss报', 'BOSS分享', 'boss', 'Boss', 'BOSS',
+    'kanzhun', 'KANZHUN.com', 'bOſS', '\u212aanzhun', '举报', '分享', '直聘', '享举', '享', '举', '报', '分', '直', '聘',
+    ' ', '  ', '\n', '\t', '\r\n', '\u3000',
+]
+
+
+def make_noisy_jd(rng):
+    """随机拼接片段，覆盖噪音标记相邻、重叠、跨行的各种组合"""
+    return ''.join(rng.choice(JD_FRAGMENTS) for _ in range(rng.randint(0, 40)))
+
+
+def make_real_jd(i):
+    """与采集结果相近的职位描述：正文 + 页面末尾的噪音"""
+    text = make_jd(i)
+    if i % 3 == 0:
+        text += ' 来自BOSS直聘 微信扫码分享 举报'
+    if i % 5 == 0:
+        text += '\nkanzhun.com 看准网'
+    return text
+
+
+def bench_jd(total=20000):
+    """
+    JD噪音清洗：原来的逐条 re.sub 与 jd_cleaner.py 的单次扫描
+    先用随机拼接的噪音文本核对结果完全一致，再比较耗时
+    """
+    from jd_cleaner import JDCleaner
+
+    cleaner = JDCleaner()
+    rng = random.Random(20240601)
+    golden = ['', ' ', 'boss', ' boss ', ' boss boss boss x', '享举报', '分享举', '来自x微信扫码y直聘',
+              'kanzhun 来自x直聘 tail', '来自 kanzhun 直聘 tail', '举报boss举报', 'a\nboss\n直聘\nb']
+    samples = golden + [make_noisy_jd(rng) for _ in range(total)]
+
+    mismatches = [s for s in samples if cleaner.clean(s) != legacy_clean_jd_text(s)]
+    if mismatches:
+        sample = mismatches[0]
+        print(f"✗ 结果不一致：{len(mismatches)}/{len(samples)} 条")
+        print(f"  输入: {sample!r}")
+        print(f"  原结果: {legacy_clean_jd_text(sample)!r}")
+        print(f"  新结果: {cleaner.clean(sample)!r}")
+        sys.exit(1)
+    print(f"✓ 结果一致：{len(samples)} 条随机拼接的噪音文本")
+
+    texts = [make_real_jd(i) for i in range(total)]
+    print(f"\nJD噪音清洗基准测试：共 {total} 条，平均 {sum(map(len, texts)) // total} 字")
+    print(f"{'实现':<16} | {'总耗时(s)':>10} | {'每条(us)':>10}")
+    print('-' * 44)
+    results = {}
+    for name, clean in [('逐条 re.sub', legacy_clean_jd_text), ('单次扫描', cleaner.clean)]:
+        t0 = time.perf_counter()
+        results[name] = [clean(t) for t in texts]
+        elapsed = time.perf_counter() - t0
+        print(f"{name:<16} | {elapsed:>10.3f} | {elapsed / total * 1e6:>10.1f}")
+    if results['逐条 re.sub'] != results['单次扫描']:
+        print("✗ 结果不一致")
+        sys.exit(1)
+
+
+def bench_salary(total=200000):
+    """薪资解析：每行都解析、按原始文本缓存、pandas 列（每种文本只解析一次）"""
+    from salary import parse_salary, parse_salary_series
+
+    texts = [SALARIES[i % len(SALARIES)] for i in range(total)]
+    print(f"薪资解析基准测试：共 {total} 条，{len(set(texts))} 种薪资文本")
+    print(f"{'方式':<16} | {'总耗时(s)':>10} | {'每条(us)':>10}")
+    print('-' * 44)
+
+    def timed(name, func):
+        t0 = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t0
+        print(f"{name:<16} | {elapsed:>10.3f} | {elapsed / total * 1e6:>10.2f}")
+        return result
+
+    uncached = timed('不缓存', lambda: [parse_salary.__wrapped__(t) for t in texts])
+    parse_salary.cache_clear()
+    cached = timed('按文本缓存', lambda: [parse_salary(t) for t in texts])
+    if cached != uncached:
+        print("✗ 结果不一致")
+        sys.exit(1)
+    try:
+        import pandas as pd
+    except ImportError:
+        print("（未安装 pandas，跳过 pandas 列）")
+        return
+    series = pd.Series(texts)
+    parse_salary.cache_clear()
+    timed('pandas 列', lambda: parse_salary_series(series))
+
+
+def make_clean_input(path, total):
+    """生成清洗脚本的输入 CSV（约 10% 的记录重复）"""
+    import clean_data
+    from output_formats import write_csv
+
+    def rows():
+        for i in range(total):
+            job = make_job(i % max(1, total * 9 // 10))
+            job.update({
+                'keyword_group': job['keyword'],
+                'company_name_std': job['company_name_raw'],
+                'company_type': '民营/上市/大型企业',
+                'jd_text': make_real_jd(i),
+            })
+            yield job
+    write_csv(rows(), path, clean_data.FIELDNAMES)
+
+
+def bench_clean(total=200000):
+    """
+    清洗脚本在输入为 total / 4 和 total 条时的耗时与内存峰值
+    （记录分批清洗和写出；--stream 时去重键也放在磁盘上；
+    并行模式使用全部 CPU 核，内存峰值只统计主进程）
+    """
+    import clean_data
+
+    workdir = tempfile.mkdtemp(prefix='clean_bench_')
+    print(f"清洗基准测试（工作目录 {workdir}，{os.cpu_count()} 个CPU核）")
+    print(f"{'输入(条)':>10} | {'模式':<10} | {'耗时(s)':>8} | {'内存峰值(MB)':>12}")
+    print('-' * 52)
+    for size in (max(1, total // 4), total):
+        input_file = os.path.join(workdir, f'input_{size}.csv')
+        make_clean_input(input_file, size)
+        outputs = {}
+        for mode, stream, workers in (('默认', False, 1), ('stream', True, 1), ('并行', False, 0)):
+            clean_data.INPUT_FILE = input_file
+            clean_data.OUTPUT_FILE = os.path.join(workdir, f'out_{size}_{mode}.csv')
+            clean_data.METRICS_REPORT_FILE = ''
+            clean_data.STREAM = stream
+            clean_data.WORKERS = workers
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                clean_data.main()
+            elapsed = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            with open(clean_data.OUTPUT_FILE, 'rb') as f:
+                outputs[mode] = f.read()
+            print(f"{size:>10} | {mode:<10} | {elapsed:>8.2f} | {peak / 1024 / 1024:>12.1f}")
+        if len(set(outputs.values())) != 1:
+            print("✗ 各模式的输出不一致")
+            sys.exit(1)
+    print(f"\n✓ 各模式的输出一致")
+
+
+JD_PHRASES = [
+    '负责后端服务的设计与开发', '熟悉Python、Go或Java', '熟悉MySQL、Redis、Kafka', '有分布式系统经验',
+    '参与大模型应用落地', '熟悉LangChain、RAG', '具备良好的沟通能力', '本科及以上学历', '三年以上工作经验',
+    '负责数据平台建设', '熟悉Spark、Flink', '有高并发系统优化经验', '熟悉Docker、Kubernetes',
+    '参与需求评审和技术方案设计', '有开源项目经验者优先', '熟悉机器学习常用算法', '五险一金、带薪年假',
+]
+
+
+def make_near_dup_jds(total, seed=20241017):
+    """
+    生成带近似重复的职位描述：四分之一为原始 JD，其余为随机一条原始 JD 的副本
+    （替换若干字符、删掉一句或加上猎头前缀）
+
+    Returns:
+        (JD 列表, 每条 JD 对应的原始 JD 序号)
+    """
+    rng = random.Random(seed)
+    originals = ['；'.join(rng.choice(JD_PHRASES) for _ in range(rng.randint(10, 30)))
+                 for _ in range(max(1, total // 4))]
+    texts, sources = list(originals), list(range(len(originals)))
+    while len(texts) < total:
+        source = rng.randrange(len(originals))
+        text = originals[source]
+        kind = rng.random()
+        if kind < 0.5:
+            chars = list(text)
+            for _ in range(rng.randint(0, 6)):
+                chars[rng.randrange(len(chars))] = rng.choice('的和与及，')
+            text = ''.join(chars)
+        elif kind < 0.8:
+            parts = text.split('；')
+            del parts[rng.randrange(len(parts))]
+            text = '；'.join(parts)
+        else:
+            text = '【猎头职位】' + text
+        texts.append(text)
+        sources.append(source)
+    return texts, sources
+
+
+def bench_near_dup(total=200000):
+    """
+    JD 近似重复检测（near_dup.py）：输入增长时的耗时（应接近线性），
+    以及与精确 Jaccard 系数对照的召回率和误合并数
+    """
+    import near_dup
+
+    def shingles(text):
+        text = ''.join(text.lower().split())
+        return {text[i:i + near_dup.SHINGLE_SIZE] for i in range(len(text) - near_dup.SHINGLE_SIZE + 1)}
+
+    print(f"近似重复检测基准测试（阈值 {near_dup.THRESHOLD}，签名 {near_dup.NUM_PERM} 位，{near_dup.BANDS} 段）")
+    print(f"{'JD(条)':>10} | {'签名(s)':>8} | {'聚类(s)':>8} | {'每千条(ms)':>10} | {'簇数':>8}")
+    print('-' * 58)
+    for size in (max(1, total // 8), max(1, total // 4), max(1, total // 2), total):
+        texts, sources = make_near_dup_jds(size)
+        t0 = time.perf_counter()
+        hasher = near_dup.MinHasher()
+        blocks = [hasher.signatures(texts[i:i + 10000]) for i in range(0, size, 10000)]
+        t1 = time.perf_counter()
+        cluster_ids, canonical = near_dup.find_clusters(blocks)
+        t2 = time.perf_counter()
+        print(f"{size:>10} | {t1 - t0:>8.2f} | {t2 - t1:>8.2f} | {(t2 - t0) / size * 1e6:>10.1f} | "
+              f"{cluster_ids.max():>8}")
+
+    # 准确性：副本与原始 JD 的精确相似度，按区间统计被分到同一簇的比例
+    texts, sources = make_near_dup_jds(min(total, 20000))
+    cluster_ids, _ = near_dup.find_clusters([near_dup.MinHasher().signatures(texts)])
+    ranges = [(0.9, 1.01), (0.85, 0.9), (0.8, 0.85), (0.7, 0.8), (0, 0.7)]
+    found = {r: [0, 0] for r in ranges}
+    for i, source in enumerate(sources):
+        if i == source:
+            continue
+        a, b = shingles(texts[i]), shingles(texts[source])
+        similarity = len(a & b) / (len(a | b) or 1)
+        for low, high in ranges:
+            if low <= similarity < high:
+                found[(low, high)][0] += 1
+                found[(low, high)][1] += cluster_ids[i] == cluster_ids[source]
+    print(f"\n{'精确相似度':>12} | {'副本数':>8} | {'与原始JD同簇':>12}")
+    print('-' * 40)
+    for (low, high), (count, same) in found.items():
+        if count:
+            print(f"{f'[{low:.2f}, {min(high, 1):.2f})':>12} | {count:>8} | {same / count:>12.1%}")
+
+    clusters = {}
+    for cluster_id, source in zip(cluster_ids.tolist(), sources):
+        clusters.setdefault(cluster_id, set()).add(source)
+    merged = sum(1 for s in clusters.values() if len(s) > 1)
+    print(f"\n混入不同原始 JD 的簇：{merged} 个")
+
+
+BENCHMARKS = {
+    'save': bench_save,
+    'memory': bench_memory,
+    'jd': bench_jd,
+    'salary': bench_salary,
+    'clean': bench_clean,
+    'neardup': bench_near_dup,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(__doc__)
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*[int(a) for a in sys.argv[2:]])
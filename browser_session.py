@@ -0,0 +1,156 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+浏览器会话管理模块
+
+整个采集过程只启动一次浏览器、只登录一次，每个 关键词 × 城市 组合
+在同一个已登录浏览器中打开新标签页采集，完成后关闭标签页。
+只有检测到登录失效时才重启浏览器并重新登录。
+"""
+
+import threading
+
+from replay import open_page
+from packet_feed import open_feed, close_feed
+
+HOME_URL = 'https://www.zhipin.com/'
+
+# 页面中出现这些文字说明账号异常或被封禁
+BLOCKED_MARKERS = ['异常', '禁止', '账号存在异常']
+
+# 跳转到这些地址说明登录已失效
+LOGIN_URL_MARKERS = ['/web/user', 'passport', 'login']
+
+# 已登录时页头显示的用户头像
+LOGIN_MARKER = 'css:.nav-figure'
+
+# 等待手动登录的最长时间（秒），检测到登录后立即继续
+LOGIN_TIMEOUT = 120
+
+# 新标签页等待文档加载完成的最长时间（秒）
+PAGE_LOAD_TIMEOUT = 10
+
+
+def wait_for_login(page, timeout=LOGIN_TIMEOUT):
+    """
+    等待手动完成人机验证和登录
+
+    页头出现已登录标记时立即返回 True，超时仍未出现时返回 False（继续采集）
+    """
+    print(f"\n⏳ 等待登录（检测到登录后立即开始，最多 {timeout} 秒）...")
+    print("提示：请手动完成人机验证和登录")
+    if page.wait.ele_displayed(LOGIN_MARKER, timeout=timeout):
+        print("✓ 已检测到登录状态\n")
+        return True
+    print("⚠ 未检测到登录标记，继续采集\n")
+    return False
+
+
+class SessionBlocked(Exception):
+    """账号异常或被封禁，无法继续采集"""
+
+
+class BrowserSession:
+    """
+    已登录的浏览器会话（可在多个线程中同时打开标签页）
+
+    Args:
+        record_file: 录制归档路径（见 replay.py）
+        replay_file: 回放归档路径（见 replay.py）
+        login_wait: 首次登录时等待手动完成人机验证和登录的最长秒数
+        max_restarts: 登录失效时最多重启浏览器的次数
+        port: 浏览器调试端口，0 表示默认端口
+        user_data_dir: 浏览器用户数据目录，空字符串表示默认目录
+    """
+
+    def __init__(self, record_file='', replay_file='', login_wait=LOGIN_TIMEOUT, max_restarts=3,
+                 port=0, user_data_dir=''):
+        self.record_file = record_file
+        self.replay_file = replay_file
+        self.port = port
+        self.user_data_dir = user_data_dir
+        self.login_wait = login_wait
+        self.max_restarts = max_restarts
+        self.page = None
+        self.restarts = 0
+        self._lock = threading.RLock()
+
+    def start(self):
+        """启动浏览器并等待手动登录"""
+        self.page = open_page(self.record_file, self.replay_file, self.port, self.user_data_dir)
+
+        print("访问BOSS直聘首页...")
+        self.page.get(HOME_URL)
+
+        wait_for_login(self.page, self.login_wait)
+
+        if self.is_blocked(self.page):
+            self.quit()
+            raise SessionBlocked("检测到账号异常或被封禁")
+        return self.page
+
+    def restart(self):
+        """登录失效时重启浏览器并重新登录"""
+        if self.restarts >= self.max_restarts:
+            raise SessionBlocked(f"登录已失效，重启 {self.restarts} 次后仍未恢复")
+        self.restarts += 1
+        print(f"\n⚠ 登录已失效，重启浏览器（第 {self.restarts} 次）...")
+        self.quit()
+        return self.start()
+
+    @staticmethod
+    def is_blocked(tab):
+        """页面是否显示账号异常或被封禁"""
+        page_text = (tab.html or '').lower()
+        return any(marker in page_text for marker in BLOCKED_MARKERS)
+
+    @staticmethod
+    def is_expired(tab):
+        """标签页是否被跳转到登录页"""
+        url = (tab.url or '').lower()
+        return any(marker in url for marker in LOGIN_URL_MARKERS)
+
+    def new_tab(self, url, listen=None):
+        """
+        在已登录的浏览器中打开新标签页
+
+        登录失效时自动重启浏览器后重试，账号被封禁时抛出 SessionBlocked
+
+        Args:
+            url: 要打开的地址
+            listen: 监听目标列表，非空时在加载页面之前启动持续监听（见 packet_feed.py），
+                    页面首次加载触发的数据包也会进入队列
+        """
+        with self._lock:
+            if self.page is None:
+                self.start()
+
+            while True:
+                if listen:
+                    tab = self.page.new_tab()
+                    open_feed(tab, listen)
+                    tab.get(url)
+                else:
+                    tab = self.page.new_tab(url)
+                tab.wait.doc_loaded(timeout=PAGE_LOAD_TIMEOUT)
+                if self.is_blocked(tab):
+                    self.close_tab(tab)
+                    raise SessionBlocked("检测到账号异常或被封禁")
+                if not self.is_expired(tab):
+                    return tab
+                # 重启会关闭其他线程正在使用的标签页，这些组合会报错并留待断点续传
+                self.close_tab(tab)
+                self.restart()
+
+    @staticmethod
+    def close_tab(tab):
+        """停止标签页的持续监听并关闭标签页"""
+        close_feed(tab)
+        tab.close()
+
+    def quit(self):
+        """关闭浏览器"""
+        with self._lock:
+            if self.page is not None:
+                self.page.quit()
+                self.page = None
@@ -6,194 +6,460 @@
 1. 重新解析 salary_text_raw 计算年薪
 2. 清洗JD中的噪音文本
 3. 去重（company_name_std + job_title + city）
-4. 输出清洗后的CSV
+4. 输出清洗后的CSV（可同时导出 Parquet / 压缩 JSON Lines，见 output_formats.py）
+
+每次读取、清洗、写出 CHUNK_SIZE 条记录，不在内存中保留全部记录；
+--stream 时去重键也保存在磁盘上，内存占用与输入大小无关（适合全国范围合并后的大文件）
+
+--workers N 时用 N 个进程并行解析、清洗和编码输出记录（CSV 输入按记录边界切块），
+主进程按输入顺序去重并写出，结果与单进程逐字节相同
+
+--near-dup 时按 jd_text 检测近似重复的职位（MinHash + LSH，见 near_dup.py），
+输出增加 jd_cluster_id（簇编号）和 jd_canonical（是否为簇的代表记录）两列；
+签名随清洗逐批计算，全部写出后聚类，再在输出文件的每条记录末尾追加这两列（不重新编码记录）
+
+用法：
+    python clean_data.py [--input 输入文件] [--output 输出CSV] [--export jobs.parquet ...]
+    python clean_data.py --input all.csv --stream  # 流式处理，内存占用不随输入增长
+    python clean_data.py --input all.csv --workers 0  # 使用全部 CPU 核心并行清洗
+    python clean_data.py --input all.csv --near-dup   # 标记近似重复的 JD
+    python clean_data.py --store boss_jobs.db     # 从职位数据库增量清洗
+    python clean_data.py --cprofile clean.prof    # 性能分析（见 profiling.py）
 """
 
-import csv
-import re
+import itertools
 import os
-
-def parse_salary(salary_text):
-    """解析薪资文本，计算年薪"""
-    if not salary_text or salary_text == '面议':
-        return {'months': 12, 'min_year': None, 'max_year': None, 'avg_year': None}
-
-    salary_months = 12
-    months_match = re.search(r'(\d+)薪', salary_text)
-    if months_match:
-        salary_months = int(months_match.group(1))
-
-    # 处理 "元/天" 格式
-    if '元/天' in salary_text:
-        daily_match = re.search(r'(\d+\.?\d*)[-~]?(\d+\.?\d*)?元\/天', salary_text)
-        if daily_match:
-            min_daily = float(daily_match.group(1))
-            max_daily = float(daily_match.group(2)) if daily_match.group(2) else min_daily
-            # 转换为年薪：日薪 * 21.75天 * 12月
-            min_year = int(min_daily * 21.75 * 12)
-            max_year = int(max_daily * 21.75 * 12)
-            return {
-                'months': salary_months,
-                'min_year': min_year,
-                'max_year': max_year,
-                'avg_year': (min_year + max_year) // 2
-            }
-
-    # 处理 "K" 或 "万" 格式
-    # 先标准化文本：全角转半角，移除所有空格
-    salary_text_normalized = salary_text.replace('－', '-').replace('～', '~').replace(' ', '')
-
-    # 匹配各种格式
-    # 1. "15-25K" 或 "15-25K·13薪"
-    salary_match = re.search(r'(\d+\.?\d*)[-~](\d+\.?\d*)[kK](?:·?\d+薪)?', salary_text_normalized)
-
-    if not salary_match:
-        # 2. "15K-25K"
-        salary_match = re.search(r'(\d+\.?\d*)[kK][-~](\d+\.?\d*)[kK]', salary_text_normalized)
-
-    if not salary_match:
-        # 3. "30-50万"
-        salary_match = re.search(r'(\d+\.?\d*)[-~](\d+\.?\d*)万', salary_text_normalized)
-
-    if salary_match:
-        min_salary = float(salary_match.group(1))
-        max_salary = float(salary_match.group(2))
-
-        # 检查是否是"万"
-        if '万' in salary_text[:salary_match.end()]:
-            min_salary *= 10
-            max_salary *= 10
-
-        min_year = int(min_salary * 1000 * salary_months)
-        max_year = int(max_salary * 1000 * salary_months)
-
-        return {
-            'months': salary_months,
-            'min_year': min_year,
-            'max_year': max_year,
-            'avg_year': (min_year + max_year) // 2
-        }
-
-    return {'months': salary_months, 'min_year': None, 'max_year': None, 'avg_year': None}
+import sqlite3
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+from output_formats import (iter_rows, open_writer, output_kind, iter_csv_blocks, parse_csv_block,
+                            append_columns)
+from job_store import JobStore
+from jd_cleaner import JDCleaner
+from salary import parse_salary
+import metrics
+import profiling
+
+# 输入文件（CSV / Parquet / JSON Lines）
+INPUT_FILE = 'boss_jobs_progress.csv'
+
+# 输出文件
+OUTPUT_FILE = 'boss_jobs_cleaned_北京2.csv'
+
+# 职位数据库（见 job_store.py），非空时代替 INPUT_FILE，只清洗上次之后新增或变化的职位
+JOB_STORE_FILE = ''
+
+# 同时导出的文件，如 ['boss_jobs_cleaned.parquet', 'boss_jobs_cleaned.jsonl.gz']
+EXPORT_FILES = []
+
+# JD噪音规则文件（JSON，格式见 jd_cleaner.py），为空时使用内置规则
+JD_RULES_FILE = ''
+_jd_cleaner = None
+
+# 每批处理的记录数
+CHUNK_SIZE = 10000
+
+# 流式处理：去重键保存在磁盘上的临时 SQLite 数据库中，内存占用与输入大小无关
+STREAM = False
+
+# 清洗进程数：1 表示在主进程中清洗，0 表示使用全部 CPU 核心
+WORKERS = 1
+
+# 并行清洗 CSV 时每个任务的输入大小（字节）
+TASK_BYTES = 4 * 1024 * 1024
+
+# JD 近似重复检测（见 near_dup.py）：输出增加簇编号和代表记录标记两列
+NEAR_DUP = False
+NEAR_DUP_THRESHOLD = 0.8
+NEAR_DUP_FIELDS = ['jd_cluster_id', 'jd_canonical']
+
+# 运行报告（见 metrics.py），设为空字符串则不写；PROMETHEUS_TEXTFILE 非空时同时写出 Prometheus 文本文件
+METRICS_REPORT_FILE = 'clean_data_report.json'
+PROMETHEUS_TEXTFILE = ''
+
+FIELDNAMES = [
+    'keyword_group', 'search_keyword', 'city', 'job_title',
+    'company_name_raw', 'company_name_std', 'company_type',
+    'salary_text_raw', 'salary_months', 'salary_min_year_rmb',
+    'salary_max_year_rmb', 'salary_avg_year_rmb',
+    'exp_req', 'edu_req', 'jd_text', 'post_date', 'source_url',
+    'collected_at', 'notes'
+]
+
+def get_jd_cleaner():
+    """JD噪音清洗器（按 JD_RULES_FILE 编译一次，见 jd_cleaner.py）"""
+    global _jd_cleaner
+    if _jd_cleaner is None:
+        _jd_cleaner = JDCleaner.from_file(JD_RULES_FILE) if JD_RULES_FILE else JDCleaner()
+    return _jd_cleaner
 
 def clean_jd_text(jd_text):
     """清洗JD中的噪音文本"""
-    if not jd_text:
-        return ''
-
-    # 移除所有噪音模式的变体
-    noise_patterns = [
-        r'微信扫码.*',
-        r'来自.*?直聘',
-        r'BOSS直聘',
-        r'boss报',
-        r'boss分享',
-        r'kanzhun.*',
-        r'举报',
-        r'分享',
-        r'直聘',
-        r'享举',
-        r'\s+boss\s+',
-        r'\s+直聘\s+',
-        r'^\s+',  # 开头空白
-        r'\s+$',  # 结尾空白
+    return get_jd_cleaner().clean(jd_text)
+
+@profiling.section('clean_job')
+def clean_job(job, verbose=False):
+    """清洗一条记录（原地修改）：重新解析薪资、清洗JD、更新备注"""
+    # 解析薪资
+    salary_info = parse_salary(job['salary_text_raw'])
+    if verbose:
+        print(f"\n  薪资文本: '{job['salary_text_raw']}'")
+        print(f"      解析结果: {salary_info}")
+
+    job['salary_months'] = salary_info.months
+    job['salary_min_year_rmb'] = salary_info.min_year
+    job['salary_max_year_rmb'] = salary_info.max_year
+    job['salary_avg_year_rmb'] = salary_info.avg_year
+
+    # 清洗JD
+    original_jd = job['jd_text'][:50] if job['jd_text'] else ''
+    job['jd_text'] = clean_jd_text(job['jd_text'])
+    if verbose and original_jd:
+        print(f"      JD原文: '{original_jd}...'")
+        print(f"      JD清洗: '{job['jd_text'][:50]}...'")
+
+    # 更新notes
+    notes = []
+    if salary_info.avg_year is None:
+        notes.append(f"无法解析薪资: {job['salary_text_raw']}")
+    if not job['jd_text']:
+        notes.append("无JD描述")
+    job['notes'] = '; '.join(notes) if notes else ''
+    return job
+
+class SeenKeys:
+    """
+    去重键集合
+
+    Args:
+        on_disk: 为 True 时保存在 SQLite 临时数据库中（关闭时自动删除），
+                 只占用固定大小的页缓存
+    """
+
+    def __init__(self, on_disk=False):
+        self._keys = None if on_disk else set()
+        self._conn = None
+        if on_disk:
+            # 文件名为空字符串时 SQLite 创建临时数据库文件
+            self._conn = sqlite3.connect('')
+            self._conn.execute('PRAGMA cache_size = -32768')
+            self._conn.execute('CREATE TABLE seen (key TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def add(self, key):
+        """加入去重键，之前没有出现过时返回 True"""
+        if self._keys is not None:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+        cur = self._conn.execute('INSERT OR IGNORE INTO seen VALUES (?)', (key,))
+        return cur.rowcount == 1
+
+    def commit(self):
+        if self._conn is not None:
+            self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+def dedup_key(job):
+    """去重键"""
+    return f"{job['company_name_std']}_{job['job_title']}_{job['city']}"
+
+def iter_chunks(rows, size):
+    """把记录按 size 条分批"""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_input_rows(input_file):
+    """逐条读取输入文件（Parquet / JSON Lines 中的缺失值统一为空字符串，与 CSV 一致）"""
+    for row in iter_rows(input_file):
+        yield {k: '' if v is None else v for k, v in row.items()}
+
+def is_valid_jd(job):
+    """清洗后的 JD 是否有效（超过 50 个字）"""
+    return bool(job['jd_text']) and len(job['jd_text']) > 50
+
+# 一批清洗结果：读取条数、去重后条数、有效薪资/JD条数、各输出文件要写入的内容
+# （encoded 为 True 时是 encode_rows() 编码好的内容，否则是记录本身）、
+# 去重后记录的 JD 签名（--near-dup 时，否则为 None）
+Batch = namedtuple('Batch', ['read', 'cleaned', 'valid_salary', 'valid_jd', 'outputs', 'encoded',
+                             'signatures'])
+
+def jd_signatures(jobs):
+    """一批记录的 JD MinHash 签名（见 near_dup.py）"""
+    import near_dup
+    return near_dup.MinHasher().signatures(job['jd_text'] for job in jobs)
+
+def process_rows(rows, encoders):
+    """
+    清洗进程：清洗一批记录，并按各输出文件的格式编码
+
+    Args:
+        encoders: [(写入类, 字段列表)]，与输出文件一一对应
+
+    Returns:
+        [(去重键, 有效薪资, 有效JD, 输出1的编码, 输出2的编码, ...)]
+    """
+    for job in rows:
+        clean_job(job)
+    encoded = [cls.encode_rows(rows, fieldnames) for cls, fieldnames in encoders]
+    return [
+        (dedup_key(job), bool(job['salary_avg_year_rmb']), is_valid_jd(job), *items)
+        for job, *items in zip(rows, *encoded)
     ]
 
-    cleaned = jd_text
-    for pattern in noise_patterns:
-        cleaned = re.sub(pattern, ' ', cleaned, flags=re.IGNORECASE)
-
-    # 清理多余空白
-    cleaned = re.sub(r'\s+', ' ', cleaned)
-
-    return cleaned.strip()
+def _init_worker(jd_rules_file):
+    """清洗进程的初始化（spawn 方式启动时不会继承命令行参数）"""
+    global JD_RULES_FILE
+    JD_RULES_FILE = jd_rules_file
+
+def _process_task(task, header, encoders, with_signatures=False):
+    """清洗进程：解析一个 CSV 块（或一批已读取的记录），清洗并编码，需要时计算 JD 签名"""
+    if isinstance(task, bytes):
+        task = [{k: '' if v is None else v for k, v in row.items()}
+                for row in parse_csv_block(task, header)]
+    results = process_rows(task, encoders)
+    return len(task), results, jd_signatures(task) if with_signatures else None
+
+def _clean_rows(rows):
+    return [clean_job(job) for job in rows]
+
+def serial_batches(source, writer_count, seen, clean=True):
+    """在主进程中逐批去重、清洗"""
+    verbose = 5 if clean else 0
+    chunks = iter_chunks(source, CHUNK_SIZE)
+    while True:
+        with metrics.timer('stage_seconds', stage='load'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        with metrics.timer('stage_seconds', stage='clean'):
+            kept = []
+            for job in chunk:
+                if not seen.add(dedup_key(job)):
+                    continue
+                if clean:
+                    clean_job(job, verbose=len(kept) < verbose)
+                kept.append(job)
+            seen.commit()
+        verbose = max(0, verbose - len(kept))
+        yield Batch(len(chunk), len(kept),
+                    sum(1 for j in kept if j['salary_avg_year_rmb']),
+                    sum(1 for j in kept if is_valid_jd(j)),
+                    [kept] * writer_count, False,
+                    jd_signatures(kept) if NEAR_DUP else None)
+
+def parallel_batches(input_file, encoders, seen, workers):
+    """
+    多进程解析、清洗和编码，按输入顺序去重
+
+    同一去重键只保留输入中的第一条，结果与单进程相同；
+    同时在处理中的任务不超过 2 × workers 个，内存占用与输入大小无关
+    """
+    if output_kind(input_file) == 'csv':
+        tasks = iter_csv_blocks(input_file, TASK_BYTES)
+        header = next(tasks)
+    else:
+        tasks = iter_chunks(iter_input_rows(input_file), max(1, CHUNK_SIZE // workers))
+        header = None
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(JD_RULES_FILE,)) as pool:
+        pending = deque()
+
+        def take():
+            with metrics.timer('stage_seconds', stage='clean'):
+                count, results, signatures = pending.popleft().result()
+                positions = [i for i, item in enumerate(results) if seen.add(item[0])]
+                seen.commit()
+            kept = [results[i] for i in positions]
+            return Batch(count, len(kept),
+                         sum(1 for item in kept if item[1]),
+                         sum(1 for item in kept if item[2]),
+                         [[item[i] for item in kept] for i in range(3, 3 + len(encoders))], True,
+                         signatures[positions] if signatures is not None else None)
+
+        for task in tasks:
+            pending.append(pool.submit(_process_task, task, header, encoders, NEAR_DUP))
+            if len(pending) >= 2 * workers:
+                yield take()
+        while pending:
+            yield take()
+
+@profiling.section('clean_store')
+def clean_store(store, workers=1):
+    """只清洗职位数据库中上次清洗之后新增或变化的职位，结果写回数据库"""
+    rows, version = store.changed('clean')
+    if workers > 1 and len(rows) > CHUNK_SIZE:
+        print(f"上次清洗之后新增或变化：{len(rows)} 条（{workers} 个进程并行清洗）")
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(JD_RULES_FILE,)) as pool:
+            chunks = iter_chunks((record for _, record in rows), max(1, CHUNK_SIZE // workers))
+            cleaned = [job for chunk in pool.map(_clean_rows, chunks) for job in chunk]
+    else:
+        print(f"上次清洗之后新增或变化：{len(rows)} 条（前5条会显示详情）")
+        cleaned = [clean_job(record, verbose=idx < 5) for idx, (_, record) in enumerate(rows)]
+    store.put_results('clean', [(job_id, job) for (job_id, _), job in zip(rows, cleaned)])
+    store.mark('clean', version)
+
+@profiling.section('near_dup')
+def mark_near_duplicates(paths, signatures):
+    """
+    按 JD 签名把近似重复的职位聚成簇，给各输出文件中的记录追加簇编号和代表记录标记
+
+    Args:
+        signatures: 与输出文件记录顺序相同的各批 JD 签名
+
+    Returns:
+        (簇数, 非代表记录数)
+    """
+    import near_dup
+    cluster_ids, canonical = near_dup.find_clusters(signatures, NEAR_DUP_THRESHOLD)
+    for path in paths:
+        append_columns(path, NEAR_DUP_FIELDS, [cluster_ids, canonical.astype('int64')])
+    return int(cluster_ids.max(initial=0)), int(len(canonical) - canonical.sum())
 
 def main():
-    input_file = 'boss_jobs_progress.csv'
-    output_file = 'boss_jobs_cleaned_北京2.csv'
+    input_file = JOB_STORE_FILE or INPUT_FILE
+    output_file = OUTPUT_FILE
+    workers = WORKERS or os.cpu_count() or 1
+    stats = dict.fromkeys(('read', 'cleaned', 'valid_salary', 'valid_jd'), 0)
+    signatures = []
 
     print(f"正在读取 {input_file}...")
 
-    # 读取数据
-    jobs = []
-    with open(input_file, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            jobs.append(row)
-
-    print(f"原始记录：{len(jobs)} 条")
-
-    # 清洗数据
-    print("正在清洗数据（前5条会显示详情）...")
-    seen = set()
-    cleaned_jobs = []
-
-    for job in jobs:
-        # 去重键
-        dedup_key = f"{job['company_name_std']}_{job['job_title']}_{job['city']}"
-        if dedup_key in seen:
-            continue
-        seen.add(dedup_key)
-
-        # 解析薪资（前5条显示调试信息）
-        salary_info = parse_salary(job['salary_text_raw'])
-        if len(cleaned_jobs) < 5:
-            print(f"\n  [{len(cleaned_jobs)+1}] 薪资文本: '{job['salary_text_raw']}'")
-            print(f"      解析结果: {salary_info}")
-
-        job['salary_months'] = salary_info['months']
-        job['salary_min_year_rmb'] = salary_info['min_year']
-        job['salary_max_year_rmb'] = salary_info['max_year']
-        job['salary_avg_year_rmb'] = salary_info['avg_year']
-
-        # 清洗JD（前5条显示调试信息）
-        original_jd = job['jd_text'][:50] if job['jd_text'] else ''
-        job['jd_text'] = clean_jd_text(job['jd_text'])
-        if len(cleaned_jobs) < 5 and original_jd:
-            print(f"      JD原文: '{original_jd}...'")
-            print(f"      JD清洗: '{job['jd_text'][:50]}...'")
-
-        # 更新notes
-        notes = []
-        if salary_info['avg_year'] is None:
-            notes.append(f"无法解析薪资: {job['salary_text_raw']}")
-        if not job['jd_text']:
-            notes.append("无JD描述")
-        job['notes'] = '; '.join(notes) if notes else ''
-
-        cleaned_jobs.append(job)
-
-    print(f"去重后：{len(cleaned_jobs)} 条")
-
-    # 统计有效数据
-    valid_salary = [j for j in cleaned_jobs if j['salary_avg_year_rmb']]
-    valid_jd = [j for j in cleaned_jobs if j['jd_text'] and len(j['jd_text']) > 50]
-
-    print(f"有效薪资数据：{len(valid_salary)} 条")
-    print(f"有效JD数据：{len(valid_jd)} 条")
-
-    # 保存清洗后的数据
-    print(f"正在保存到 {output_file}...")
-    fieldnames = [
-        'keyword_group', 'search_keyword', 'city', 'job_title',
-        'company_name_raw', 'company_name_std', 'company_type',
-        'salary_text_raw', 'salary_months', 'salary_min_year_rmb',
-        'salary_max_year_rmb', 'salary_avg_year_rmb',
-        'exp_req', 'edu_req', 'jd_text', 'post_date', 'source_url',
-        'collected_at', 'notes'
-    ]
-
-    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(cleaned_jobs)
+    with ExitStack() as stack:
+        seen = SeenKeys(on_disk=STREAM)
+        stack.callback(seen.close)
+        print(f"正在保存到 {output_file}...")
+        writers = [stack.enter_context(open_writer(path, FIELDNAMES))
+                   for path in [output_file] + list(EXPORT_FILES)]
+        encoders = [(type(writer), writer.fieldnames) for writer in writers]
+
+        if JOB_STORE_FILE:
+            # 数据库中的记录已清洗，下面只需去重
+            store = JobStore(JOB_STORE_FILE)
+            stack.callback(store.close)
+            with metrics.timer('stage_seconds', stage='load'):
+                clean_store(store, workers)
+            source = (record for _, record in store.iter_results('clean', CHUNK_SIZE))
+            batches = serial_batches(source, len(writers), seen, clean=False)
+        elif workers > 1:
+            print(f"正在清洗数据（{workers} 个进程并行）...")
+            batches = parallel_batches(input_file, encoders, seen, workers)
+        else:
+            print("正在清洗数据（前5条会显示详情）...")
+            batches = serial_batches(iter_input_rows(input_file), len(writers), seen)
+
+        for batch in batches:
+            # 统计有效数据
+            for key in stats:
+                stats[key] += getattr(batch, key)
+            if batch.signatures is not None:
+                signatures.append(batch.signatures)
+
+            # 保存清洗后的数据
+            with metrics.timer('stage_seconds', stage='write'), profiling.section('export_rows'):
+                for writer, items in zip(writers, batch.outputs):
+                    if batch.encoded:
+                        writer.write_encoded(items)
+                    else:
+                        writer.write_rows(items)
+            print(f"  已处理 {stats['read']} 条，去重后 {stats['cleaned']} 条")
+
+    if NEAR_DUP:
+        print("正在检测近似重复的 JD...")
+        with metrics.timer('stage_seconds', stage='near_dup'):
+            clusters, near_dups = mark_near_duplicates([output_file] + list(EXPORT_FILES), signatures)
+        metrics.gauge('jd_clusters', clusters)
+        metrics.gauge('rows_near_duplicate', near_dups)
+
+    if EXPORT_FILES:
+        print(f"已导出：{', '.join(EXPORT_FILES)}")
+    metrics.inc('rows_read_total', stats['read'])
+    metrics.inc('rows_cleaned_total', stats['cleaned'])
+    metrics.inc('rows_duplicate_total', stats['read'] - stats['cleaned'])
+    metrics.gauge('rows_valid_salary', stats['valid_salary'])
+    metrics.gauge('rows_valid_jd', stats['valid_jd'])
+    if workers <= 1:
+        # 并行清洗时薪资解析在各清洗进程中，主进程的缓存统计没有意义
+        cache = parse_salary.cache_info()
+        metrics.gauge('salary_cache_hits', cache.hits)
+        metrics.gauge('salary_cache_misses', cache.misses)
 
     print(f"✓ 清洗完成！")
-    print(f"  原始数据：{len(jobs)} 条")
-    print(f"  清洗后：{len(cleaned_jobs)} 条")
-    print(f"  有效薪资：{len(valid_salary)} 条 ({len(valid_salary)/len(cleaned_jobs)*100:.1f}%)")
-    print(f"  有效JD：{len(valid_jd)} 条 ({len(valid_jd)/len(cleaned_jobs)*100:.1f}%)")
+    print(f"  原始数据：{stats['read']} 条")
+    print(f"  清洗后：{stats['cleaned']} 条")
+    total = stats['cleaned'] or 1
+    print(f"  有效薪资：{stats['valid_salary']} 条 ({stats['valid_salary']/total*100:.1f}%)")
+    print(f"  有效JD：{stats['valid_jd']} 条 ({stats['valid_jd']/total*100:.1f}%)")
+    if NEAR_DUP:
+        print(f"  近似重复：{near_dups} 条（{clusters} 个JD簇，jd_canonical=1 的记录为各簇代表）")
     print(f"  输出文件：{output_file}")
 
+    if METRICS_REPORT_FILE or PROMETHEUS_TEXTFILE:
+        elapsed = metrics.registry.elapsed()
+        metrics.write_report(
+            METRICS_REPORT_FILE, PROMETHEUS_TEXTFILE,
+            derived={'rows_per_second': round(stats['read'] / elapsed, 1) if elapsed else 0},
+            config={'input': input_file, 'output': output_file, 'exports': list(EXPORT_FILES),
+                    'stream': STREAM, 'chunk_size': CHUNK_SIZE, 'workers': workers,
+                    'near_dup_threshold': NEAR_DUP_THRESHOLD if NEAR_DUP else None},
+        )
+        print(f"  运行报告：{METRICS_REPORT_FILE or PROMETHEUS_TEXTFILE}")
+
+def parse_args(argv=None):
+    """命令行参数覆盖上面的配置（不修改源文件）"""
+    import argparse
+    global INPUT_FILE, OUTPUT_FILE, EXPORT_FILES, JOB_STORE_FILE
+    global METRICS_REPORT_FILE, PROMETHEUS_TEXTFILE, JD_RULES_FILE, STREAM, CHUNK_SIZE, WORKERS
+    global NEAR_DUP, NEAR_DUP_THRESHOLD
+
+    parser = argparse.ArgumentParser(description='职位数据清洗')
+    parser.add_argument('--input', default=INPUT_FILE, help='输入文件（CSV / Parquet / JSON Lines）')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='输出文件')
+    parser.add_argument('--store', default=JOB_STORE_FILE,
+                        help='职位数据库，指定时代替 --input，只清洗新增或变化的职位')
+    parser.add_argument('--export', action='append', default=list(EXPORT_FILES),
+                        help='同时导出的文件（*.parquet / *.jsonl.gz），可重复指定')
+    parser.add_argument('--jd-rules', default=JD_RULES_FILE,
+                        help='JD噪音规则文件（JSON，格式见 jd_cleaner.py），默认使用内置规则')
+    parser.add_argument('--stream', action='store_true', default=STREAM,
+                        help='流式处理：去重键也保存在磁盘上，内存占用不随输入增长')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f'每批处理的记录数（默认 {CHUNK_SIZE}）')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help='清洗进程数，0 表示使用全部 CPU 核心（默认 %(default)s）')
+    parser.add_argument('--near-dup', action='store_true', default=NEAR_DUP,
+                        help='检测近似重复的 JD，输出增加 jd_cluster_id 和 jd_canonical 两列')
+    parser.add_argument('--near-dup-threshold', type=float, default=NEAR_DUP_THRESHOLD,
+                        help='判定为近似重复的最低相似度（默认 %(default)s）')
+    parser.add_argument('--metrics-report', default=METRICS_REPORT_FILE,
+                        help='运行报告（JSON），空字符串表示不写')
+    parser.add_argument('--prometheus-textfile', default=PROMETHEUS_TEXTFILE,
+                        help='同时写出的 Prometheus 文本文件')
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    METRICS_REPORT_FILE = args.metrics_report
+    PROMETHEUS_TEXTFILE = args.prometheus_textfile
+    INPUT_FILE = args.input
+    OUTPUT_FILE = args.output
+    EXPORT_FILES = args.export
+    JOB_STORE_FILE = args.store
+    JD_RULES_FILE = args.jd_rules
+    STREAM = args.stream
+    CHUNK_SIZE = max(1, args.chunk_size)
+    WORKERS = max(0, args.workers)
+    NEAR_DUP = args.near_dup
+    NEAR_DUP_THRESHOLD = args.near_dup_threshold
+    return args
+
 if __name__ == '__main__':
-    main()
+    profiling.run(main, parse_args())
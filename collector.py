@@ -0,0 +1,197 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+统一采集入口
+
+关键词、城市、页数上限和输出路径都从命令行参数或 JSON 配置文件读取，
+不再修改源文件，同一台机器可以同时运行多个互不干扰的采集实例：
+
+    python collector.py -k python -k 数据分析 -c 北京 -c 上海 -o py.csv
+    python collector.py --config jobs_shanghai.json --port 9333 --profile ./profile_sh
+    python collector.py -k python -c 北京 --cprofile collect.prof --flamegraph collect.folded
+
+配置文件示例（键名与命令行参数相同，命令行参数优先）：
+
+    {
+        "keywords": ["python"],
+        "cities": {"北京": "101010100", "上海": "101020100"},
+        "max_pages": 10,
+        "output": "py.csv",
+        "output_format": "full",
+        "exports": ["py.parquet", "py.jsonl.gz"]
+    }
+
+同时运行多个实例时，每个实例应使用不同的 output（断点和节奏状态文件
+默认按 output 命名）以及不同的浏览器端口和用户数据目录。
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import profiling
+
+# 常用城市代码
+CITY_CODES = {
+    '北京': '101010100',
+    '上海': '101020100',
+    '深圳': '101280600',
+    '杭州': '101210100',
+    '广州': '101280100',
+    '成都': '101270100',
+}
+
+# 配置项 -> batch_spider_improved 的配置常量
+SETTINGS = {
+    'list_mode': 'LIST_MODE',
+    'max_pages': 'MAX_PAGES',
+    'max_scrolls': 'MAX_SCROLLS',
+    'output': 'OUTPUT_FILE',
+    'output_format': 'OUTPUT_FORMAT',
+    'exports': 'EXPORT_FILES',
+    'store': 'JOB_STORE_FILE',
+    'raw_archive': 'RAW_ARCHIVE_DIR',
+    'raw_archive_codec': 'RAW_ARCHIVE_CODEC',
+    'progress_file': 'PROGRESS_FILE',
+    'cache_file': 'DETAIL_CACHE_FILE',
+    'pacing_metrics_file': 'PACING_METRICS_FILE',
+    'metrics_report': 'METRICS_REPORT_FILE',
+    'prometheus_textfile': 'PROMETHEUS_TEXTFILE',
+    'parallel_tabs': 'PARALLEL_TABS',
+    'request_rate': 'REQUEST_RATE',
+    'record': 'RECORD_FILE',
+    'replay': 'REPLAY_FILE',
+    'port': 'BROWSER_PORT',
+    'profile': 'BROWSER_PROFILE',
+    'confirm': 'CONFIRM_START',
+}
+
+
+def parse_city(value):
+    """解析城市参数：城市名、城市代码或 名称=代码"""
+    if '=' in value:
+        name, code = value.split('=', 1)
+        return name.strip(), code.strip()
+    if value in CITY_CODES:
+        return value, CITY_CODES[value]
+    for name, code in CITY_CODES.items():
+        if code == value:
+            return name, code
+    if value.isdigit():
+        return value, value
+    raise ValueError(f"未知城市: {value}（可使用 名称=代码 的形式）")
+
+
+def load_config(config_file):
+    """读取 JSON 配置文件"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    unknown = set(config) - set(SETTINGS) - {'keywords', 'cities'}
+    if unknown:
+        raise ValueError(f"配置文件中有未知配置项: {', '.join(sorted(unknown))}")
+    return config
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='BOSS直聘职位采集（关键词 × 城市）',
+        epilog='未指定的配置项使用 batch_spider_improved.py 中的默认值',
+    )
+    parser.add_argument('--config', help='JSON 配置文件，命令行参数优先')
+    parser.add_argument('-k', '--keyword', dest='keywords', action='append',
+                        help='搜索关键词，可重复指定')
+    parser.add_argument('-c', '--city', dest='cities', action='append',
+                        help='城市名、城市代码或 名称=代码，可重复指定')
+    parser.add_argument('--list-mode', choices=['fetch', 'scroll'],
+                        help='列表获取方式：逐页请求 / 模拟滚动')
+    parser.add_argument('--max-pages', type=int, help='逐页请求时每个组合的页数上限')
+    parser.add_argument('--max-scrolls', type=int, help='滚动模式下每个组合的滚动次数')
+    parser.add_argument('-o', '--output', help='输出 CSV 文件')
+    parser.add_argument('--format', dest='output_format', choices=['full', 'simple'],
+                        help='输出格式：full 完整字段 / simple 中文字段（供 analyze_tech_stack.py 使用）')
+    parser.add_argument('--export', dest='exports', action='append',
+                        help='同时导出的文件（*.parquet / *.jsonl.gz），可重复指定')
+    parser.add_argument('--store', help='职位数据库（SQLite），空字符串表示不写入')
+    parser.add_argument('--raw-archive', help='原始响应归档目录（见 reprocess.py），空字符串表示不保存')
+    parser.add_argument('--raw-archive-codec', choices=['gzip', 'zstd'],
+                        help='原始响应归档的压缩方式（zstd 需要安装 zstandard）')
+    parser.add_argument('--progress-file', help='断点文件，默认按输出文件命名')
+    parser.add_argument('--cache-file', help='职位详情缓存数据库，空字符串表示不使用缓存')
+    parser.add_argument('--pacing-metrics-file', help='请求间隔状态文件，默认按输出文件命名')
+    parser.add_argument('--metrics-report', help='运行报告（JSON），默认按输出文件命名，空字符串表示不写')
+    parser.add_argument('--prometheus-textfile', help='同时写出的 Prometheus 文本文件')
+    parser.add_argument('--parallel-tabs', type=int, help='并行采集的标签页数')
+    parser.add_argument('--request-rate', type=float, help='全局请求速率上限（次/秒）')
+    parser.add_argument('--record', help='录制归档文件')
+    parser.add_argument('--replay', help='回放归档文件（不启动浏览器）')
+    parser.add_argument('--port', type=int, help='浏览器调试端口')
+    parser.add_argument('--profile', help='浏览器用户数据目录')
+    parser.add_argument('-y', '--yes', dest='confirm', action='store_false', default=None,
+                        help='不等待按 Enter 确认，直接开始采集')
+    profiling.add_arguments(parser)
+    return parser
+
+
+def build_settings(argv=None):
+    """合并配置文件和命令行参数，返回 batch_spider_improved 的配置常量"""
+    args = build_parser().parse_args(argv)
+    config = load_config(args.config) if args.config else {}
+
+    # 命令行参数覆盖配置文件
+    for key, value in vars(args).items():
+        if key != 'config' and value is not None:
+            config[key] = value
+
+    settings = {SETTINGS[key]: value for key, value in config.items() if key in SETTINGS}
+
+    keywords = config.get('keywords')
+    cities = config.get('cities')
+    if keywords or cities:
+        import batch_spider_improved as spider
+        search = dict(spider.SEARCH_CONFIGS)
+        if keywords:
+            search['keywords'] = list(keywords)
+        if cities:
+            if isinstance(cities, dict):
+                search['cities'] = dict(cities)
+            else:
+                search['cities'] = dict(parse_city(str(c)) for c in cities)
+        settings['SEARCH_CONFIGS'] = search
+
+    # 断点、节奏状态和运行报告文件默认跟随输出文件，不同实例互不覆盖
+    output = settings.get('OUTPUT_FILE')
+    if output:
+        stem = os.path.splitext(output)[0]
+        settings.setdefault('PROGRESS_FILE', stem + '.progress.json')
+        settings.setdefault('PACING_METRICS_FILE', stem + '.pacing.json')
+        settings.setdefault('METRICS_REPORT_FILE', stem + '.report.json')
+    return settings
+
+
+def run(settings):
+    """按给定配置运行一次采集"""
+    import batch_spider_improved as spider
+    spider.configure(**settings)
+    spider.main()
+
+
+def main(argv=None):
+    try:
+        settings = build_settings(argv)
+    except (OSError, ValueError) as e:
+        print(f"✗ 配置错误: {e}")
+        sys.exit(2)
+    profiling.run(lambda: run(settings), build_parser().parse_args(argv))
+
+
+if __name__ == '__main__':
+    import batch_spider_improved as spider
+    try:
+        main()
+    except KeyboardInterrupt:
+        spider.signal_handler(None, None)
+    except Exception as e:
+        print(f"\n✗ 发生错误: {e}")
+        import traceback
+        traceback.print_exc()
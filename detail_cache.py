@@ -0,0 +1,112 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+职位详情本地缓存模块
+
+以 encryptJobId 为键，把详情接口返回的 jobInfo 保存到本地 SQLite 数据库，
+同时记录获取时间和列表接口中的 lastUpdateDate。重复运行采集时，
+未过期且未更新的职位直接读取缓存，只有新职位和有变化的职位才会请求网络。
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+
+class DetailCache:
+    """
+    职位详情缓存
+
+    Args:
+        db_file: SQLite 数据库文件路径
+        ttl_days: 缓存有效期（天），超过有效期的记录视为未命中
+        max_entries: 最多保留的记录数，超出时淘汰最早获取的记录
+    """
+
+    # 每写入多少条记录检查一次容量
+    EVICT_EVERY = 200
+
+    def __init__(self, db_file, ttl_days=7, max_entries=100000):
+        self.db_file = db_file
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS job_details (
+                job_id TEXT PRIMARY KEY,
+                job_info TEXT NOT NULL,
+                last_update TEXT,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_job_details_fetched_at ON job_details (fetched_at)'
+        )
+        self._conn.commit()
+        self.evict()
+
+    def get(self, job_id, last_update=''):
+        """
+        读取缓存的 jobInfo
+
+        记录不存在、已过期，或 lastUpdateDate 与列表接口不一致时返回 None
+        """
+        if not job_id:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT job_info, last_update, fetched_at FROM job_details WHERE job_id = ?',
+                (job_id,)
+            ).fetchone()
+
+        if (not row
+                or time.time() - row[2] > self.ttl
+                or (last_update and row[1] and last_update != row[1])):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, job_id, job_info, last_update=''):
+        """写入（或覆盖）一条详情记录"""
+        if not job_id or not job_info:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO job_details (job_id, job_info, last_update, fetched_at) '
+                'VALUES (?, ?, ?, ?)',
+                (job_id, json.dumps(job_info, ensure_ascii=False), last_update or '', time.time())
+            )
+            self._conn.commit()
+            self._puts += 1
+
+        if self._puts % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """删除过期记录，并按获取时间淘汰超出容量的记录"""
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM job_details WHERE fetched_at < ?',
+                (time.time() - self.ttl,)
+            )
+            count = self._conn.execute('SELECT COUNT(*) FROM job_details').fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    'DELETE FROM job_details WHERE job_id IN ('
+                    'SELECT job_id FROM job_details ORDER BY fetched_at ASC LIMIT ?)',
+                    (count - self.max_entries,)
+                )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
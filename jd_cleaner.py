@@ -0,0 +1,241 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+职位描述噪音清洗引擎
+
+原来的 clean_jd_text 对每条职位描述依次执行十几次 re.sub，其中 微信扫码.*、
+kanzhun.* 等规则每次都要扫描整段文本。这里把全部噪音规则编译成一个正则，
+一次扫描删除所有噪音，再做一次空白归一化，结果与逐条替换完全一致。
+
+规则按列表顺序确定优先级（与逐条替换的顺序相同），共四种：
+
+    {"cut": "微信扫码"}             从标记删除到行尾
+    {"span": ["来自", "直聘"]}      删除同一行内从开始标记到最近的结束标记
+    {"literal": "举报"}             删除文本
+    {"word": "boss"}                删除前后都是空白的独立单词（在其他规则之后执行）
+
+匹配均不区分大小写。规则可以从 JSON 文件读取（规则列表，或 {"rules": [...]}）：
+
+    cleaner = JDCleaner.from_file('jd_rules.json')
+    cleaner.clean(jd_text)
+
+单次扫描与逐条替换等价的做法：
+- 优先级低的规则在匹配位置之后与优先级高的规则重叠时（如 享举 与 举报），
+  在重叠位置加否定前瞻，让位给优先级高的规则
+- span 规则的中间部分不跨越优先级更高的 cut 标记
+- word 规则受前面规则删除后留下的空白影响，在分词后按逐条替换的方式处理
+"""
+
+import itertools
+import json
+import re
+
+# 默认噪音规则（与原 clean_data.clean_jd_text 的顺序相同，
+# 开头/结尾空白和多余空白由最后的空白归一化处理）
+DEFAULT_RULES = [
+    {'cut': '微信扫码'},
+    {'span': ['来自', '直聘']},
+    {'literal': 'BOSS直聘'},
+    {'literal': 'boss报'},
+    {'literal': 'boss分享'},
+    {'cut': 'kanzhun'},
+    {'literal': '举报'},
+    {'literal': '分享'},
+    {'literal': '直聘'},
+    {'literal': '享举'},
+    {'word': 'boss'},
+    {'word': '直聘'},
+]
+
+RULE_KINDS = ('cut', 'span', 'literal', 'word')
+
+
+def load_rules(rules_file):
+    """从 JSON 文件读取规则列表"""
+    with open(rules_file, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    if isinstance(rules, dict):
+        rules = rules.get('rules', [])
+    return rules
+
+
+def _same_ignorecase(a, b):
+    """两段文本在 re.IGNORECASE 下是否相同"""
+    return re.fullmatch(re.escape(a), b, re.IGNORECASE) is not None
+
+
+def _can_overlap(text, offset, marker):
+    """text 从 offset 开始的部分能否与以 marker 开头的匹配重叠"""
+    n = min(len(text) - offset, len(marker))
+    return _same_ignorecase(text[offset:offset + n], marker[:n])
+
+
+def _case_variants(chars):
+    """
+    re.IGNORECASE 下与每个字符等价的全部字符 {字符: 等价字符}
+
+    带 IGNORECASE 的正则无法使用首字符预筛选，扫描中文长文本要慢好几倍，
+    所以把字母展开成字符类（如 s -> [Ssſ]），不区分大小写的结果与 IGNORECASE 相同
+    """
+    chars = sorted(set(chars))
+    if not chars:
+        return {}
+    variants = {c: [] for c in chars}
+    pattern = re.compile('[' + ''.join(re.escape(c) for c in chars) + ']', re.IGNORECASE)
+    # 大小写等价的字符总在同一个平面（BMP / 辅助平面）内
+    planes = {range(0x10000) if ord(c) < 0x10000 else range(0x10000, 0x110000) for c in chars}
+    for plane in planes:
+        for i in plane:
+            ch = chr(i)
+            if pattern.match(ch):
+                for c in chars:
+                    if c == ch or _same_ignorecase(c, ch):
+                        variants[c].append(ch)
+    return {c: ''.join(v) for c, v in variants.items()}
+
+
+class JDCleaner:
+    """
+    编译后的噪音清洗器
+
+    Args:
+        rules: 规则列表，默认 DEFAULT_RULES
+    """
+
+    def __init__(self, rules=None):
+        self.rules = [self._parse_rule(r) for r in (rules if rules is not None else DEFAULT_RULES)]
+
+        kinds = [kind for kind, _ in self.rules]
+        if 'word' in kinds and any(k != 'word' for k in kinds[kinds.index('word'):]):
+            raise ValueError("word 规则必须放在其他规则之后")
+
+        texts = [''.join(v) if kind == 'span' else v for kind, v in self.rules]
+        self._variants = _case_variants(''.join(texts))
+
+        compiled = []
+        for i, (kind, value) in enumerate(self.rules):
+            if kind == 'word':
+                continue
+            higher = [r for r in self.rules[:i] if r[0] != 'word']
+            compiled.append(self._compile_rule(kind, value, higher, compiled))
+        self._matcher = re.compile('|'.join(compiled)) if compiled else None
+
+        # word 规则按整个单词比较，预先生成所有大小写写法
+        self._words = [
+            frozenset(map(''.join, itertools.product(*(self._variants[c] for c in value))))
+            for kind, value in self.rules if kind == 'word'
+        ]
+        self._word_forms = frozenset().union(*self._words)
+
+    @classmethod
+    def from_file(cls, rules_file):
+        return cls(load_rules(rules_file))
+
+    @staticmethod
+    def _parse_rule(rule):
+        if not isinstance(rule, dict) or len(rule) != 1:
+            raise ValueError(f"无效的规则: {rule!r}")
+        kind, value = next(iter(rule.items()))
+        if kind not in RULE_KINDS:
+            raise ValueError(f"未知的规则类型: {kind}（可选 {', '.join(RULE_KINDS)}）")
+        if kind == 'span':
+            if (not isinstance(value, (list, tuple)) or len(value) != 2
+                    or not all(isinstance(v, str) and v for v in value)):
+                raise ValueError(f"span 规则需要 [开始标记, 结束标记]: {rule!r}")
+            return kind, tuple(value)
+        if not isinstance(value, str) or not value or any(c.isspace() for c in value):
+            raise ValueError(f"{kind} 规则需要不含空白的非空文本: {rule!r}")
+        return kind, value
+
+    def _char(self, c):
+        """单个字符的正则（字母展开为不区分大小写的字符类）"""
+        variants = self._variants.get(c)
+        if variants is None or len(variants) < 2:
+            return re.escape(c)
+        return '[' + ''.join(re.escape(v) for v in variants) + ']'
+
+    def _literal(self, text):
+        return ''.join(self._char(c) for c in text)
+
+    def _first_char_alternatives(self, pattern, first):
+        """
+        把开头的字符类拆成多个以单个字符开头的分支
+
+        每个分支都以普通字符开头时，re 可以先按首字符跳过不可能匹配的位置
+        """
+        return '|'.join(re.escape(v) + pattern for v in self._variants.get(first) or first)
+
+    @staticmethod
+    def _marker(kind, value):
+        """规则匹配开头的固定文本"""
+        return value[0] if kind == 'span' else value
+
+    def _compile_rule(self, kind, value, higher, compiled):
+        """
+        编译一条规则：在与优先级更高的规则可能重叠的位置加否定前瞻
+
+        Args:
+            higher: 优先级更高的规则 [(kind, value)]
+            compiled: 这些规则已编译的正则（与 higher 一一对应）
+        """
+        head = self._marker(kind, value)
+        parts = []
+        for offset in range(1, len(head)):
+            guards = [
+                compiled[j] for j, (h_kind, h_value) in enumerate(higher)
+                if _can_overlap(head, offset, self._marker(h_kind, h_value))
+            ]
+            if guards:
+                parts.append('(?!' + '|'.join(guards) + ')')
+            parts.append(self._char(head[offset]))
+        pattern = ''.join(parts)
+
+        if kind == 'cut':
+            return self._first_char_alternatives(pattern + '.*', head[0])
+        if kind == 'span':
+            start, end = value
+            for h_kind, h_value in higher:
+                if h_kind == 'literal' and (
+                        re.search(re.escape(start), h_value, re.IGNORECASE)
+                        or re.search(re.escape(end), h_value, re.IGNORECASE)):
+                    raise ValueError(f"优先级更高的 literal 规则 {h_value!r} 包含 span 规则的标记，"
+                                     "无法单次扫描，请调整规则顺序")
+            cuts = [self._literal(h_value) for h_kind, h_value in higher if h_kind == 'cut']
+            inner = f"(?:(?!{'|'.join(cuts)}).)" if cuts else '.'
+            return self._first_char_alternatives(f'{pattern}{inner}*?{self._literal(end)}', head[0])
+        return self._first_char_alternatives(pattern, head[0])
+
+    def _remove_words(self, text, words):
+        """按逐条执行 \\s+word\\s+ 替换的方式删除独立单词，并归一化空白"""
+        lead = text[:1].isspace()
+        trail = text[-1:].isspace()
+        for word in self._words:
+            kept = []
+            # 上一个单词被删除时，它后面的空白已被该次匹配占用
+            consumed = False
+            last = len(words) - 1
+            removed_first = removed_last = False
+            for i, w in enumerate(words):
+                if (not consumed and (i > 0 or lead) and (i < last or trail)
+                        and w in word):
+                    consumed = True
+                    removed_first = removed_first or i == 0
+                    removed_last = removed_last or i == last
+                    continue
+                consumed = False
+                kept.append(w)
+            words = kept
+            lead = lead or removed_first
+            trail = trail or removed_last
+        return ' '.join(words)
+
+    def clean(self, jd_text):
+        """清洗一条职位描述"""
+        if not jd_text:
+            return ''
+        if self._matcher is not None:
+            jd_text = self._matcher.sub(' ', jd_text)
+        words = jd_text.split()
+        if self._word_forms and not self._word_forms.isdisjoint(words):
+            return self._remove_words(jd_text, words)
+        return ' '.join(words)
@@ -0,0 +1,145 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+采集过程中的职位记录
+
+长时间、多城市采集时，每个职位原来是一个约 30 个键的字典，整个运行期间
+都保留在内存中。JobRecord 用 __slots__ 固定字段，不再为每条记录分配字典；
+城市、学历、经验等取值种类很少的字段使用 sys.intern 共享同一个字符串对象。
+
+JobRecord 支持与字典相同的 record['key']、record.get()、in、keys()/items()，
+采集、保存、输出代码无需区分两者。职位描述等大字段写入输出日志和职位数据库之后
+用 release_payload() 释放（原始响应已保存在 raw_archive.py 的归档中），
+内存中只保留去重和统计需要的字段。
+"""
+
+import sys
+
+# 固定字段（列表接口解析结果 + enrich_job 补充的字段 + 职位描述）
+FIELDS = (
+    'keyword', 'search_keyword', 'keyword_group', 'city', 'job_title',
+    'company_name_raw', 'company_name_std', 'company_type',
+    'salary_text_raw', 'salary_months', 'salary_min_year_rmb',
+    'salary_max_year_rmb', 'salary_avg_year_rmb', '_salary_notes',
+    'exp_req', 'edu_req', 'jd_text', 'post_date', 'source_url',
+    'collected_at', 'notes',
+    '_raw_nature', '_raw_scale', '_raw_district', '_raw_business', '_raw_industry',
+    '_raw_skills', '_raw_welfare',
+    '_security_id', '_lid', '_job_id', '_dedup_key',
+)
+
+# 取值种类很少、在大量记录之间重复的字段
+INTERNED_FIELDS = frozenset({
+    'keyword', 'search_keyword', 'keyword_group', 'city', 'company_type',
+    'salary_text_raw', 'exp_req', 'edu_req', 'post_date', 'collected_at', '_salary_notes',
+    '_raw_nature', '_raw_scale', '_raw_district', '_raw_business', '_raw_industry', '_lid',
+})
+
+# 保存之后不再需要、可以释放的大字段
+PAYLOAD_FIELDS = ('jd_text', '_raw_skills', '_raw_welfare', 'notes')
+
+_FIELD_SET = frozenset(FIELDS)
+
+
+class JobRecord:
+    """
+    紧凑的职位记录（行为与字典相同）
+
+    未知字段保存在按需创建的 _extra 字典中，不会丢失
+    """
+
+    __slots__ = FIELDS + ('_extra',)
+
+    def __init__(self, data=(), **kwargs):
+        for key, value in (data.items() if hasattr(data, 'items') else data):
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        extra = self._get_extra()
+        if extra is None or key not in extra:
+            raise KeyError(key)
+        return extra[key]
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if key in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+            return
+        extra = self._get_extra()
+        if extra is None:
+            extra = self._extra = {}
+        extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def _get_extra(self):
+        try:
+            return self._extra
+        except AttributeError:
+            return None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        if key in _FIELD_SET:
+            delattr(self, key)
+        else:
+            del self._extra[key]
+        return value
+
+    def keys(self):
+        keys = [k for k in FIELDS if hasattr(self, k)]
+        extra = self._get_extra()
+        if extra:
+            keys.extend(extra)
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def to_dict(self):
+        """转换为普通字典（写入断点文件等需要 JSON 的场合）"""
+        return dict(self.items())
+
+    def release_payload(self):
+        """释放已保存的大字段（职位描述、技能和福利标签、备注）"""
+        for key in PAYLOAD_FIELDS:
+            if hasattr(self, key):
+                delattr(self, key)
+
+    def __repr__(self):
+        return f"JobRecord({self.to_dict()!r})"
+
+
+def as_record(job):
+    """把字典转换为 JobRecord，已经是 JobRecord 时原样返回"""
+    return job if isinstance(job, JobRecord) else JobRecord(job)
@@ -0,0 +1,201 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+追加式日志输出模块（两个爬虫共用）
+
+采集过程中每条新增或变化的记录只追加写入日志文件（<输出文件>.journal），
+按记录数或时间间隔批量刷盘；只有在检查点和退出时才把日志压缩成最终 CSV。
+写入 CSV 仍然使用临时文件 + 原子替换，日志在压缩成功之前一直保留，
+程序崩溃后可以从日志恢复数据：
+
+    python job_sink.py boss_jobs_progress.csv
+
+生成 CSV 时还可以同时导出 Parquet / 压缩 JSON Lines（见 output_formats.py）。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+from output_formats import export_rows
+
+
+class JournalSink:
+    """
+    追加式日志输出
+
+    Args:
+        output_file: 最终 CSV 文件
+        fieldnames: CSV 字段
+        encoding: CSV 编码
+        flush_every: 缓冲多少条记录后刷盘
+        flush_interval: 距上次刷盘超过多少秒时刷盘
+        checkpoint_interval: 距上次检查点超过多少秒时自动生成 CSV，0 表示不自动生成
+        resume: 是否接着上次未完成的日志继续写（否则丢弃旧日志）
+        exports: 生成 CSV 时同时导出的文件（*.parquet / *.jsonl.gz / *.jsonl）
+    """
+
+    def __init__(self, output_file, fieldnames, encoding='utf-8-sig',
+                 flush_every=50, flush_interval=5, checkpoint_interval=300, resume=True,
+                 exports=()):
+        self.output_file = output_file
+        self.exports = list(exports)
+        self.journal_file = output_file + '.journal'
+        self.fieldnames = list(fieldnames)
+        self.encoding = encoding
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.checkpoint_interval = checkpoint_interval
+
+        # 主键 -> 最近一次写入内容的哈希，用于跳过未变化的记录
+        self._index = {}
+        self._buffer = []
+        self._lock = threading.RLock()
+        self._last_flush = time.monotonic()
+        self._last_checkpoint = time.monotonic()
+
+        if os.path.exists(self.journal_file):
+            if resume:
+                for key, row in self._read_journal():
+                    self._index[key] = self._digest(row)
+            else:
+                os.remove(self.journal_file)
+        self._seq = len(self._index)
+        self._f = open(self.journal_file, 'a', encoding='utf-8')
+
+    def _digest(self, row):
+        return hash(tuple(row.get(k) for k in self.fieldnames))
+
+    def _read_journal(self):
+        """逐条读取日志，跳过崩溃时写了一半的行"""
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                yield entry['k'], entry['r']
+
+    def write(self, record, key=None):
+        """
+        写入一条记录
+
+        Args:
+            record: 记录字典，只保留 fieldnames 中的字段
+            key: 记录主键，同一主键后写入的内容覆盖先写入的；None 表示总是新增
+
+        Returns:
+            记录有变化并写入日志时返回 True
+        """
+        row = {k: record.get(k, '') for k in self.fieldnames}
+        with self._lock:
+            if key is None:
+                key = self._seq
+                self._seq += 1
+            digest = self._digest(row)
+            if self._index.get(key) == digest:
+                return False
+            self._index[key] = digest
+            self._buffer.append(json.dumps({'k': key, 'r': row}, ensure_ascii=False))
+
+            now = time.monotonic()
+            if (len(self._buffer) >= self.flush_every
+                    or now - self._last_flush >= self.flush_interval):
+                self.flush()
+            if self.checkpoint_interval and now - self._last_checkpoint >= self.checkpoint_interval:
+                self.checkpoint()
+            return True
+
+    def flush(self):
+        """把缓冲区的记录写入日志并落盘"""
+        with self._lock:
+            if self._buffer:
+                self._f.write('\n'.join(self._buffer) + '\n')
+                self._buffer = []
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self._last_flush = time.monotonic()
+
+    def checkpoint(self):
+        """把日志压缩成最终 CSV 和导出文件（临时文件 + 原子替换）"""
+        with self._lock:
+            self.flush()
+            compact_journal(self.journal_file, self.output_file, self.fieldnames, self.encoding,
+                            self.exports)
+            self._last_checkpoint = time.monotonic()
+
+    def keys(self):
+        """已写入的全部记录主键（包括从上次日志恢复的）"""
+        with self._lock:
+            return list(self._index.keys())
+
+    def __len__(self):
+        return len(self._index)
+
+    def close(self):
+        """生成最终 CSV 并删除日志"""
+        with self._lock:
+            if self._f is None:
+                return
+            self.checkpoint()
+            self._f.close()
+            self._f = None
+            os.remove(self.journal_file)
+
+
+def compact_journal(journal_file, output_file, fieldnames, encoding='utf-8-sig', exports=()):
+    """
+    按主键合并日志（保留首次出现的顺序、最后一次写入的内容）并写入 CSV，
+    同时写入 exports 中的 Parquet / JSON Lines 文件
+    """
+    rows = {}
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            rows[entry['k']] = entry['r']
+
+    export_rows(rows.values(), output_file, fieldnames, encoding)
+    for path in exports:
+        try:
+            export_rows(rows.values(), path, fieldnames)
+        except Exception as e:
+            # 导出失败（如未安装 pyarrow）不影响 CSV 和日志
+            print(f"⚠ 导出 {path} 失败: {e}")
+    return len(rows)
+
+
+def recover(output_file, encoding='utf-8-sig'):
+    """从崩溃后残留的日志恢复 CSV"""
+    journal_file = output_file + '.journal'
+    if not os.path.exists(journal_file):
+        print(f"没有找到日志文件: {journal_file}")
+        return 0
+
+    # 字段顺序取日志中第一条完整记录
+    fieldnames = None
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                fieldnames = list(json.loads(line)['r'].keys())
+                break
+            except ValueError:
+                continue
+    if not fieldnames:
+        print(f"日志文件为空: {journal_file}")
+        return 0
+
+    count = compact_journal(journal_file, output_file, fieldnames, encoding)
+    print(f"✓ 已从 {journal_file} 恢复 {count} 条记录到 {output_file}")
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("用法: python job_sink.py <输出CSV文件> [编码]")
+        sys.exit(1)
+    recover(sys.argv[1], *sys.argv[2:3])
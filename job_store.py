@@ -0,0 +1,265 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+职位数据库模块（采集、清洗、分析共用）
+
+所有职位以 encryptJobId 为主键保存在一个 SQLite 数据库中，重复采集时
+只有内容有变化的记录才会被更新，并获得新的版本号。每个阶段记录自己
+已经处理到的版本号，下次运行只处理之后新增或变化的记录：
+
+    store = JobStore('boss_jobs.db')
+    rows, version = store.changed('clean')            # 上次清洗之后变化的职位
+    for job_id, record in rows:
+        store.put_result('clean', job_id, clean(record))
+    store.mark('clean', version)
+
+各阶段的处理结果保存在 stage_results 表中，同样带版本号，下游阶段可以用
+changed('analyze', source='clean') 只读取变化的清洗结果。
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+# 单独存列并建索引的字段
+INDEXED_FIELDS = ('keyword', 'city', 'company_name_std', 'collected_at')
+
+
+class JobStore:
+    """
+    职位数据库
+
+    Args:
+        db_file: SQLite 数据库文件路径（多个采集实例可以共用，使用 WAL 模式）
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                keyword TEXT,
+                city TEXT,
+                company_name_std TEXT,
+                collected_at TEXT,
+                data TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_keyword ON jobs (keyword);
+            CREATE INDEX IF NOT EXISTS idx_jobs_city ON jobs (city);
+            CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs (company_name_std);
+            CREATE INDEX IF NOT EXISTS idx_jobs_collected_at ON jobs (collected_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_version ON jobs (version);
+
+            CREATE TABLE IF NOT EXISTS stage_results (
+                stage TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (stage, job_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_stage_results_version ON stage_results (stage, version);
+
+            CREATE TABLE IF NOT EXISTS stage_marks (
+                stage TEXT NOT NULL,
+                source TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (stage, source)
+            );
+        ''')
+        self._conn.commit()
+
+    @staticmethod
+    def _content(record):
+        """参与变化比较的内容（不含采集时间，重新采集到相同的职位不算变化）"""
+        return json.dumps(
+            {k: v for k, v in record.items() if k != 'collected_at'},
+            ensure_ascii=False, sort_keys=True,
+        )
+
+    def upsert_many(self, items):
+        """
+        写入一批职位（一个事务），内容未变化的记录保持原版本号
+
+        Args:
+            items: (job_id, record) 序列，record 为职位字典
+
+        Returns:
+            实际新增或更新的记录数
+        """
+        changed = 0
+        with self._lock:
+            for job_id, record in items:
+                if not job_id:
+                    continue
+                cur = self._conn.execute(
+                    'INSERT INTO jobs (job_id, keyword, city, company_name_std, collected_at, '
+                    'data, version, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM jobs), ?) '
+                    'ON CONFLICT (job_id) DO UPDATE SET '
+                    'keyword = excluded.keyword, city = excluded.city, '
+                    'company_name_std = excluded.company_name_std, '
+                    'collected_at = excluded.collected_at, data = excluded.data, '
+                    'version = excluded.version, updated_at = excluded.updated_at '
+                    'WHERE jobs.data != excluded.data',
+                    (job_id,
+                     record.get('search_keyword') or record.get('keyword', ''),
+                     record.get('city', ''),
+                     record.get('company_name_std', ''),
+                     record.get('collected_at', ''),
+                     self._content(record),
+                     time.time())
+                )
+                changed += cur.rowcount
+            self._conn.commit()
+        return changed
+
+    def upsert(self, job_id, record):
+        """写入一个职位，返回是否新增或更新"""
+        return self.upsert_many([(job_id, record)]) > 0
+
+    def _load(self, data, collected_at=None):
+        record = json.loads(data)
+        if collected_at is not None:
+            record['collected_at'] = collected_at
+        return record
+
+    def get(self, job_id):
+        """读取一个职位，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, collected_at FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        return self._load(*row) if row else None
+
+    def find(self, keyword=None, city=None, company=None, since=None):
+        """按关键词、城市、公司（归一化名称）和采集时间下限查询职位（走索引）"""
+        conditions, params = [], []
+        for column, value in (('keyword', keyword), ('city', city), ('company_name_std', company)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            conditions.append('collected_at >= ?')
+            params.append(since)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT job_id, data, collected_at FROM jobs{where} ORDER BY version', params
+            ).fetchall()
+        return [(job_id, self._load(data, collected_at)) for job_id, data, collected_at in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+    # ==================== 阶段进度 ====================
+
+    def get_mark(self, stage, source='jobs'):
+        """阶段 stage 已处理到的 source 版本号"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT version FROM stage_marks WHERE stage = ? AND source = ?', (stage, source)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def mark(self, stage, version, source='jobs'):
+        """记录阶段 stage 已处理到 source 的 version 版本"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO stage_marks (stage, source, version) VALUES (?, ?, ?) '
+                'ON CONFLICT (stage, source) DO UPDATE SET version = excluded.version',
+                (stage, source, version)
+            )
+            self._conn.commit()
+
+    def changed(self, stage, source='jobs'):
+        """
+        读取阶段 stage 上次处理之后新增或变化的记录
+
+        Args:
+            source: 'jobs' 表示采集到的职位，其他值表示该阶段的处理结果
+
+        Returns:
+            ([(job_id, record), ...], 最大版本号)，处理完后用 mark() 记录该版本号
+        """
+        since = self.get_mark(stage, source)
+        with self._lock:
+            if source == 'jobs':
+                rows = self._conn.execute(
+                    'SELECT job_id, data, collected_at, version FROM jobs '
+                    'WHERE version > ? ORDER BY version', (since,)
+                ).fetchall()
+                items = [(job_id, self._load(data, collected_at)) for job_id, data, collected_at, _ in rows]
+                versions = [row[3] for row in rows]
+            else:
+                rows = self._conn.execute(
+                    'SELECT job_id, data, version FROM stage_results '
+                    'WHERE stage = ? AND version > ? ORDER BY version', (source, since)
+                ).fetchall()
+                items = [(job_id, json.loads(data)) for job_id, data, _ in rows]
+                versions = [row[2] for row in rows]
+        return items, max(versions, default=since)
+
+    # ==================== 阶段结果 ====================
+
+    def put_results(self, stage, items):
+        """写入一批阶段处理结果（内容未变化时保持原版本号），返回实际更新数"""
+        changed = 0
+        with self._lock:
+            for job_id, data in items:
+                cur = self._conn.execute(
+                    'INSERT INTO stage_results (stage, job_id, data, version) '
+                    'VALUES (?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 '
+                    'FROM stage_results WHERE stage = ?)) '
+                    'ON CONFLICT (stage, job_id) DO UPDATE SET '
+                    'data = excluded.data, version = excluded.version '
+                    'WHERE stage_results.data != excluded.data',
+                    (stage, job_id, json.dumps(data, ensure_ascii=False, sort_keys=True), stage)
+                )
+                changed += cur.rowcount
+            self._conn.commit()
+        return changed
+
+    def put_result(self, stage, job_id, data):
+        """写入一条阶段处理结果"""
+        return self.put_results(stage, [(job_id, data)]) > 0
+
+    def results(self, stage):
+        """读取阶段 stage 的全部处理结果 [(job_id, data), ...]"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT job_id, data FROM stage_results WHERE stage = ? ORDER BY version', (stage,)
+            ).fetchall()
+        return [(job_id, json.loads(data)) for job_id, data in rows]
+
+    def iter_results(self, stage, batch_size=1000):
+        """按版本顺序分批读取阶段 stage 的处理结果（不把全部结果读入内存）"""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT job_id, data, version FROM stage_results '
+                    'WHERE stage = ? AND version > ? ORDER BY version LIMIT ?',
+                    (stage, last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for job_id, data, _ in rows:
+                yield job_id, json.loads(data)
+            last = rows[-1][2]
+
+    def has_results(self, stage):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT 1 FROM stage_results WHERE stage = ? LIMIT 1', (stage,)
+            ).fetchone() is not None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,234 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+运行指标模块
+
+采集、清洗、分析脚本共用的计数器和直方图，运行结束时写出 JSON 运行报告，
+也可以同时写出 Prometheus 文本文件（供 node_exporter 的 textfile collector 读取）：
+
+    import metrics
+    metrics.inc('jobs_collected_total', 15)
+    metrics.observe('list_latency_seconds', 0.8)
+    metrics.observe('sleep_seconds', 3.2, reason='pacing')
+    metrics.gauge('detail_cache_hits', 120)
+    with metrics.timer('save_seconds'):
+        ...
+    metrics.write_report('run_report.json', prometheus_file='boss.prom')
+
+指标名带标签时按 名称 + 标签 分别统计，报告中显示为 name{key="value"}。
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# 直方图默认分桶上界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _key(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
+
+
+def _split_key(key):
+    """name{labels} -> (name, '{labels}')"""
+    if '{' in key:
+        name, rest = key.split('{', 1)
+        return name, '{' + rest
+    return key, ''
+
+
+class Histogram:
+    """分桶直方图，同时记录次数、总和、最小值和最大值"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def quantile(self, q):
+        """按分桶估计分位数（返回所在分桶的上界，最后一个分桶返回最大值）"""
+        if not self.count:
+            return None
+        target = math.ceil(q * self.count)
+        seen = 0
+        for i, n in enumerate(self.bucket_counts):
+            seen += n
+            if seen >= target:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'avg': round(self.sum / self.count, 4) if self.count else None,
+            'min': round(self.min, 4) if self.min is not None else None,
+            'max': round(self.max, 4) if self.max is not None else None,
+            'p50': round(self.quantile(0.5), 4) if self.count else None,
+            'p95': round(self.quantile(0.95), 4) if self.count else None,
+        }
+
+
+class Metrics:
+    """线程安全的计数器和直方图集合"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空所有指标，重新开始计时"""
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        """计数器加 value"""
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        """设置当前值（如缓存命中数、队列长度）"""
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        """直方图记录一个值"""
+        if value is None:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """记录代码块的耗时（秒）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self.counters.get(_key(name, labels), 0)
+
+    def total(self, name):
+        """同名指标在所有标签下的计数器之和或直方图总和"""
+        with self._lock:
+            total = sum(v for k, v in self.counters.items() if _split_key(k)[0] == name)
+            total += sum(h.sum for k, h in self.histograms.items() if _split_key(k)[0] == name)
+        return total
+
+    def report(self, **extra):
+        """生成运行报告（字典）"""
+        elapsed = self.elapsed()
+        with self._lock:
+            report = {
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+                'elapsed_seconds': round(elapsed, 3),
+                'counters': dict(sorted(self.counters.items())),
+                'gauges': dict(sorted(self.gauges.items())),
+                'histograms': {k: h.summary() for k, h in sorted(self.histograms.items())},
+            }
+        report.update(extra)
+        return report
+
+    def prometheus(self, prefix='boss_'):
+        """Prometheus 文本格式"""
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            for key, value in sorted(self.counters.items()):
+                name, labels = _split_key(key)
+                header(prefix + name, 'counter')
+                lines.append(f'{prefix}{name}{labels} {value}')
+            for key, value in sorted(self.gauges.items()):
+                name, labels = _split_key(key)
+                header(prefix + name, 'gauge')
+                lines.append(f'{prefix}{name}{labels} {value}')
+            for key, hist in sorted(self.histograms.items()):
+                name, labels = _split_key(key)
+                header(prefix + name, 'histogram')
+                inner = labels[1:-1]
+                sep = ',' if inner else ''
+                cumulative = 0
+                for bound, n in zip(hist.buckets + ('+Inf',), hist.bucket_counts):
+                    cumulative += n
+                    lines.append(f'{prefix}{name}_bucket{{{inner}{sep}le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}{name}_sum{labels} {hist.sum}')
+                lines.append(f'{prefix}{name}_count{labels} {hist.count}')
+            header(prefix + 'run_elapsed_seconds', 'gauge')
+            lines.append(f'{prefix}run_elapsed_seconds {self.elapsed():.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, report_file, prometheus_file='', **extra):
+        """
+        写出 JSON 运行报告（以及可选的 Prometheus 文本文件），临时文件 + 原子替换
+
+        Args:
+            extra: 附加到报告中的内容（如配置、派生指标）
+        """
+        report = self.report(**extra)
+        if report_file:
+            temp_file = report_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, report_file)
+        if prometheus_file:
+            temp_file = prometheus_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus())
+            os.replace(temp_file, prometheus_file)
+        return report
+
+
+# 进程内共用的指标集合
+registry = Metrics()
+
+inc = registry.inc
+gauge = registry.gauge
+observe = registry.observe
+timer = registry.timer
+counter = registry.counter
+total = registry.total
+reset = registry.reset
+write_report = registry.write_report
@@ -0,0 +1,265 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+职位描述近似重复检测（MinHash + LSH）
+
+精确去重只能去掉 公司+职位+城市 完全相同的记录。同一职位换个标题重新发布、
+猎头把同一份 JD 复制到多个城市，这些记录的 jd_text 几乎相同，去重键却不同，
+会让技术栈统计重复计数。这里按 jd_text 把近似重复的职位聚成簇：
+
+    hasher = MinHasher()
+    blocks = [hasher.signatures(texts) for texts in chunks]   # 可以分批计算
+    cluster_ids, canonical = find_clusters(blocks, threshold=0.8)
+
+- 文本归一化（全角字母数字和标点转半角、小写、去掉空白）后，每连续 SHINGLE_SIZE
+  个字符为一个 shingle，两条 JD 的相似度为 shingle 集合的 Jaccard 系数
+- MinHash：shingle 哈希分到 NUM_PERM 个桶中，每个桶的最小值为签名的一位
+  （单次哈希 MinHash，见 MinHasher）；两条签名中相同位置相等的比例是 Jaccard 系数的估计
+- LSH：签名分成 BANDS 段，某一段完全相同的 JD 成为候选（相似度约高于
+  (1/BANDS)^(BANDS/NUM_PERM) 时大概率成为候选），候选对再按签名估计的相似度确认
+- 同一段相同的一组 JD 中每条只与组内前面 WINDOW 条比较，比较次数为
+  O(条数 × BANDS × WINDOW)，大量完全相同的 JD 也不会退化为平方复杂度
+
+相似关系按传递性合并成簇。簇编号从 1 开始，按簇中第一条记录在输入中的顺序编号，
+每簇第一条记录为代表记录（与精确去重保留第一条一致）。
+JD 过短（不足一个 shingle）的记录各自成簇。签名每条 NUM_PERM × 4 字节，
+50 万条约 128MB。
+"""
+
+import numpy as np
+
+# 每个 shingle 的字符数
+SHINGLE_SIZE = 5
+
+# MinHash 签名长度和 LSH 分段数（每段 NUM_PERM / BANDS 个值）
+NUM_PERM = 64
+BANDS = 8
+
+# 同一段签名相同的 JD 与组内前面多少条比较
+WINDOW = 8
+
+# 判定为近似重复的最低相似度（签名估计的 Jaccard 系数）
+THRESHOLD = 0.8
+
+# 每次向量化计算签名的 JD 条数
+SIGNATURE_BATCH = 1024
+
+# 没有 shingle 的 JD 的签名（各自成簇）
+EMPTY = np.uint32(0xFFFFFFFF)
+
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_BASE = np.uint64(0x100000001B3)
+
+
+def _mix(x):
+    """64 位整数混合（splitmix64 的最后一步），数组整体计算"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * _MIX1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+# 全部空白字符（str.isspace()，码位都不超过 U+3000）
+_SPACES = np.array([i for i in range(0x3001) if chr(i).isspace()], dtype=np.uint32)
+
+
+def normalize_codes(codes):
+    """
+    归一化文本的码位数组：全角 ASCII 字符转半角、大写字母转小写
+
+    与 NFKC + lower() 对职位描述的效果相同（JD 中需要归一化的只有全角字母数字和标点），
+    按数组整体计算，比逐条调用 unicodedata.normalize 快几十倍
+
+    Returns:
+        (归一化后的码位, 非空白字符的掩码)
+    """
+    codes = np.where((codes >= 0xFF01) & (codes <= 0xFF5E), codes - np.uint32(0xFEE0), codes)
+    codes = np.where((codes >= 0x41) & (codes <= 0x5A), codes + np.uint32(0x20), codes)
+    return codes, ~np.isin(codes, _SPACES)
+
+
+class MinHasher:
+    """
+    MinHash 签名计算（单次哈希 MinHash）
+
+    传统 MinHash 每个 shingle 要计算 num_perm 次哈希。这里每个 shingle 只哈希一次，
+    按哈希的高位分到 num_perm 个桶中，每个桶取最小值作为签名的一位（one permutation
+    hashing），估计的仍是 Jaccard 系数，计算量少 num_perm 倍；没有 shingle 落入的桶
+    取右侧（循环）最近的非空桶的值再加上偏移（rotation densification），
+    两条 JD 的空桶用同样的规则填充，签名仍可逐位比较。
+
+    哈希由 seed 确定，不同进程、不同批次计算的签名可以直接比较
+
+    Args:
+        num_perm: 签名长度（桶数）
+        shingle_size: 每个 shingle 的字符数
+    """
+
+    def __init__(self, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._seed = _mix(np.array([seed], dtype=np.uint64))[0]
+
+    def _shingle_hashes(self, texts):
+        """
+        一批文本归一化后的全部 shingle 哈希
+
+        Returns:
+            (哈希, 所属文本的序号)
+        """
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32)
+        codes, kept = normalize_codes(codes)
+        codes = codes[kept].astype(np.uint64)
+        doc = np.repeat(np.arange(len(texts)), lengths)[kept]
+        count = len(codes) - self.shingle_size + 1
+        if count <= 0:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            hashes = hashes * _BASE + codes[offset:offset + count]
+        # 去掉跨越两条文本的 shingle
+        valid = doc[:count] == doc[self.shingle_size - 1:]
+        return _mix(hashes[valid] ^ self._seed), doc[:count][valid]
+
+    def _densify(self, signatures):
+        """用右侧（循环）最近的非空桶填充空桶"""
+        empty = signatures == EMPTY
+        rows = np.flatnonzero(empty.any(axis=1) & ~empty.all(axis=1))
+        if not len(rows):
+            return
+        original = signatures[rows]
+        filled = original.copy()
+        missing = original == EMPTY
+        for distance in range(1, self.num_perm):
+            if not missing.any():
+                break
+            source = np.roll(original, -distance, axis=1)
+            take = missing & (source != EMPTY)
+            offset = np.uint32(distance * 0x9E3779B1 & 0x7FFFFFFF)
+            filled[take] = (source[take] + offset) & np.uint32(0x7FFFFFFF)
+            missing &= ~take
+        signatures[rows] = filled
+
+    def signatures(self, texts):
+        """
+        一批 JD 的 MinHash 签名
+
+        Returns:
+            (len(texts), num_perm) 的 uint32 数组，没有 shingle 的 JD 整行为 EMPTY
+        """
+        # 完全相同的 JD 只计算一次
+        unique = {}
+        positions = [unique.setdefault(text or '', len(unique)) for text in texts]
+        unique_texts = list(unique)
+        computed = np.full((len(unique_texts), self.num_perm), EMPTY, dtype=np.uint32)
+
+        for start in range(0, len(unique_texts), SIGNATURE_BATCH):
+            hashes, doc = self._shingle_hashes(unique_texts[start:start + SIGNATURE_BATCH])
+            # 高 32 位选桶，低 31 位为桶内取最小值的哈希（不会等于 EMPTY）
+            buckets = (hashes >> np.uint64(32)) % np.uint64(self.num_perm)
+            values = (hashes & np.uint64(0x7FFFFFFF)).astype(np.uint32)
+            block = computed[start:start + SIGNATURE_BATCH]
+            np.minimum.at(block.reshape(-1), doc * self.num_perm + buckets.astype(np.int64), values)
+            self._densify(block)
+
+        return computed[positions]
+
+
+def _band_keys(band):
+    """每行签名（或其中一段）的 64 位哈希，用于分组"""
+    keys = np.zeros(len(band), dtype=np.uint64)
+    for column in band.T:
+        keys = _mix(keys * _BASE + column.astype(np.uint64))
+    return keys
+
+
+def candidate_pairs(signatures, bands=BANDS, window=WINDOW):
+    """
+    LSH 候选对：某一段签名相同的一组 JD 中，每条与组内排在它前面的 window 条组成候选对
+
+    Returns:
+        (first, other) 两个索引数组，first < other，已去重
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f"签名长度 {num_perm} 不能被分段数 {bands} 整除")
+    rows = num_perm // bands
+    valid = np.flatnonzero(~(signatures == EMPTY).all(axis=1))
+    pairs = []
+    for band in range(bands):
+        keys = _band_keys(signatures[valid, band * rows:(band + 1) * rows])
+        # 稳定排序：同一组内按输入顺序排列
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        for distance in range(1, window + 1):
+            same = np.flatnonzero(sorted_keys[distance:] == sorted_keys[:-distance])
+            if not len(same):
+                break
+            pairs.append(valid[order[same]] * np.int64(n) + valid[order[same + distance]])
+    if not pairs:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    codes = np.unique(np.concatenate(pairs))
+    return codes // n, codes % n
+
+
+def _connected_components(labels, first, other):
+    """
+    连通分量：labels 初始时每条记录指向同组中索引最小的记录，按边 (first, other) 合并
+
+    每轮把每条边两端所在树中较大的根挂到较小的根上，再压缩路径，
+    根总是所在分量中索引最小的记录
+    """
+    while True:
+        low, high = labels[first], labels[other]
+        differ = low != high
+        if not differ.any():
+            return labels
+        low, high = np.minimum(low, high)[differ], np.maximum(low, high)[differ]
+        np.minimum.at(labels, high, low)
+        while True:
+            parents = labels[labels]
+            if np.array_equal(parents, labels):
+                break
+            labels = parents
+
+
+def find_clusters(signatures, threshold=THRESHOLD, bands=BANDS, window=WINDOW, chunk_pairs=65536):
+    """
+    按签名把近似重复的 JD 聚成簇
+
+    Args:
+        signatures: MinHasher.signatures() 的结果，或按输入顺序排列的多批结果
+        threshold: 判定为近似重复的最低相似度
+
+    Returns:
+        (cluster_ids, canonical)：每条记录的簇编号（从 1 开始）和是否为所在簇的代表记录
+    """
+    if isinstance(signatures, (list, tuple)):
+        signatures = np.concatenate(signatures) if signatures else np.empty((0, NUM_PERM), np.uint32)
+    n = len(signatures)
+    labels = np.arange(n)
+
+    # 签名完全相同的 JD（如原样转发的职位）直接归为一簇，LSH 只处理互不相同的签名
+    valid = np.flatnonzero(~(signatures == EMPTY).all(axis=1))
+    _, first_index, inverse = np.unique(_band_keys(signatures[valid]),
+                                        return_index=True, return_inverse=True)
+    labels[valid] = valid[first_index[inverse.reshape(-1)]]
+    distinct = np.sort(valid[first_index])
+    distinct_signatures = signatures[distinct]
+    first, other = candidate_pairs(distinct_signatures, bands, window)
+
+    # 用签名估计候选对的相似度（分块计算，控制内存）
+    keep = np.zeros(len(first), dtype=bool)
+    for start in range(0, len(first), chunk_pairs):
+        a = distinct_signatures[first[start:start + chunk_pairs]]
+        b = distinct_signatures[other[start:start + chunk_pairs]]
+        keep[start:start + chunk_pairs] = (a == b).mean(axis=1) >= threshold
+
+    roots = _connected_components(labels, distinct[first[keep]], distinct[other[keep]])
+    # 根节点升序即簇中第一条记录的输入顺序
+    cluster_ids = np.unique(roots, return_inverse=True)[1].reshape(-1) + 1
+    canonical = roots == np.arange(n)
+    return cluster_ids, canonical
@@ -0,0 +1,478 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+列式 / 压缩输出格式模块
+
+除 CSV 外，采集和清洗结果还可以导出为：
+- Parquet（*.parquet）：薪资为整数列，城市、公司性质、经验、学历等为分类列，
+  文件小、读取快，后续处理可以只读取需要的列（需要安装 pandas 和 pyarrow）
+- 压缩 JSON Lines（*.jsonl.gz / *.jsonl）：每行一条记录，整数列写为数字，缺失值写为 null
+
+按扩展名选择格式：
+
+    export_rows(rows, 'jobs.parquet', fieldnames)
+    for row in iter_rows('jobs.parquet', columns=['city', 'salary_avg_year_rmb']):
+        ...
+
+数据量很大时用 open_writer() 分批写入：
+
+    with open_writer('jobs.parquet', fieldnames) as writer:
+        for chunk in chunks:
+            writer.write_rows(chunk)
+"""
+
+import codecs
+import csv
+import gzip
+import io
+import json
+import os
+
+# 整数列（CSV 中为字符串，空字符串表示缺失）
+INT_COLUMNS = {
+    'salary_months', 'salary_min_year_rmb', 'salary_max_year_rmb', 'salary_avg_year_rmb',
+    # JD 近似重复簇（见 near_dup.py），代表记录标记为 1 / 0
+    'jd_cluster_id', 'jd_canonical',
+}
+
+# 取值种类很少的列，Parquet 中存为分类列
+CATEGORY_COLUMNS = {
+    'keyword_group', 'search_keyword', 'city', 'company_type', 'exp_req', 'edu_req',
+    # 中文字段（boss_spider.py 的输出格式）
+    '城市', '区域', '经验', '学历', '领域', '性质', '规模',
+}
+
+
+def output_kind(path):
+    """根据扩展名判断格式：parquet / jsonl / csv"""
+    name = path.lower()
+    if name.endswith('.parquet'):
+        return 'parquet'
+    if name.endswith('.jsonl') or name.endswith('.jsonl.gz'):
+        return 'jsonl'
+    return 'csv'
+
+
+def to_int(value):
+    """把 CSV 中的数值文本转换为整数，空值返回 None"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def typed_row(row, fieldnames):
+    """按列类型转换一条记录（整数列转为 int 或 None，其余保持原值）"""
+    return {
+        k: to_int(row.get(k)) if k in INT_COLUMNS else row.get(k, '')
+        for k in fieldnames
+    }
+
+
+def _open_text(path, mode, compressed=None):
+    if compressed is None:
+        compressed = path.lower().endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def write_jsonl(rows, path, fieldnames):
+    """写入（压缩）JSON Lines，临时文件 + 原子替换"""
+    with JsonlWriter(path, fieldnames) as writer:
+        writer.write_rows(rows)
+    return writer.count
+
+
+def _parquet_frame(rows, fieldnames):
+    """按列类型生成 DataFrame（整数列为 Int64，分类列为 category）"""
+    try:
+        import pandas as pd
+    except ImportError:
+        raise RuntimeError("写入 Parquet 需要安装 pandas 和 pyarrow: pip install pandas pyarrow")
+
+    df = pd.DataFrame.from_records(
+        [typed_row(row, fieldnames) for row in rows], columns=fieldnames
+    )
+    for column in fieldnames:
+        if column in INT_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+        elif column in CATEGORY_COLUMNS:
+            df[column] = df[column].fillna('').astype('category')
+    return df
+
+
+def write_parquet(rows, path, fieldnames):
+    """写入 Parquet（整数列为 Int64，分类列为 category），临时文件 + 原子替换"""
+    df = _parquet_frame(rows, fieldnames)
+    temp_file = path + '.tmp'
+    df.to_parquet(temp_file, index=False, compression='zstd')
+    os.replace(temp_file, path)
+    return len(df)
+
+
+def write_csv(rows, path, fieldnames, encoding='utf-8-sig'):
+    """写入 CSV，临时文件 + 原子替换"""
+    with CsvWriter(path, fieldnames, encoding) as writer:
+        writer.write_rows(rows)
+    return writer.count
+
+
+# ==================== 分批写入 ====================
+
+class RowWriter:
+    """
+    分批写入记录（流式处理时每批清洗完立即写出，不在内存中保留全部记录）
+
+    写入临时文件，close() 时原子替换为目标文件；出错退出 with 时删除临时文件
+    """
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.temp_file = path + '.tmp'
+        self.count = 0
+
+    def write_rows(self, rows):
+        for row in rows:
+            self._write(row)
+            self.count += 1
+
+    def _write(self, row):
+        raise NotImplementedError
+
+    @classmethod
+    def encode_rows(cls, rows, fieldnames):
+        """
+        把记录编码为要写入的内容（可以在清洗进程中执行），由 write_encoded() 写入，
+        结果与 write_rows() 相同
+        """
+        raise NotImplementedError
+
+    def write_encoded(self, items):
+        """写入 encode_rows() 编码好的内容"""
+        self._file.write(''.join(items))
+        self.count += len(items)
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        self._finish()
+        os.replace(self.temp_file, self.path)
+
+    def abort(self):
+        try:
+            self._finish()
+        finally:
+            if os.path.exists(self.temp_file):
+                os.remove(self.temp_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class CsvWriter(RowWriter):
+
+    def __init__(self, path, fieldnames, encoding='utf-8-sig'):
+        super().__init__(path, fieldnames)
+        self._file = open(self.temp_file, 'w', encoding=encoding, newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _write(self, row):
+        self._writer.writerow(row)
+
+    @classmethod
+    def encode_rows(cls, rows, fieldnames):
+        # 与 DictWriter(extrasaction='ignore') 相同：缺少的列写为空
+        buffer = io.StringIO(newline='')
+        writer = csv.writer(buffer)
+        lines = []
+        for row in rows:
+            writer.writerow([row.get(k, '') for k in fieldnames])
+            lines.append(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+        return lines
+
+    def _finish(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+class JsonlWriter(RowWriter):
+
+    def __init__(self, path, fieldnames):
+        super().__init__(path, fieldnames)
+        self._file = _open_text(self.temp_file, 'w', compressed=path.lower().endswith('.gz'))
+
+    def _write(self, row):
+        self._file.write(json.dumps(typed_row(row, self.fieldnames), ensure_ascii=False) + '\n')
+
+    @classmethod
+    def encode_rows(cls, rows, fieldnames):
+        return [json.dumps(typed_row(row, fieldnames), ensure_ascii=False) + '\n' for row in rows]
+
+    def _finish(self):
+        self._file.close()
+
+
+class ParquetWriter(RowWriter):
+    """每批记录写为一个 row group，列类型与 write_parquet() 相同"""
+
+    def __init__(self, path, fieldnames):
+        super().__init__(path, fieldnames)
+        self._writer = None
+        self._schema = None
+
+    def write_rows(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = _parquet_frame(rows, self.fieldnames)
+        if not len(df):
+            return
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._schema is None:
+            # 固定列类型：各批的分类取值不同，字典编码统一用 int32；保留 pandas 元数据以便读回 Int64
+            fields = []
+            for column in self.fieldnames:
+                if column in INT_COLUMNS:
+                    fields.append(pa.field(column, pa.int64()))
+                elif column in CATEGORY_COLUMNS:
+                    fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+                else:
+                    fields.append(pa.field(column, pa.string()))
+            self._schema = pa.schema(fields, metadata=table.schema.metadata)
+            self._writer = pq.ParquetWriter(self.temp_file, self._schema, compression='zstd')
+        self._writer.write_table(table.cast(self._schema))
+        self.count += len(df)
+
+    @classmethod
+    def encode_rows(cls, rows, fieldnames):
+        return [typed_row(row, fieldnames) for row in rows]
+
+    def write_encoded(self, items):
+        self.write_rows(items)
+
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif not os.path.exists(self.temp_file):
+            # 没有任何记录时写出只有列的空文件
+            _parquet_frame([], self.fieldnames).to_parquet(self.temp_file, index=False, compression='zstd')
+
+
+def open_writer(path, fieldnames, encoding='utf-8-sig'):
+    """按扩展名打开分批写入的 CSV / Parquet / JSON Lines 文件"""
+    kind = output_kind(path)
+    if kind == 'parquet':
+        return ParquetWriter(path, fieldnames)
+    if kind == 'jsonl':
+        return JsonlWriter(path, fieldnames)
+    return CsvWriter(path, fieldnames, encoding)
+
+
+def export_rows(rows, path, fieldnames, encoding='utf-8-sig'):
+    """按扩展名写入 CSV / Parquet / JSON Lines，返回写入的记录数"""
+    kind = output_kind(path)
+    if kind == 'parquet':
+        return write_parquet(rows, path, fieldnames)
+    if kind == 'jsonl':
+        return write_jsonl(rows, path, fieldnames)
+    return write_csv(rows, path, fieldnames, encoding)
+
+
+def append_columns(path, names, columns):
+    """
+    给 CSV / Parquet / JSON Lines 文件的每条记录追加整数列（写入临时文件后替换原文件）
+
+    不逐条解析和重新编码记录：CSV 和 JSON Lines 直接在每条记录的文本末尾追加，
+    Parquet 按 row group 追加列，结果与用新的字段列表重新写出相同
+
+    Args:
+        names: 追加的列名
+        columns: 与 names 对应的整数序列，长度等于文件中的记录数
+    """
+    kind = output_kind(path)
+    temp_file = path + '.tmp'
+    try:
+        if kind == 'parquet':
+            count = _append_parquet_columns(path, temp_file, names, columns)
+        elif kind == 'jsonl':
+            compressed = path.lower().endswith('.gz')
+            with _open_text(path, 'r', compressed) as src, _open_text(temp_file, 'w', compressed) as dst:
+                count = _append_jsonl_columns(src, dst, names, columns)
+        else:
+            with open(path, 'rb') as src, open(temp_file, 'wb') as dst:
+                count = _append_csv_columns(src, dst, names, columns)
+        if any(len(values) != count for values in columns):
+            raise ValueError(f"{path} 有 {count} 条记录，与追加的列长度不一致")
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    os.replace(temp_file, path)
+
+
+def _append_csv_columns(src, dst, names, columns):
+    """
+    按引号奇偶找到每条记录的结尾（引号内可以有换行），在行尾换行符之前追加字段
+
+    按字节处理，不解码（UTF-8 等编码中引号、逗号和换行都是单字节）
+    """
+    rows = zip(*columns)
+    count, quotes, header = 0, 0, True
+    for line in src:
+        quotes += line.count(b'"')
+        if quotes % 2:
+            dst.write(line)
+            continue
+        quotes = 0
+        if header:
+            fields = (',' + ','.join(names)).encode('utf-8')
+            header = False
+        else:
+            values = next(rows, None)
+            if values is None:
+                raise ValueError("CSV 文件的记录数多于追加的列长度")
+            fields = ''.join(',' + str(int(value)) for value in values).encode('ascii')
+            count += 1
+        body = line.rstrip(b'\r\n')
+        dst.write(body + fields + line[len(body):])
+    return count
+
+
+def _append_jsonl_columns(src, dst, names, columns):
+    """在每行 JSON 对象的结尾 } 之前追加字段（与 json.dumps 的默认分隔符相同）"""
+    keys = [', ' + json.dumps(name, ensure_ascii=False) + ': ' for name in names]
+    count = 0
+    for line, values in zip(src, zip(*columns)):
+        body = line.rstrip()
+        fields = ''.join(key + str(int(value)) for key, value in zip(keys, values))
+        dst.write(body[:-1] + (fields[2:] if body == '{}' else fields) + '}\n')
+        count += 1
+    if next(src, None) is not None:
+        raise ValueError("JSON Lines 文件的记录数多于追加的列长度")
+    return count
+
+
+def _append_parquet_columns(path, temp_file, names, columns):
+    """逐个 row group 追加 int64 列，pandas 元数据中同时登记为 Int64 列"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    schema = parquet.schema_arrow
+    metadata = dict(schema.metadata or {})
+    if b'pandas' in metadata:
+        pandas_meta = json.loads(metadata[b'pandas'])
+        pandas_meta['columns'].extend(
+            {'name': name, 'field_name': name, 'pandas_type': 'int64',
+             'numpy_type': 'Int64', 'metadata': None}
+            for name in names
+        )
+        metadata[b'pandas'] = json.dumps(pandas_meta).encode('utf-8')
+    schema = pa.schema(list(schema) + [pa.field(name, pa.int64()) for name in names],
+                       metadata=metadata)
+
+    count = 0
+    with pq.ParquetWriter(temp_file, schema, compression='zstd') as writer:
+        for i in range(parquet.num_row_groups):
+            table = parquet.read_row_group(i)
+            for name, values in zip(names, columns):
+                table = table.append_column(
+                    name, pa.array(values[count:count + table.num_rows], pa.int64()))
+            writer.write_table(table)
+            count += table.num_rows
+    return count
+
+
+def iter_csv_blocks(path, block_bytes=4 * 1024 * 1024):
+    """
+    把 CSV 文件按记录边界切成约 block_bytes 字节的块（不解析字段，供多个进程分别解析）
+
+    引号内可以有换行，块在之前引号数为偶数的行尾处切开
+
+    Returns:
+        生成器：先产出表头的字段列表，之后产出各块的字节内容
+    """
+    with open(path, 'rb') as f:
+        line = f.readline()
+        header = line
+        while header.count(b'"') % 2 and line:
+            line = f.readline()
+            header += line
+        if header.startswith(codecs.BOM_UTF8):
+            header = header[len(codecs.BOM_UTF8):]
+        yield next(csv.reader(io.StringIO(header.decode('utf-8'), newline='')), [])
+
+        data = b''
+        while True:
+            more = f.read(block_bytes)
+            data += more
+            end = _record_end(data) if more else len(data)
+            if end:
+                yield data[:end]
+                data = data[end:]
+            if not more:
+                return
+
+
+def _record_end(data):
+    """data 中最后一条完整记录的结束位置（之前引号数为偶数的行尾），没有时返回 0"""
+    quotes = data.count(b'"')
+    pos = data.rfind(b'\n')
+    while pos >= 0:
+        if (quotes - data.count(b'"', pos)) % 2 == 0:
+            return pos + 1
+        pos = data.rfind(b'\n', 0, pos)
+    return 0
+
+
+def parse_csv_block(block, fieldnames):
+    """解析 iter_csv_blocks() 切出的块，结果与 iter_rows() 逐条读取相同"""
+    return list(csv.DictReader(io.StringIO(block.decode('utf-8'), newline=''), fieldnames=fieldnames))
+
+
+def iter_rows(path, columns=None, encoding='utf-8-sig'):
+    """
+    按扩展名逐条读取 CSV / Parquet / JSON Lines 记录
+
+    Args:
+        columns: 只读取这些列（Parquet 只从文件中读取这些列），None 表示全部
+    """
+    kind = output_kind(path)
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        for batch in parquet.iter_batches(columns=columns):
+            yield from batch.to_pylist()
+        return
+
+    if kind == 'jsonl':
+        with _open_text(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield {k: row.get(k) for k in columns} if columns else row
+        return
+
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        for row in csv.DictReader(f):
+            yield {k: row.get(k) for k in columns} if columns else row
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+持续监听数据包模块
+
+每个标签页只启动一次监听器，后台线程把监听到的每个 joblist.json /
+detail/info.json 数据包按类型放进线程安全的队列，采集循环从队列中取出。
+两次滚动之间到达的数据包、同一次滚动触发的多个数据包都会留在队列里，
+下一轮直接取出，每一页数据都只处理一次。
+"""
+
+import queue
+import threading
+
+from replay import JOBLIST_TARGET, DETAIL_TARGET, packet_kind
+
+
+class PacketFeed:
+    """
+    标签页的持续监听器
+
+    Args:
+        tab: 标签页对象
+        targets: 监听目标（URL 片段列表）
+        poll: 后台线程每次等待数据包的秒数，用于及时响应 stop()
+    """
+
+    def __init__(self, tab, targets=(JOBLIST_TARGET, DETAIL_TARGET), poll=1):
+        self.tab = tab
+        self.targets = list(targets)
+        self.poll = poll
+        self.received = 0
+        self._queues = {'joblist': queue.Queue(), 'detail': queue.Queue(), 'other': queue.Queue()}
+        self._stop = threading.Event()
+        # 监听器不会再产生数据包（回放归档已读完）
+        self._exhausted = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动监听和后台线程"""
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._exhausted.clear()
+        self.tab.listen.start(self.targets)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        listener = self.tab.listen
+        while not self._stop.is_set():
+            got = False
+            try:
+                for packet in listener.steps(timeout=self.poll):
+                    got = True
+                    self.received += 1
+                    self._queues[packet_kind(packet.url)].put(packet)
+                    if self._stop.is_set():
+                        break
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                print(f"  ⚠ 监听数据包出错: {e}")
+            if not got:
+                if getattr(listener, 'exhausted', False):
+                    self._exhausted.set()
+                    break
+                self._stop.wait(0.05)
+
+    def get(self, kind='joblist', timeout=10):
+        """
+        取出一个指定类型的数据包
+
+        Returns:
+            数据包，超时或监听器已结束时返回 None
+        """
+        q = self._queues[kind]
+        try:
+            return q.get_nowait()
+        except queue.Empty:
+            pass
+        if not timeout:
+            return None
+        # 分段等待，监听器结束后不必等满超时
+        waited = 0.0
+        step = min(0.2, timeout)
+        while waited < timeout:
+            try:
+                return q.get(timeout=step)
+            except queue.Empty:
+                waited += step
+                if self._exhausted.is_set() and q.empty():
+                    return None
+        return None
+
+    def pending(self, kind='joblist'):
+        """队列中尚未取出的数据包数"""
+        return self._queues[kind].qsize()
+
+    def add_targets(self, targets):
+        """追加监听目标（重启监听器，已收到的数据包保留）"""
+        targets = [t for t in targets if t not in self.targets]
+        if not targets:
+            return self
+        running = self._thread is not None
+        self.stop()
+        self.targets += targets
+        return self.start() if running else self
+
+    def stop(self):
+        """停止后台线程和监听"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.poll + 5)
+        self._thread = None
+        try:
+            self.tab.listen.stop()
+        except Exception:
+            pass
+
+
+# 标签页 -> 监听器（同一标签页只保留一个）
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def open_feed(tab, targets=(JOBLIST_TARGET, DETAIL_TARGET)):
+    """获取标签页的监听器，不存在时创建并启动，已存在时补充监听目标"""
+    with _feeds_lock:
+        feed = _feeds.get(id(tab))
+        if feed is None or feed.tab is not tab:
+            feed = _feeds[id(tab)] = PacketFeed(tab, targets).start()
+            return feed
+    return feed.add_targets(targets)
+
+
+def close_feed(tab):
+    """停止并移除标签页的监听器（关闭标签页之前调用）"""
+    with _feeds_lock:
+        feed = _feeds.pop(id(tab), None)
+    if feed is not None:
+        feed.stop()
@@ -0,0 +1,200 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+性能分析开关
+
+各入口脚本（collector.py、clean_data.py、analyze_tech_stack.py、reprocess.py）都支持：
+
+    --cprofile run.prof        cProfile 结果文件（可用 snakeviz / pstats 查看），运行结束时打印前 N 个函数
+    --profile-top 30           打印的函数个数
+    --flamegraph run.folded    采样整个进程所有线程的调用栈（墙上时间），写出 folded 格式，
+                               可用 flamegraph.pl 或 https://www.speedscope.app 生成火焰图
+
+热点代码用 section() 标记，启用分析时单独统计每个标记的调用次数和墙上时间
+（包括所有线程，cProfile 只统计主线程）：
+
+    @profiling.section('save_data_immediately')
+    def save_data_immediately():
+        ...
+
+    with profiling.section('export'):
+        ...
+
+未启用分析时 section() 只多一次布尔判断。
+"""
+
+import cProfile
+import functools
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# 是否启用分析（启用后 section() 才统计耗时）
+enabled = False
+
+_sections = {}
+_sections_lock = threading.Lock()
+
+
+class section:
+    """标记一段热点代码，可作为上下文管理器或装饰器使用"""
+
+    __slots__ = ('name', '_started')
+
+    def __init__(self, name):
+        self.name = name
+        self._started = None
+
+    def __enter__(self):
+        if enabled:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._started is not None:
+            _record(self.name, time.perf_counter() - self._started)
+            self._started = None
+        return False
+
+    def __call__(self, func):
+        name = self.name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - started)
+        return wrapper
+
+
+def _record(name, elapsed):
+    with _sections_lock:
+        calls, total, longest = _sections.get(name, (0, 0.0, 0.0))
+        _sections[name] = (calls + 1, total + elapsed, max(longest, elapsed))
+
+
+def section_stats():
+    """各标记代码段的统计 {名称: (调用次数, 总耗时, 最长单次耗时)}"""
+    with _sections_lock:
+        return dict(_sections)
+
+
+class StackSampler:
+    """
+    墙上时间采样器：后台线程按固定间隔记录所有线程的调用栈
+
+    Args:
+        interval: 采样间隔（秒）
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = code.co_filename.rsplit('/', 1)[-1].rsplit('\\', 1)[-1]
+                    stack.append(f'{module}:{code.co_name}')
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, folded_file):
+        """写出 folded 格式（每行：调用栈 采样次数）"""
+        with open(folded_file, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def add_arguments(parser):
+    """给入口脚本的 argparse 添加分析参数"""
+    group = parser.add_argument_group('性能分析')
+    group.add_argument('--cprofile', metavar='FILE', default='',
+                       help='启用 cProfile 并把结果写入该文件，结束时打印耗时最多的函数')
+    group.add_argument('--profile-top', type=int, default=30, metavar='N',
+                       help='打印耗时最多的前 N 个函数（默认 30）')
+    group.add_argument('--flamegraph', metavar='FILE', default='',
+                       help='采样所有线程的调用栈，写出 folded 格式的火焰图数据')
+    return parser
+
+
+def run(func, args=None, profile_file='', top=30, flamegraph=''):
+    """
+    运行 func()，按参数启用 cProfile、调用栈采样和代码段统计
+
+    Args:
+        args: add_arguments() 解析得到的参数，提供时覆盖其余参数
+    """
+    global enabled
+    if args is not None:
+        profile_file = getattr(args, 'cprofile', '') or ''
+        top = getattr(args, 'profile_top', top)
+        flamegraph = getattr(args, 'flamegraph', '') or ''
+
+    if not profile_file and not flamegraph:
+        return func()
+
+    enabled = True
+    profiler = cProfile.Profile() if profile_file else None
+    sampler = StackSampler().start() if flamegraph else None
+    try:
+        if profiler is not None:
+            return profiler.runcall(func)
+        return func()
+    finally:
+        enabled = False
+        if sampler is not None:
+            sampler.stop()
+            sampler.write(flamegraph)
+            print(f"\n✓ 调用栈采样: {flamegraph}（{sum(sampler.samples.values())} 个样本）")
+        if profiler is not None:
+            profiler.dump_stats(profile_file)
+            print(f"\n✓ cProfile 结果: {profile_file}")
+            print_top(profiler, top)
+        print_sections()
+
+
+def print_top(profiler, top=30):
+    """按累计耗时打印前 top 个函数"""
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(top)
+    print(out.getvalue())
+
+
+def print_sections():
+    """打印标记代码段的耗时"""
+    stats = section_stats()
+    if not stats:
+        return
+    print("标记代码段耗时（所有线程）：")
+    print(f"  {'代码段':<28} {'调用次数':>10} {'总耗时(s)':>12} {'平均(ms)':>10} {'最长(ms)':>10}")
+    for name, (calls, total, longest) in sorted(stats.items(), key=lambda x: -x[1][1]):
+        print(f"  {name:<28} {calls:>10} {total:>12.3f} {total / calls * 1000:>10.2f} {longest * 1000:>10.2f}")
@@ -0,0 +1,261 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+原始响应归档模块
+
+采集时把列表接口和详情接口返回的每个原始响应体都保存下来，之后需要新的
+字段（如 areaDistrict）时用 reprocess.py 直接从归档重新生成输出，不必重新采集。
+
+归档目录结构：
+- blobs.dat：只追加的数据文件，每个响应体单独压缩后依次写入
+  （默认 gzip，安装 zstandard 后可使用 zstd）
+- index.db：SQLite 索引
+  - blobs：内容哈希（sha256）-> 数据文件中的偏移和长度，相同内容只保存一次
+  - packets：每次捕获的记录（类型、URL、关键词、城市、页码、捕获时间）
+  - job_packets：encryptJobId -> 包含该职位的列表页和详情响应
+
+    archive = RawArchive('raw_archive')
+    archive.add('joblist', url, body, keyword='python', city='北京', page=1)
+    for packet, body in archive.packets('joblist'):
+        ...
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ('gzip', 'zstd')
+
+
+def _compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("归档中有 zstd 压缩的数据，需要安装 zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _body_bytes(body):
+    """把响应体转换为规范化的 JSON 字节串（键排序），相同内容得到相同哈希"""
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode('utf-8', errors='ignore')
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return body.encode('utf-8')
+    return json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _job_ids(kind, body, job_id=''):
+    """响应中包含的职位 ID"""
+    if kind == 'detail':
+        return [job_id] if job_id else []
+    if kind == 'joblist' and isinstance(body, dict):
+        job_list = (body.get('zpData') or {}).get('jobList') or []
+        return [j.get('encryptJobId') for j in job_list if j.get('encryptJobId')]
+    return []
+
+
+class RawArchive:
+    """
+    内容寻址的原始响应归档（多个线程、多个采集实例可以共用同一目录）
+
+    Args:
+        directory: 归档目录，不存在时自动创建
+        codec: 新写入数据的压缩方式，'gzip' 或 'zstd'（需要安装 zstandard）
+    """
+
+    def __init__(self, directory, codec='gzip'):
+        if codec not in CODECS:
+            raise ValueError(f"未知压缩方式: {codec}（可选 {', '.join(CODECS)}）")
+        if codec == 'zstd' and zstandard is None:
+            raise RuntimeError("zstd 压缩需要安装 zstandard: pip install zstandard")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.codec = codec
+        self.added = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+        self._data_file = os.path.join(directory, 'blobs.dat')
+        self._writer = open(self._data_file, 'ab')
+        self._reader = None
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.db'),
+                                     timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                codec TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS packets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                url TEXT,
+                keyword TEXT,
+                city TEXT,
+                page INTEGER,
+                captured_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_packets_kind ON packets (kind, id);
+
+            CREATE TABLE IF NOT EXISTS job_packets (
+                job_id TEXT NOT NULL,
+                packet_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                PRIMARY KEY (job_id, packet_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_job_packets_kind ON job_packets (kind, job_id);
+        ''')
+
+    def add(self, kind, url, body, keyword='', city='', page=None, job_id=''):
+        """
+        保存一个原始响应
+
+        Args:
+            kind: 'joblist' / 'detail'
+            job_id: 详情响应对应的 encryptJobId（列表页中的职位 ID 自动建立索引）
+
+        Returns:
+            响应内容的哈希
+        """
+        data = _body_bytes(body)
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            parsed = json.loads(data)
+        except ValueError:
+            parsed = None
+        job_ids = _job_ids(kind, parsed, job_id)
+
+        with self._lock:
+            # BEGIN IMMEDIATE 在多个进程之间串行化写入，数据文件偏移与索引保持一致
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                exists = self._conn.execute(
+                    'SELECT 1 FROM blobs WHERE hash = ?', (digest,)
+                ).fetchone()
+                if exists:
+                    self.deduplicated += 1
+                else:
+                    blob = _compress(data, self.codec)
+                    self._writer.seek(0, os.SEEK_END)
+                    offset = self._writer.tell()
+                    self._writer.write(blob)
+                    self._writer.flush()
+                    self._conn.execute(
+                        'INSERT INTO blobs (hash, offset, length, size, codec) VALUES (?, ?, ?, ?, ?)',
+                        (digest, offset, len(blob), len(data), self.codec)
+                    )
+                cur = self._conn.execute(
+                    'INSERT INTO packets (kind, hash, url, keyword, city, page, captured_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (kind, digest, url, keyword, city, page, time.time())
+                )
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO job_packets (job_id, packet_id, kind) VALUES (?, ?, ?)',
+                    [(jid, cur.lastrowid, kind) for jid in job_ids]
+                )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self.added += 1
+        return digest
+
+    def _read(self, offset, length, codec):
+        if self._reader is None:
+            self._writer.flush()
+            self._reader = open(self._data_file, 'rb')
+        self._reader.seek(offset)
+        return json.loads(_decompress(self._reader.read(length), codec))
+
+    def get(self, digest):
+        """按哈希读取响应体，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT offset, length, codec FROM blobs WHERE hash = ?', (digest,)
+            ).fetchone()
+            return self._read(*row) if row else None
+
+    def packets(self, kind=None):
+        """
+        按捕获顺序逐个读取 (packet, body)
+
+        packet 为字典：id、kind、hash、url、keyword、city、page、captured_at
+        """
+        where, params = ('WHERE p.kind = ? ', (kind,)) if kind else ('', ())
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT p.id, p.kind, p.hash, p.url, p.keyword, p.city, p.page, p.captured_at, '
+                'b.offset, b.length, b.codec '
+                f'FROM packets p JOIN blobs b ON b.hash = p.hash {where}ORDER BY p.id', params
+            ).fetchall()
+        names = ('id', 'kind', 'hash', 'url', 'keyword', 'city', 'page', 'captured_at')
+        for row in rows:
+            with self._lock:
+                body = self._read(*row[8:])
+            yield dict(zip(names, row[:8])), body
+
+    def job_packets(self, job_id, kind=None):
+        """包含该职位的全部响应 [(packet_id, kind, hash)]，按捕获顺序"""
+        sql = ('SELECT j.packet_id, j.kind, p.hash FROM job_packets j '
+               'JOIN packets p ON p.id = j.packet_id WHERE j.job_id = ?')
+        params = [job_id]
+        if kind:
+            sql += ' AND j.kind = ?'
+            params.append(kind)
+        with self._lock:
+            return self._conn.execute(sql + ' ORDER BY j.packet_id', params).fetchall()
+
+    def latest_details(self):
+        """每个职位最近一次捕获的详情响应 {job_id: body}"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT j.job_id, b.offset, b.length, b.codec FROM job_packets j '
+                'JOIN packets p ON p.id = j.packet_id JOIN blobs b ON b.hash = p.hash '
+                "WHERE j.kind = 'detail' AND j.packet_id = ("
+                "SELECT MAX(packet_id) FROM job_packets k WHERE k.job_id = j.job_id AND k.kind = 'detail') "
+                'ORDER BY b.offset'
+            ).fetchall()
+            return {job_id: self._read(offset, length, codec)
+                    for job_id, offset, length, codec in rows}
+
+    def stats(self):
+        """归档统计：响应数、去重后的内容数、原始大小、压缩后大小、已索引职位数"""
+        with self._lock:
+            packets = self._conn.execute('SELECT COUNT(*) FROM packets').fetchone()[0]
+            blobs, size, stored = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM blobs'
+            ).fetchone()
+            jobs = self._conn.execute(
+                'SELECT COUNT(DISTINCT job_id) FROM job_packets'
+            ).fetchone()[0]
+        return {'packets': packets, 'blobs': blobs, 'size': size, 'stored': stored, 'jobs': jobs}
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            if self._reader is not None:
+                self._reader.close()
+            self._conn.close()
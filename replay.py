@@ -0,0 +1,370 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+接口数据录制与回放模块
+
+录制模式：包装 ChromiumPage，把监听到的 joblist.json / detail/info.json 数据包
+以及详情页元素文本追加写入 gzip 压缩的 JSON Lines 归档文件
+回放模式：读取归档文件构造无浏览器的 ReplayPage，爬虫原有的解析、去重、
+保存逻辑照常运行，但所有数据包都来自归档、所有等待都立即返回
+
+用途：
+- 不打开浏览器全速跑完采集流程，分析下游代码的性能
+- 精确复现某次异常的采集过程
+"""
+
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from urllib.parse import urlparse, parse_qs
+
+# 监听目标
+JOBLIST_TARGET = 'zpgeek/search/joblist.json'
+DETAIL_TARGET = 'zpgeek/job/detail/info.json'
+
+
+def packet_kind(url):
+    """根据 URL 判断数据包类型：joblist / detail / other"""
+    url = url or ''
+    if JOBLIST_TARGET in url:
+        return 'joblist'
+    if DETAIL_TARGET in url:
+        return 'detail'
+    return 'other'
+
+
+def detail_job_id(url):
+    """从详情接口 URL 中取出 jobId"""
+    query = parse_qs(urlparse(url or '').query)
+    return (query.get('jobId') or [''])[0]
+
+
+def _normalize_body(body):
+    """把响应体转换为可写入 JSON 的对象"""
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode('utf-8', errors='ignore')
+    if isinstance(body, str):
+        try:
+            return json.loads(body)
+        except ValueError:
+            return body
+    return body
+
+
+# ==================== 录制 ====================
+
+class PacketWriter:
+    """归档写入器（gzip 压缩的 JSON Lines，追加写入）"""
+
+    def __init__(self, archive_file):
+        self.archive_file = archive_file
+        self._f = gzip.open(archive_file, 'at', encoding='utf-8')
+        self._lock = threading.Lock()
+        self.write({'type': 'session'})
+
+    def write(self, event):
+        event.setdefault('ts', time.time())
+        line = json.dumps(event, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._f:
+                self._f.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._f:
+                self._f.close()
+                self._f = None
+
+
+class _RecordingListener:
+    """包装 page.listen，把 wait() / steps() 得到的数据包写入归档"""
+
+    def __init__(self, listener, writer):
+        self._listener = listener
+        self._writer = writer
+
+    def __getattr__(self, name):
+        return getattr(self._listener, name)
+
+    def _record(self, packet):
+        if packet and packet.response:
+            self._writer.write({
+                'type': 'packet',
+                'url': packet.url,
+                'body': _normalize_body(packet.response.body),
+            })
+
+    def wait(self, *args, **kwargs):
+        result = self._listener.wait(*args, **kwargs)
+        packets = result if isinstance(result, list) else [result]
+        for packet in packets:
+            self._record(packet)
+        return result
+
+    def steps(self, *args, **kwargs):
+        for packet in self._listener.steps(*args, **kwargs):
+            self._record(packet)
+            yield packet
+
+
+class RecordingPage:
+    """录制模式的页面对象，其余属性和方法全部转发给真实页面"""
+
+    def __init__(self, page, archive_file=None, writer=None):
+        self._page = page
+        self._writer = writer or PacketWriter(archive_file)
+        self.listen = _RecordingListener(page.listen, self._writer)
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+    def record(self, url, body):
+        """记录不经过监听器获得的数据包（如页面内 fetch 的返回值）"""
+        self._writer.write({'type': 'packet', 'url': url, 'body': _normalize_body(body)})
+
+    def ele(self, locator, *args, **kwargs):
+        element = self._page.ele(locator, *args, **kwargs)
+        self._writer.write({
+            'type': 'ele',
+            'url': self._page.url,
+            'locator': locator,
+            'text': element.text if element else None,
+        })
+        return element
+
+    def new_tab(self, *args, **kwargs):
+        """新标签页与当前页面共用同一个归档"""
+        return RecordingPage(self._page.new_tab(*args, **kwargs), writer=self._writer)
+
+    def quit(self, *args, **kwargs):
+        self._writer.close()
+        return self._page.quit(*args, **kwargs)
+
+
+def record_packet(page, url, body):
+    """页面处于录制模式时记录数据包，否则什么都不做"""
+    if isinstance(page, RecordingPage):
+        page.record(url, body)
+
+
+# ==================== 回放 ====================
+
+def load_archive(archive_file):
+    """读取归档文件，按录制会话拆分事件"""
+    sessions = []
+    try:
+        with gzip.open(archive_file, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get('type') == 'session' or not sessions:
+                    sessions.append([])
+                if event.get('type') != 'session':
+                    sessions[-1].append(event)
+    except EOFError:
+        # 录制进程被强制中断时最后一段 gzip 数据可能不完整，保留已读内容
+        pass
+    return sessions
+
+
+class _ReplayListener:
+    """回放模式的监听器，按录制顺序返回对应类型的数据包"""
+
+    def __init__(self, page):
+        self._page = page
+        self._kinds = set()
+
+    def start(self, targets=True, *args, **kwargs):
+        if targets is True:
+            self._kinds = {'joblist', 'detail', 'other'}
+        else:
+            targets = [targets] if isinstance(targets, str) else list(targets)
+            self._kinds = {packet_kind(t) for t in targets}
+
+    def wait(self, timeout=None, count=1, fit_count=True, *args, **kwargs):
+        packets = []
+        while len(packets) < count:
+            packet = self._page._next_packet(self._kinds)
+            if packet is None:
+                break
+            packets.append(packet)
+        if not packets or (fit_count and len(packets) < count):
+            return False
+        return packets[0] if count == 1 else packets
+
+    def steps(self, count=None, timeout=None, gap=1):
+        """按录制顺序逐个产出数据包，没有剩余数据包时结束"""
+        produced = 0
+        while count is None or produced < count:
+            packet = self._page._next_packet(self._kinds)
+            if packet is None:
+                return
+            produced += 1
+            yield packet
+
+    @property
+    def exhausted(self):
+        """归档中已没有监听目标对应的数据包"""
+        return not any(self._page._store.packets[kind] for kind in self._kinds)
+
+    def stop(self):
+        self._kinds = set()
+
+    def pause(self, clear=True):
+        pass
+
+    def resume(self):
+        pass
+
+    def clear(self):
+        pass
+
+
+class _ReplayScroll:
+    """滚动操作在回放模式下没有意义，全部忽略"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class _ReplayWaiter:
+    """page.wait 的替身，回放时所有等待立即返回，条件等待视为已满足"""
+
+    def __call__(self, second=0, scope=None):
+        return None
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: True
+
+
+class _ReplayStore:
+    """一个录制会话的全部事件，同一会话的各个标签页共用"""
+
+    def __init__(self, events):
+        self.packets = {'joblist': deque(), 'detail': deque(), 'other': deque()}
+        self.details = {}
+        self.elements = {}
+
+        for event in events:
+            if event['type'] == 'packet':
+                packet = SimpleNamespace(
+                    url=event['url'],
+                    response=SimpleNamespace(body=event['body'], status=200),
+                )
+                kind = packet_kind(event['url'])
+                self.packets[kind].append(packet)
+                if kind == 'detail':
+                    self.details[detail_job_id(event['url'])] = event['body']
+            elif event['type'] == 'ele':
+                self.elements[(event['url'], event['locator'])] = event['text']
+
+
+class ReplayPage:
+    """回放模式的页面对象，实现爬虫用到的 ChromiumPage 接口子集"""
+
+    def __init__(self, store):
+        self._store = store
+        self.url = ''
+        self.html = ''
+        self.listen = _ReplayListener(self)
+        self.scroll = _ReplayScroll()
+        self.wait = _ReplayWaiter()
+
+    def _next_packet(self, kinds):
+        for kind in ('joblist', 'detail', 'other'):
+            queue = self._store.packets[kind]
+            if kind in kinds and queue:
+                try:
+                    return queue.popleft()
+                except IndexError:
+                    continue
+        return None
+
+    def detail_body(self, job_id):
+        """按 jobId 取回录制的详情数据包"""
+        return self._store.details.get(job_id)
+
+    def get(self, url, *args, **kwargs):
+        self.url = url
+        return True
+
+    def ele(self, locator, *args, **kwargs):
+        text = self._store.elements.get((self.url, locator))
+        return SimpleNamespace(text=text) if text is not None else None
+
+    def run_js(self, script, *args, **kwargs):
+        """
+        回放页面脚本
+
+        以详情接口 URL 列表为第一个参数的脚本（批量获取详情）按 jobId
+        返回录制的响应文本；以列表接口 URL 为第一个参数的脚本（逐页请求列表）
+        按录制顺序返回下一页的响应文本；其余脚本没有返回值
+        """
+        if args and isinstance(args[0], str) and packet_kind(args[0]) == 'joblist':
+            packet = self._next_packet({'joblist'})
+            if packet is None:
+                return None
+            return json.dumps(packet.response.body, ensure_ascii=False)
+        if args and isinstance(args[0], list):
+            bodies = []
+            for url in args[0]:
+                body = self.detail_body(detail_job_id(url))
+                bodies.append(json.dumps(body, ensure_ascii=False) if body is not None else None)
+            return json.dumps(bodies, ensure_ascii=False)
+        return None
+
+    def new_tab(self, url=None, *args, **kwargs):
+        tab = ReplayPage(self._store)
+        if url:
+            tab.get(url)
+        return tab
+
+    def close(self, *args, **kwargs):
+        pass
+
+    def quit(self, *args, **kwargs):
+        pass
+
+
+# 每个归档文件已回放到第几个会话
+_replay_sessions = {}
+
+
+def open_page(record_file='', replay_file='', port=0, user_data_dir=''):
+    """
+    创建页面对象
+
+    Args:
+        record_file: 录制归档路径，非空时返回 RecordingPage
+        replay_file: 回放归档路径，非空时返回 ReplayPage（优先于录制）
+        port: 浏览器调试端口，0 表示使用 DrissionPage 默认端口
+        user_data_dir: 浏览器用户数据目录，空字符串表示使用默认目录
+
+    同一台机器同时运行多个采集实例时，每个实例使用不同的端口和用户数据目录
+
+    每次调用对应录制时的一次 ChromiumPage()，多次调用按顺序回放各个会话
+    """
+    if replay_file:
+        if replay_file not in _replay_sessions:
+            _replay_sessions[replay_file] = deque(load_archive(replay_file))
+        sessions = _replay_sessions[replay_file]
+        return ReplayPage(_ReplayStore(sessions.popleft() if sessions else []))
+
+    from DrissionPage import ChromiumPage, ChromiumOptions
+    if port or user_data_dir:
+        options = ChromiumOptions()
+        if port:
+            options.set_local_port(port)
+        if user_data_dir:
+            options.set_user_data_path(user_data_dir)
+        page = ChromiumPage(options)
+    else:
+        page = ChromiumPage()
+    if record_file:
+        return RecordingPage(page, record_file)
+    return page
@@ -0,0 +1,133 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+从原始响应归档重新生成输出（不打开浏览器、不请求网络）
+
+采集时保存的原始响应（见 raw_archive.py）包含列表接口和详情接口返回的全部字段。
+修改了字段提取、清洗或输出格式之后，用本脚本直接从归档重新生成 CSV /
+Parquet / JSON Lines 和职位数据库，不必重新采集：
+
+    python reprocess.py --archive raw_archive -o boss_jobs.csv
+    python reprocess.py --archive raw_archive -o data.csv --format simple
+    python reprocess.py --archive raw_archive -o jobs.csv --export jobs.parquet --store boss_jobs.db
+
+职位记录的生成、去重和字段补充与采集时使用同一套函数（batch_spider_improved.py），
+每个职位使用最近一次捕获的详情响应。
+"""
+
+import argparse
+import signal
+import time
+from datetime import datetime
+
+import batch_spider_improved as spider
+from job_store import JobStore
+from output_formats import export_rows
+import profiling
+from raw_archive import RawArchive
+
+
+@profiling.section('rebuild_jobs')
+def rebuild_jobs(archive, keywords=None, cities=None):
+    """
+    按捕获顺序从归档中的列表响应重建职位记录，并补上详情
+
+    Args:
+        keywords: 只保留这些关键词的职位，None 表示全部
+        cities: 只保留这些城市的职位，None 表示全部
+
+    Returns:
+        职位记录列表（已按 公司+职位+城市 去重）
+    """
+    details = archive.latest_details()
+    seen = set()
+    jobs = []
+
+    for packet, body in archive.packets('joblist'):
+        if keywords and packet['keyword'] not in keywords:
+            continue
+        if cities and packet['city'] not in cities:
+            continue
+        if not isinstance(body, dict) or body.get('code', 0) != 0:
+            continue
+        zp_data = body.get('zpData') or {}
+        collected_at = datetime.fromtimestamp(packet['captured_at']).strftime('%Y-%m-%d %H:%M:%S')
+
+        for raw in zp_data.get('jobList') or []:
+            job = spider.build_job(raw, packet['keyword'] or '', packet['city'] or '',
+                                   zp_data.get('lid', ''), collected_at)
+            spider.enrich_job(job)
+            if job['_dedup_key'] in seen:
+                continue
+            seen.add(job['_dedup_key'])
+
+            detail = details.get(job['_job_id'])
+            job_info = spider.parse_detail_job_info(detail) if detail is not None else None
+            job['jd_text'] = spider.job_info_text(job_info) if job_info else ''
+            job['notes'] = spider.job_notes(job)
+            jobs.append(job)
+
+    return jobs
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='从原始响应归档重新生成输出')
+    parser.add_argument('--archive', default=spider.RAW_ARCHIVE_DIR, help='原始响应归档目录')
+    parser.add_argument('-o', '--output', default=spider.OUTPUT_FILE, help='输出 CSV 文件')
+    parser.add_argument('--format', dest='output_format', choices=['full', 'simple'],
+                        default='full', help='输出格式：full 完整字段 / simple 中文字段')
+    parser.add_argument('--export', dest='exports', action='append', default=[],
+                        help='同时导出的文件（*.parquet / *.jsonl.gz），可重复指定')
+    parser.add_argument('--store', default='', help='同时写入的职位数据库（SQLite）')
+    parser.add_argument('-k', '--keyword', dest='keywords', action='append',
+                        help='只输出这些关键词的职位，可重复指定')
+    parser.add_argument('-c', '--city', dest='cities', action='append',
+                        help='只输出这些城市的职位，可重复指定')
+    profiling.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def reprocess(args):
+    """按解析后的参数从归档重新生成输出"""
+    # 不需要采集脚本的中断处理（保存断点），恢复默认行为
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    spider.configure(OUTPUT_FORMAT=args.output_format)
+
+    started = time.perf_counter()
+    archive = RawArchive(args.archive)
+    try:
+        stats = archive.stats()
+        print(f"正在读取归档 {args.archive}（{stats['packets']} 个响应，{stats['jobs']} 个职位）...")
+        jobs = rebuild_jobs(archive, args.keywords, args.cities)
+    finally:
+        archive.close()
+    print(f"重建职位：{len(jobs)} 条，有职位描述 {sum(1 for j in jobs if j['jd_text'])} 条")
+
+    if args.output_format == 'simple':
+        fieldnames, encoding = list(spider.SIMPLE_FIELDS), 'utf-8'
+    else:
+        fieldnames, encoding = spider.FIELDNAMES, 'utf-8-sig'
+    rows = [spider.output_row(job) for job in jobs]
+
+    for path in [args.output] + args.exports:
+        print(f"正在写入 {path}...")
+        export_rows(rows, path, fieldnames, encoding)
+
+    if args.store:
+        store = JobStore(args.store)
+        try:
+            changed = store.upsert_many((job['_job_id'], spider.store_record(job)) for job in jobs)
+            print(f"✓ 职位数据库: {args.store}（更新 {changed} 个，共 {len(store)} 个职位）")
+        finally:
+            store.close()
+
+    print(f"✓ 重新生成完成，用时 {time.perf_counter() - started:.1f} 秒")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profiling.run(lambda: reprocess(args), args)
+
+
+if __name__ == '__main__':
+    main()
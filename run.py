@@ -7,6 +7,8 @@ BOSS 直聘职位分析一键运行脚本
 1. 修改下面的 SEARCH_QUERY 和 CITY_CODE
 2. 运行: python3 run.py
 3. 等待生成 tech_stack_analysis.md 报告
+
+配置通过命令行参数传给 collector.py 和 analyze_tech_stack.py，不修改源文件
 """
 
 import os
@@ -33,6 +35,9 @@ MAX_SCROLLS = 20
 # 是否启用大模型深度分析
 USE_LLM_ANALYSIS = True
 
+# 采集结果（中文字段 CSV）
+DATA_FILE = 'data.csv'
+
 # ==================================================
 
 
@@ -62,40 +67,6 @@ def get_city_name(code):
     return city_map.get(code, code)
 
 
-def update_config():
-    """更新配置文件"""
-    print("\n📝 正在更新配置...")
-
-    # 更新 boss_spider.py 的配置
-    with open('boss_spider.py', 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # 替换搜索关键词
-    content = replace_config(content, "SEARCH_QUERY = .*", f"SEARCH_QUERY = '{SEARCH_QUERY}'")
-    content = replace_config(content, "CITY_CODE = .*", f"CITY_CODE = '{CITY_CODE}'")
-    content = replace_config(content, "MAX_SCROLLS = .*", f"MAX_SCROLLS = {MAX_SCROLLS}")
-
-    with open('boss_spider.py', 'w', encoding='utf-8') as f:
-        f.write(content)
-
-    # 更新 analyze_tech_stack.py 的配置
-    with open('analyze_tech_stack.py', 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    content = replace_config(content, "USE_LLM = .*", f"USE_LLM = {USE_LLM_ANALYSIS}")
-
-    with open('analyze_tech_stack.py', 'w', encoding='utf-8') as f:
-        f.write(content)
-
-    print("  ✓ 配置已更新")
-
-
-def replace_config(content, pattern, replacement):
-    """替换配置"""
-    import re
-    return re.sub(pattern, replacement, content)
-
-
 def run_spider():
     """运行爬虫"""
     print("\n" + "=" * 70)
@@ -110,7 +81,14 @@ def run_spider():
 
     try:
         result = subprocess.run(
-            [sys.executable, 'boss_spider.py'],
+            [sys.executable, 'collector.py',
+             '--keyword', SEARCH_QUERY,
+             '--city', CITY_CODE,
+             '--max-pages', str(MAX_SCROLLS),
+             '--max-scrolls', str(MAX_SCROLLS),
+             '--output', DATA_FILE,
+             '--format', 'simple',
+             '--yes'],
             check=True,
             capture_output=False
         )
@@ -131,7 +109,8 @@ def run_analysis():
 
     try:
         result = subprocess.run(
-            [sys.executable, 'analyze_tech_stack.py'],
+            [sys.executable, 'analyze_tech_stack.py', '--input', DATA_FILE]
+            + ([] if USE_LLM_ANALYSIS else ['--no-llm']),
             check=True,
             capture_output=False
         )
@@ -151,7 +130,7 @@ def show_result():
     # 检查文件是否存在
     json_file = 'tech_stack_analysis.json'
     md_file = 'tech_stack_analysis.md'
-    csv_file = 'data.csv'
+    csv_file = DATA_FILE
 
     print("\n📁 生成的文件:")
 
@@ -185,20 +164,17 @@ def main():
     """主函数"""
     print_banner()
 
-    # 1. 更新配置
-    update_config()
-
-    # 2. 运行爬虫
+    # 1. 运行爬虫
     if not run_spider():
         print("\n✗ 流程中断")
         return
 
-    # 3. 运行分析
+    # 2. 运行分析
     if not run_analysis():
         print("\n✗ 流程中断")
         return
 
-    # 4. 显示结果
+    # 3. 显示结果
     show_result()
 
 
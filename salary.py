@@ -0,0 +1,123 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+薪资解析（采集脚本和清洗脚本共用）
+
+把职位列表中的薪资文本换算为年薪（元）：
+
+    15-25K·13薪       月薪（K / 千 / 万 / 元/月），按 N薪 计算，没有写明时按 12 薪
+    200-300元/天      日薪，按每月 21.75 个工作日、12 个月
+    50-80元/时        时薪，按每天 8 小时
+    30-50万/年        年薪
+    3000元/周         周薪，按 52 周
+
+薪资文本的种类很少（同一个 "15-25K·13薪" 会重复出现成千上万次），
+parse_salary() 按原始文本缓存解析结果（最多 SALARY_CACHE_SIZE 种）；
+pandas 的列用 parse_salary_series()，每种文本只解析一次。
+"""
+
+import functools
+import re
+import unicodedata
+from collections import namedtuple
+
+# 缓存的薪资文本种类上限
+SALARY_CACHE_SIZE = 4096
+
+# 日薪、时薪、周薪换算年薪
+WORK_DAYS_PER_MONTH = 21.75
+WORK_HOURS_PER_DAY = 8
+WEEKS_PER_YEAR = 52
+
+SalaryInfo = namedtuple('SalaryInfo', ['months', 'min_year', 'max_year', 'avg_year', 'notes'])
+
+NEGOTIABLE = SalaryInfo(None, None, None, None, '面议')
+
+# 数值单位（相对于 元）
+_UNITS = {'k': 1000, '千': 1000, 'w': 10000, '万': 10000, '元': 1, '': 1}
+
+# 计薪周期 -> 每年的周期数（None 表示月薪，按 N薪 计算）
+_PERIODS = {
+    '': None, '月': None,
+    '年': 1,
+    '周': WEEKS_PER_YEAR,
+    '天': WORK_DAYS_PER_MONTH * 12, '日': WORK_DAYS_PER_MONTH * 12,
+    '时': WORK_DAYS_PER_MONTH * 12 * WORK_HOURS_PER_DAY,
+    '小时': WORK_DAYS_PER_MONTH * 12 * WORK_HOURS_PER_DAY,
+}
+
+# 全角字符先经 NFKC 转为半角
+_TRANSLATE = str.maketrans({'~': '-', '—': '-', '–': '-', '至': '-',
+                            'K': 'k', 'W': 'w', ' ': None})
+
+_SALARY_RE = re.compile(
+    r'(?P<min>\d+(?:\.\d+)?)(?P<min_unit>[k千w万]?)'
+    r'(?:-(?P<max>\d+(?:\.\d+)?)(?P<max_unit>[k千w万]?))?'
+    r'(?P<yuan>元)?'
+    r'(?:/(?P<period>小时|[月年周天日时]))?'
+)
+_MONTHS_RE = re.compile(r'(\d+)薪')
+
+
+@functools.lru_cache(maxsize=SALARY_CACHE_SIZE)
+def parse_salary(salary_text):
+    """
+    解析薪资文本
+
+    Returns:
+        SalaryInfo(months, min_year, max_year, avg_year, notes)，无法解析时年薪为 None，
+        notes 说明原因（面议 / 无法解析 / 默认12薪）
+    """
+    if not isinstance(salary_text, str):
+        return NEGOTIABLE
+    text = unicodedata.normalize('NFKC', salary_text).translate(_TRANSLATE)
+    if not text or text == '面议':
+        return NEGOTIABLE
+
+    months_match = _MONTHS_RE.search(text)
+    months = int(months_match.group(1)) if months_match else 12
+
+    # 跳过 "13薪" 等不带单位的数字
+    for match in _SALARY_RE.finditer(text):
+        # "15-25K" 只有最后一个数带单位，"15K-25K" 两个数都带单位
+        max_unit = match.group('max_unit') or ''
+        min_unit = match.group('min_unit') or max_unit
+        if match.group('max') is None:
+            max_unit = min_unit
+        if min_unit or max_unit or match.group('yuan'):
+            break
+    else:
+        return SalaryInfo(months, None, None, None, f'无法解析: {salary_text}')
+
+    per_year = _PERIODS[match.group('period') or '']
+    notes = ''
+    if per_year is None:
+        per_year = months
+        if not months_match:
+            notes = '默认12薪'
+
+    min_value = float(match.group('min')) * _UNITS[min_unit]
+    max_value = float(match.group('max') or match.group('min')) * _UNITS[max_unit]
+    min_year = int(round(min_value * per_year))
+    max_year = int(round(max_value * per_year))
+    return SalaryInfo(months, min_year, max_year, (min_year + max_year) // 2, notes)
+
+
+def parse_salary_series(series):
+    """
+    解析 pandas 的薪资列：每种薪资文本只解析一次，再按编码展开到每一行
+
+    Returns:
+        与 series 索引相同的 DataFrame（列同 SalaryInfo，数值列为可空整数）
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series)
+    parsed = [parse_salary(value) for value in uniques] + [NEGOTIABLE]
+    table = pd.DataFrame(parsed, columns=list(SalaryInfo._fields))
+    for column in ('months', 'min_year', 'max_year', 'avg_year'):
+        table[column] = table[column].astype('Int64')
+    # 缺失值的编码为 -1，对应末尾的 面议 行
+    result = table.take(codes)
+    result.index = series.index
+    return result
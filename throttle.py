@@ -0,0 +1,161 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+"""
+请求速率控制模块
+
+RateBudget：线程安全的全局请求速率预算。列表翻页和详情请求从同一个
+预算中预约请求时间，无论有多少个线程/阶段同时工作，总请求速率都不超过上限。
+
+PacingController：自适应请求间隔。根据观察到的响应延迟、非零 code、
+空响应和超时调整两次请求之间的等待时间：出错时成倍放大间隔，
+响应正常时逐步缩小，但不低于配置的下限。
+"""
+
+import random
+import threading
+import time
+
+
+class RateBudget:
+    """
+    请求速率预算（按预约时间排队的令牌桶）
+
+    Args:
+        rate: 平均请求速率上限（次/秒）
+        burst: 允许的突发请求数
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, n=1):
+        """预约 n 次请求，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            # 空闲期间最多积累 burst 个令牌
+            start = max(self._next, now - (self.burst - 1) / self.rate)
+            self._next = start + n / self.rate
+            return max(0.0, start - now)
+
+    def acquire(self, n=1, sleep=time.sleep):
+        """
+        预约 n 次请求并等待到可以发出的时间
+
+        Args:
+            n: 请求次数
+            sleep: 等待函数，默认 time.sleep，也可以传入 page.wait
+        """
+        delay = self.reserve(n)
+        if delay > 0:
+            sleep(delay)
+        return delay
+
+
+class PacingController:
+    """
+    自适应请求间隔控制器
+
+    Args:
+        floor: 间隔下限（秒），响应正常时最多缩小到这里
+        ceiling: 间隔上限（秒）
+        initial: 初始间隔（秒）
+        backoff: 出错（非零 code、空响应、超时）时间隔放大的倍数
+        recovery: 响应正常时间隔缩小的倍数
+        latency_target: 响应延迟超过该秒数时视为服务端变慢，间隔小幅放大
+        jitter: 每次等待在当前间隔上下随机浮动的比例
+    """
+
+    OUTCOMES = ('ok', 'error', 'empty', 'timeout')
+
+    # 延迟和错误率的滑动平均系数
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, floor, ceiling, initial=None, backoff=2.0, recovery=0.9,
+                 latency_target=3.0, jitter=0.25):
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.backoff = backoff
+        self.recovery = recovery
+        self.latency_target = latency_target
+        self.jitter = jitter
+        self.delay = min(self.ceiling, max(floor, initial if initial is not None else floor))
+
+        self.counts = dict.fromkeys(self.OUTCOMES, 0)
+        self.latency_avg = None
+        self.latency_max = 0.0
+        self.error_rate = 0.0
+        self.waits = 0
+        self.total_wait = 0.0
+        # 调整后间隔停在下限的次数：长期停在下限且错误率低说明下限还可以调小
+        self.floor_hits = 0
+        self._lock = threading.Lock()
+
+    def observe(self, outcome='ok', latency=None):
+        """
+        记录一次请求的结果并调整间隔
+
+        Args:
+            outcome: 'ok' / 'error'（非零 code 或格式异常）/ 'empty' / 'timeout'
+            latency: 响应耗时（秒），未知时为 None
+        """
+        with self._lock:
+            self.counts[outcome] += 1
+            failed = outcome != 'ok'
+            a = self.EWMA_ALPHA
+            self.error_rate = (1 - a) * self.error_rate + a * failed
+
+            if latency is not None:
+                self.latency_max = max(self.latency_max, latency)
+                self.latency_avg = (latency if self.latency_avg is None
+                                    else (1 - a) * self.latency_avg + a * latency)
+
+            if failed:
+                self.delay *= self.backoff
+            elif latency is not None and latency > self.latency_target:
+                self.delay *= 1 + (1 - self.recovery)
+            else:
+                self.delay *= self.recovery
+            self.delay = min(self.ceiling, max(self.floor, self.delay))
+            if self.delay == self.floor:
+                self.floor_hits += 1
+
+    def next_delay(self):
+        """本次应等待的秒数（当前间隔加随机浮动）"""
+        with self._lock:
+            delay = self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            delay = min(self.ceiling, max(self.floor, delay))
+            self.waits += 1
+            self.total_wait += delay
+            return delay
+
+    def wait(self, sleep=time.sleep):
+        """
+        按当前间隔等待
+
+        Args:
+            sleep: 等待函数，默认 time.sleep，也可以传入 page.wait
+        """
+        delay = self.next_delay()
+        sleep(delay)
+        return delay
+
+    def metrics(self):
+        """当前状态，用于根据实际数据调整下限"""
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                'delay': round(self.delay, 3),
+                'floor': self.floor,
+                'ceiling': self.ceiling,
+                'requests': total,
+                **self.counts,
+                'error_rate_ewma': round(self.error_rate, 4),
+                'latency_avg': round(self.latency_avg, 3) if self.latency_avg is not None else None,
+                'latency_max': round(self.latency_max, 3),
+                'waits': self.waits,
+                'total_wait': round(self.total_wait, 1),
+                'at_floor_pct': round(100.0 * self.floor_hits / total, 1) if total else 0.0,
+            }